@@ -0,0 +1,97 @@
+"""
+Measure the memory allocated for the per-request and routing objects.
+
+Each class is compared with an equivalent class which keeps its attributes in
+a per-instance `__dict__` rather than `__slots__`.
+
+```bash
+PYTHONPATH=src python benchmarks/allocations.py
+```
+"""
+
+import gc
+import tracemalloc
+from typing import Any, Callable
+
+from bareasgi import HttpRequest, HttpResponse, LifespanRequest, WebSocketRequest
+from bareasgi.basic_router.path_definition import PathDefinition
+from bareasgi.basic_router.path_segment import PathSegment
+from bareasgi.http.instance import BodyIterator
+
+COUNT = 100_000
+
+SCOPE: dict[str, Any] = {
+    'type': 'http',
+    'method': 'GET',
+    'path': '/foo/bar',
+    'query_string': b'',
+    'headers': [(b'host', b'localhost')],
+}
+
+
+INFO: dict[str, Any] = {}
+CONTEXT: dict[str, Any] = {}
+MATCHES: dict[str, Any] = {}
+
+
+async def _receive() -> Any:
+    return {'type': 'http.disconnect'}
+
+
+def _without_slots(cls: type) -> type:
+    """Make a copy of a class which stores its attributes in a __dict__"""
+    namespace = {
+        name: value
+        for name, value in cls.__dict__.items()
+        if name not in ('__slots__', '__dict__', '__weakref__') and
+        name not in getattr(cls, '__slots__', ())
+    }
+    return type(cls.__name__, cls.__bases__, namespace)
+
+
+FACTORIES: list[tuple[type, Callable[[type], Any]]] = [
+    (HttpRequest, lambda cls: cls(SCOPE, INFO, CONTEXT, MATCHES, None)),
+    (HttpResponse, lambda cls: cls(200)),
+    (BodyIterator, lambda cls: cls(_receive, b'', False)),
+    (WebSocketRequest, lambda cls: cls(SCOPE, INFO, CONTEXT, MATCHES, None)),
+    (LifespanRequest, lambda cls: cls(SCOPE, INFO)),
+    (PathSegment, lambda cls: cls('{name:int}')),
+    (PathDefinition, lambda cls: cls('/foo/{name:int}/bar')),
+]
+
+
+def measure(cls: type, factory: Callable[[type], Any]) -> tuple[float, float]:
+    """Measure the bytes and gc tracked objects allocated per instance"""
+    gc.collect()
+    objects_before = len(gc.get_objects())
+    tracemalloc.start()
+    instances = [factory(cls) for _ in range(COUNT)]
+    allocated, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    objects_after = len(gc.get_objects())
+    del instances
+    # Discount the list holding the instances.
+    allocated -= COUNT * 8
+    return allocated / COUNT, (objects_after - objects_before - 1) / COUNT
+
+
+def main() -> None:
+    """Run the benchmark"""
+    print(
+        f'{"class":<18}'
+        f'{"bytes (dict)":>14}{"bytes (slots)":>15}{"saved":>8}'
+        f'{"objects (dict)":>16}{"objects (slots)":>17}'
+    )
+    for cls, factory in FACTORIES:
+        dict_bytes, dict_objects = measure(_without_slots(cls), factory)
+        slots_bytes, slots_objects = measure(cls, factory)
+        print(
+            f'{cls.__name__:<18}'
+            f'{dict_bytes:>14.0f}{slots_bytes:>15.0f}'
+            f'{dict_bytes - slots_bytes:>8.0f}'
+            f'{dict_objects:>16.2f}{slots_objects:>17.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,6 @@
 
 import logging
 
-import bareutils.header as header
 from bareasgi import (
     Application,
     HttpRequest,
@@ -62,9 +61,8 @@ async def get_form(_request: HttpRequest) -> HttpResponse:
 
 async def post_form(request: HttpRequest) -> HttpResponse:
     """A response handler that reads the cookies from a posted form."""
-    cookies = header.cookie(request.scope['headers'])
     html_list = '<dl>'
-    for name, values in cookies.items():
+    for name, values in request.cookies.items():
         for value in values:
             html_list += f'<dt>{name.decode()}</dt><dd>{value.decode()}</dd>'
     html_list += '</dl>'
@@ -0,0 +1,72 @@
+"""
+An example of streaming a multipart/form-data file upload.
+"""
+
+import logging
+import shutil
+
+from bareasgi import (
+    Application,
+    HttpRequest,
+    HttpResponse,
+    text_writer
+)
+
+logging.basicConfig(level=logging.DEBUG)
+
+FORM = """
+<!DOCTYPE html>
+<html>
+<body>
+
+<h2>File Upload</h2>
+
+<form action="/upload" method="post" enctype="multipart/form-data">
+  Description:<br>
+  <input type="text" name="description" value="A file">
+  <br>
+  File:<br>
+  <input type="file" name="file">
+  <br><br>
+  <input type="submit" value="Submit">
+</form>
+
+</body>
+</html>
+"""
+
+
+async def get_form(_request: HttpRequest) -> HttpResponse:
+    """A request handler which returns a form"""
+    return HttpResponse(
+        200,
+        [(b'content-type', b'text/html')],
+        text_writer(FORM)
+    )
+
+
+async def upload(request: HttpRequest) -> HttpResponse:
+    """A request handler which streams the uploaded files to disk"""
+    lines = []
+    async for part in request.multipart():
+        if part.filename is None:
+            lines.append(f'{part.name}={await part.text()}')
+        else:
+            with await part.spool() as src, open('/tmp/upload', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            lines.append(f'{part.name}: saved {part.filename}')
+    return HttpResponse(
+        200,
+        [(b'content-type', b'text/plain')],
+        text_writer('\n'.join(lines))
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    app = Application()
+    app.http_router.add({'GET'}, '/', get_form)
+    app.http_router.add({'POST'}, '/upload', upload)
+
+    uvicorn.run(app, port=9009)
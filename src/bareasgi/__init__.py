@@ -10,6 +10,8 @@ from bareutils import (
 
 from .application import Application
 from .http import (
+    Codec,
+    CodecRegistry,
     HttpRequest,
     HttpResponse,
     HttpRequestCallback,
@@ -18,6 +20,8 @@ from .http import (
     make_middleware_chain
 )
 from .lifespan import LifespanRequest
+from .limits import MemoryBudget
+from .streams import StreamLimits, StreamStatistics
 from .typing import Scope
 from .websockets import WebSocket, WebSocketRequest, WebSocketRequestCallback
 
@@ -31,6 +35,8 @@ __all__ = [
 
     "Application",
 
+    "Codec",
+    "CodecRegistry",
     "HttpRequest",
     "HttpResponse",
     "HttpRequestCallback",
@@ -40,6 +46,11 @@ __all__ = [
 
     "LifespanRequest",
 
+    "StreamLimits",
+    "StreamStatistics",
+
+    "MemoryBudget",
+
     "WebSocket",
     "WebSocketRequest",
     "WebSocketRequestCallback",
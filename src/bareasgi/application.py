@@ -6,11 +6,13 @@ from typing import Any, Callable, Final
 from bareutils import text_writer
 
 from .http import (
+    CodecRegistry,
     HttpRouter,
     HttpResponse,
     HttpMiddlewareCallback,
     HttpRequestCallback
 )
+from .http.deadline import DEFAULT_TIMEOUT_RESPONSE
 from .lifespan import LifespanRequestHandler
 from .websockets import (
     WebSocketRouter,
@@ -20,6 +22,8 @@ from .websockets import (
 
 from .basic_router import BasicHttpRouter, BasicWebSocketRouter
 from .core_application import CoreApplication
+from .limits import MemoryBudget
+from .streams import StreamLimits
 
 LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
 
@@ -46,7 +50,13 @@ class Application(CoreApplication):
             startup_handlers: list[LifespanRequestHandler] | None = None,
             shutdown_handlers: list[LifespanRequestHandler] | None = None,
             not_found_response: HttpResponse = DEFAULT_NOT_FOUND_RESPONSE,
-            info: dict[str, Any] | None = None
+            info: dict[str, Any] | None = None,
+            codecs: CodecRegistry | None = None,
+            request_timeout: float | None = None,
+            timeout_response: HttpResponse = DEFAULT_TIMEOUT_RESPONSE,
+            idle_timeout: float | None = None,
+            stream_limits: StreamLimits | None = None,
+            memory_budget: MemoryBudget | None = None
     ) -> None:
         """Construct the application
 
@@ -93,6 +103,27 @@ class Application(CoreApplication):
                 found (404) response. Defaults to DEFAULT_NOT_FOUND_RESPONSE.
             info (dict[str, Any] | None, optional): Optional
                 dictionary for user data. Defaults to None.
+            codecs (CodecRegistry | None, optional): The codecs used to
+                decode request and encode response content by media type.
+                Defaults to None, in which case the default registry is used.
+            request_timeout (float | None, optional): The number of seconds
+                within which a handler must respond, after which it is
+                cancelled and the timeout response is sent. The deadline is
+                available to handlers as `request.deadline`. Defaults to None.
+            timeout_response (HttpResponse, optional): The response sent when
+                a request exceeds its deadline, for example a 503 rather than
+                the default 504. Defaults to DEFAULT_TIMEOUT_RESPONSE.
+            idle_timeout (float | None, optional): The number of seconds to
+                wait for each chunk of a streamed response body, after which
+                the response is abandoned. Defaults to None.
+            stream_limits (StreamLimits | None, optional): Limits for long
+                lived connections, such as server sent events and WebSockets.
+                Defaults to None.
+            memory_budget (MemoryBudget | None, optional): A process wide
+                budget for buffered bytes. Request bodies reserve from it while
+                they are buffered, and requests with more body to come are
+                refused with a 503 which closes the connection while it is
+                exhausted. Defaults to None.
         """
         super().__init__(
             middlewares or [],
@@ -101,26 +132,44 @@ class Application(CoreApplication):
             ws_router or BasicWebSocketRouter(),
             startup_handlers or [],
             shutdown_handlers or [],
-            info or {}
+            info or {},
+            codecs,
+            request_timeout,
+            timeout_response,
+            idle_timeout,
+            stream_limits,
+            memory_budget
         )
 
     def on_http_request(
             self,
             methods: set[str],
-            path: str
+            path: str,
+            *,
+            priority: str | None = None
     ) -> Callable[[HttpRequestCallback], HttpRequestCallback]:
         """A decorator to add an http route handler to the application
 
         Args:
             methods (AbstractSet[str]): The http methods, e.g. {{'POST', 'PUT'}
             path (str): The path
+            priority (str | None, optional): The priority class of the
+                requests, e.g. "batch". Defaults to None.
 
         Returns:
             Callable[[HttpRequestCallback], HttpRequestCallback]: The decorated
                 request.
         """
         def decorator(callback: HttpRequestCallback) -> Callable:
-            self.http_router.add(methods, path, callback)
+            if priority is None:
+                self.http_router.add(methods, path, callback)
+            else:
+                self.http_router.add(
+                    methods,
+                    path,
+                    callback,
+                    priority=priority
+                )
             return callback
 
         return decorator
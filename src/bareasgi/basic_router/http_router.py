@@ -11,7 +11,7 @@ from .path_definition import PathDefinition
 
 LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
 
-Route = tuple[PathDefinition, HttpRequestCallback]
+Route = tuple[PathDefinition, HttpRequestCallback, str | None]
 
 
 class BasicHttpRouter(HttpRouter):
@@ -33,18 +33,21 @@ class BasicHttpRouter(HttpRouter):
             self,
             methods: set[str],
             path: str,
-            callback: HttpRequestCallback
+            callback: HttpRequestCallback,
+            *,
+            priority: str | None = None
     ) -> None:
         LOGGER.debug('Adding route for %s on "%s".', methods, path)
         path_definition = PathDefinition(path)
         for method in methods:
-            self.add_route(method, path_definition, callback)
+            self.add_route(method, path_definition, callback, priority)
 
     def add_route(
             self,
             method: str,
             path_definition: PathDefinition,
-            callback: HttpRequestCallback
+            callback: HttpRequestCallback,
+            priority: str | None = None
     ) -> None:
         """Add a route to a callback for a method and path definition
 
@@ -52,9 +55,11 @@ class BasicHttpRouter(HttpRouter):
             method (str): The method.
             path_definition (PathDefinition): The path definition
             callback (HttpRequestCallback): The callback
+            priority (str | None, optional): The priority class of the
+                requests. Defaults to None.
         """
         path_definition_list = self._routes.setdefault(method, [])
-        path_definition_list.append((path_definition, callback))
+        path_definition_list.append((path_definition, callback, priority))
 
     async def _not_found(
             self,
@@ -67,9 +72,17 @@ class BasicHttpRouter(HttpRouter):
             method: str,
             path: str
     ) -> tuple[HttpRequestCallback, Mapping[str, Any]]:
+        handler, matches, _priority = self.resolve_route(method, path)
+        return handler, matches
+
+    def resolve_route(
+            self,
+            method: str,
+            path: str
+    ) -> tuple[HttpRequestCallback, Mapping[str, Any], str | None]:
         path_definition_list = self._routes.get(method)
         if path_definition_list:
-            for path_definition, handler in path_definition_list:
+            for path_definition, handler, priority in path_definition_list:
                 is_match, matches = path_definition.match(path)
                 if is_match:
                     LOGGER.debug(
@@ -80,7 +93,7 @@ class BasicHttpRouter(HttpRouter):
                         matches,
                         extra={'method': method, 'path': path}
                     )
-                    return handler, matches
+                    return handler, matches, priority
 
         LOGGER.warning(
             'Failed to find a match for %s on "%s".',
@@ -88,4 +101,4 @@ class BasicHttpRouter(HttpRouter):
             path,
             extra={'method': method, 'path': path}
         )
-        return self._not_found, {}
+        return self._not_found, {}, None
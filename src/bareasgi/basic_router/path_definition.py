@@ -10,6 +10,8 @@ from .path_segment import PathSegment
 class PathDefinition:
     """A class capturing a matchable path"""
 
+    __slots__ = ('path', 'ends_with_slash', 'segments')
+
     NO_MATCH: tuple[bool, Mapping[str, Any]] = (False, {})
 
     def __init__(self, path: str) -> None:
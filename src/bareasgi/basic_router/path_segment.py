@@ -30,6 +30,8 @@ CONVERTERS: Mapping[str, Converter] = {
 class PathSegment:
     """A class representing the segment of a path"""
 
+    __slots__ = ('name', 'type', 'format', 'is_variable')
+
     def __init__(self, segment: str) -> None:
         """Create a path segment
         A path segment can be an absolute name "foo", a variable "{foo}", a
@@ -1,7 +1,7 @@
 """The core ASGI application"""
 
 import logging
-from typing import Any, Final, cast
+from typing import TYPE_CHECKING, Any, Final, cast
 
 from .http import (
     HTTPScope,
@@ -24,14 +24,25 @@ from .typing import (
     ASGIReceiveCallable
 )
 
-from .http import HttpInstance, HttpRouter, HttpMiddlewareCallback
+from .http import (
+    CodecRegistry,
+    HttpInstance,
+    HttpResponse,
+    HttpRouter,
+    HttpMiddlewareCallback
+)
+from .http.deadline import DEFAULT_TIMEOUT_RESPONSE
 from .lifespan import LifespanRequestHandler, LifespanInstance
+from .limits import MemoryBudget
 from .websockets import (
     WebSocketRouter,
     WebSocketInstance,
     WebSocketMiddlewareCallback
 )
 
+if TYPE_CHECKING:
+    from .streams import StreamLimits
+
 LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
 
 
@@ -46,9 +57,21 @@ class CoreApplication:
             ws_router: WebSocketRouter,
             startup_handlers: list[LifespanRequestHandler],
             shutdown_handlers: list[LifespanRequestHandler],
-            info: dict[str, Any]
+            info: dict[str, Any],
+            codecs: CodecRegistry | None = None,
+            request_timeout: float | None = None,
+            timeout_response: HttpResponse = DEFAULT_TIMEOUT_RESPONSE,
+            idle_timeout: float | None = None,
+            stream_limits: 'StreamLimits | None' = None,
+            memory_budget: MemoryBudget | None = None
     ) -> None:
         self.info = info
+        self.codecs = codecs
+        self.request_timeout = request_timeout
+        self.timeout_response = timeout_response
+        self.idle_timeout = idle_timeout
+        self.stream_limits = stream_limits
+        self.memory_budget = memory_budget
         self.middlewares = middlewares
         self.http_router = http_router
         self.ws_router = ws_router
@@ -80,7 +103,13 @@ class CoreApplication:
             scope,
             self.http_router,
             self.middlewares,
-            self.info
+            self.info,
+            self.codecs,
+            self.request_timeout,
+            self.timeout_response,
+            self.idle_timeout,
+            self.stream_limits,
+            self.memory_budget
         )
         await instance.process(receive, send)
 
@@ -94,7 +123,8 @@ class CoreApplication:
             scope,
             self.ws_router,
             self.ws_middlewares,
-            self.info
+            self.info,
+            self.stream_limits
         )
         await instance.process(receive, send)
 
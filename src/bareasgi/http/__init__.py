@@ -1,14 +1,21 @@
 """bareASGI http support"""
 
+from .body import BytesBody, FileBody, buffer_body
 from .callbacks import (
     HttpRequestCallback,
     HttpMiddlewareCallback,
 )
+from .codecs import Codec, CodecRegistry
+from .deadline import DEFAULT_TIMEOUT_RESPONSE, call_with_deadline
 from .instance import HttpInstance
 from .middleware import make_middleware_chain
+from .multipart import MultipartError, MultipartPart, multipart_reader
+from .query import QueryParams, parse_url_encoded
+from .ranges import apply_range, parse_range
 from .request import HttpRequest
 from .response import HttpResponse, PushResponse
 from .router import HttpRouter
+from .signing import CookieSigner
 from .typing import (
     HTTPScope,
     ASGIHTTPReceiveCallable,
@@ -16,6 +23,13 @@ from .typing import (
 )
 
 __all__ = [
+    'BytesBody',
+    'buffer_body',
+    'Codec',
+    'CodecRegistry',
+    'CookieSigner',
+    'DEFAULT_TIMEOUT_RESPONSE',
+    'FileBody',
     'HttpInstance',
     'HttpRequest',
     'HttpResponse',
@@ -23,9 +37,16 @@ __all__ = [
     'HttpRequestCallback',
     'HttpMiddlewareCallback',
     'PushResponse',
+    'QueryParams',
+    'parse_url_encoded',
+    'call_with_deadline',
+    'apply_range',
+    'parse_range',
     'make_middleware_chain',
+    'MultipartError',
+    'MultipartPart',
+    'multipart_reader',
     'HTTPScope',
     'ASGIHTTPReceiveCallable',
     'ASGIHTTPSendCallable',
-
 ]
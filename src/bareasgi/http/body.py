@@ -0,0 +1,176 @@
+"""Response bodies"""
+
+import asyncio
+import os
+from typing import AsyncIterable, AsyncIterator, Callable
+
+
+class BytesBody:
+    """A response body held in memory.
+
+    Unlike an async generator the body can be iterated more than once, so a
+    response can be prepared in advance and sent many times.
+    """
+
+    __slots__ = ('content', 'chunk_size')
+
+    def __init__(self, content: bytes, chunk_size: int = -1) -> None:
+        """A response body held in memory.
+
+        Args:
+            content (bytes): The content.
+            chunk_size (int, optional): The size of each chunk to send or -1 to
+                send as a single chunk. Defaults to -1.
+        """
+        self.content = content
+        self.chunk_size = chunk_size
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._write()
+
+    async def _write(self) -> AsyncIterator[bytes]:
+        if self.chunk_size == -1:
+            yield self.content
+        else:
+            for start in range(0, len(self.content), self.chunk_size):
+                yield self.content[start:start + self.chunk_size]
+
+    def __str__(self) -> str:
+        return f'<BytesBody: length={len(self.content)}>'
+
+    __repr__ = __str__
+
+
+class FileBody:
+    """A response body which is read from a file.
+
+    When the server supports the ASGI `http.response.pathsend` or
+    `http.response.zerocopysend` extensions the file is sent by the server
+    without being read by the application. Otherwise the file is read in chunks
+    without blocking the event loop.
+
+    As the body is an async iterable of bytes, middleware which transforms the
+    body (e.g. compression) will cause the file to be read as chunks.
+    """
+
+    __slots__ = ('path', 'offset', 'count', 'chunk_size')
+
+    def __init__(
+            self,
+            path: str | os.PathLike,
+            *,
+            offset: int = 0,
+            count: int | None = None,
+            chunk_size: int = 65536
+    ) -> None:
+        """A response body which is read from a file.
+
+        Args:
+            path (str | os.PathLike): The path of the file.
+            offset (int, optional): The position in the file at which to
+                start. Defaults to 0.
+            count (int | None, optional): The number of bytes to send, or None
+                to send to the end of the file. Defaults to None.
+            chunk_size (int, optional): The size of the chunks in which the
+                file is read when it cannot be sent by the server. Defaults to
+                65536.
+        """
+        self.path = os.path.abspath(path)
+        self.offset = offset
+        self.count = count
+        self.chunk_size = chunk_size
+
+    @property
+    def is_whole_file(self) -> bool:
+        """True if the body is the whole of the file.
+
+        Returns:
+            bool: True if the body is the whole of the file.
+        """
+        return self.offset == 0 and self.count is None
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._read()
+
+    async def _read(self) -> AsyncIterator[bytes]:
+        file = await asyncio.to_thread(open, self.path, 'rb')
+        try:
+            if self.offset:
+                file.seek(self.offset)
+            remaining = self.count
+            while remaining is None or remaining > 0:
+                size = (
+                    self.chunk_size if remaining is None
+                    else min(self.chunk_size, remaining)
+                )
+                chunk = await asyncio.to_thread(file.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            file.close()
+
+    def __str__(self) -> str:
+        return (
+            f'<FileBody: path={self.path!r}'
+            f', offset={self.offset}'
+            f', count={self.count}>'
+        )
+
+    __repr__ = __str__
+
+
+async def _replay(
+        chunks: list[bytes],
+        rest: AsyncIterator[bytes]
+) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+    async for chunk in rest:
+        yield chunk
+
+
+async def buffer_body(
+        body: AsyncIterable[bytes],
+        max_size: int,
+        observe: Callable[[bytes], None] | None = None
+) -> tuple[bytes | None, AsyncIterable[bytes]]:
+    """Read a response body into memory, up to a maximum size.
+
+    When the body is larger than the maximum size reading stops, and the
+    returned body yields the chunks already read followed by the remainder of
+    the original body, so nothing is lost.
+
+    Args:
+        body (AsyncIterable[bytes]): The body.
+        max_size (int): The maximum number of bytes to hold in memory.
+        observe (Callable[[bytes], None] | None, optional): An optional
+            function called with each chunk as it is read, for example to
+            update a hash. Defaults to None.
+
+    Returns:
+        tuple[bytes | None, AsyncIterable[bytes]]: The content, or None if the
+            body was too large, and a body to use in place of the original.
+    """
+    if isinstance(body, BytesBody):
+        if len(body.content) > max_size:
+            return None, body
+        if observe is not None:
+            observe(body.content)
+        return body.content, body
+
+    iterator = body.__aiter__()
+    chunks: list[bytes] = []
+    size = 0
+    async for chunk in iterator:
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > max_size:
+            return None, _replay(chunks, iterator)
+        if observe is not None:
+            observe(chunk)
+
+    content = b''.join(chunks)
+    return content, BytesBody(content)
@@ -0,0 +1,209 @@
+"""Codecs for encoding and decoding content by media type"""
+
+from json import dumps, loads
+import logging
+from typing import Any, Callable, Final, Iterable
+
+from bareutils import header
+
+from ..lru import LRUCache
+
+LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
+
+Encoder = Callable[[Any], bytes]
+Decoder = Callable[[bytes], Any]
+
+
+class Codec:
+    """A pair of functions to encode and decode a media type"""
+
+    def __init__(
+            self,
+            media_type: bytes,
+            encode: Encoder,
+            decode: Decoder
+    ) -> None:
+        """A pair of functions to encode and decode a media type.
+
+        Args:
+            media_type (bytes): The media type, e.g. `b'application/json'`.
+            encode (Encoder): A function to convert data to bytes.
+            decode (Decoder): A function to convert bytes to data.
+        """
+        self.media_type = media_type
+        self.encode = encode
+        self.decode = decode
+
+    def __str__(self) -> str:
+        return f'<Codec: media_type={self.media_type!r}>'
+
+    __repr__ = __str__
+
+
+def _make_json_codec() -> Codec:
+    try:
+        import orjson  # type: ignore # pylint: disable=import-outside-toplevel
+        LOGGER.debug('Using orjson for application/json.')
+        return Codec(b'application/json', orjson.dumps, orjson.loads)
+    except ImportError:
+        return Codec(
+            b'application/json',
+            lambda data: dumps(data).encode(),
+            loads
+        )
+
+
+def _make_optional_codecs() -> list[Codec]:
+    codecs: list[Codec] = []
+    try:
+        import msgpack  # type: ignore # pylint: disable=import-outside-toplevel
+        codecs.append(
+            Codec(b'application/msgpack', msgpack.packb, msgpack.unpackb)
+        )
+    except ImportError:
+        pass
+    try:
+        import cbor2  # type: ignore # pylint: disable=import-outside-toplevel
+        codecs.append(Codec(b'application/cbor', cbor2.dumps, cbor2.loads))
+    except ImportError:
+        pass
+    return codecs
+
+
+def _quality(params: Any) -> float:
+    try:
+        return float(params.get(b'q', 1.0))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class CodecRegistry:
+    """A registry of codecs keyed by media type.
+
+    The registry is typically shared by the application, so handlers need not
+    pass an encoder or decoder at every call site. By default JSON is
+    registered (using `orjson` when it is installed), and MessagePack and CBOR
+    are registered when `msgpack` or `cbor2` can be imported.
+
+    ```python
+    import yaml
+
+    codecs = CodecRegistry()
+    codecs.register(
+        Codec(b'application/yaml', lambda data: yaml.dump(data).encode(), yaml.safe_load)
+    )
+    app = Application(codecs=codecs)
+    ```
+    """
+
+    def __init__(
+            self,
+            codecs: Iterable[Codec] | None = None,
+            *,
+            default_media_type: bytes = b'application/json',
+            cache_size: int = 256
+    ) -> None:
+        """A registry of codecs keyed by media type.
+
+        Args:
+            codecs (Iterable[Codec] | None, optional): The codecs to register.
+                If None the default codecs are registered. Defaults to None.
+            default_media_type (bytes, optional): The media type to use when
+                the client does not express a preference. Defaults to
+                `b'application/json'`.
+            cache_size (int, optional): The number of distinct accept headers
+                for which the negotiated codec is remembered. Defaults to 256.
+        """
+        self.default_media_type = default_media_type
+        self._codecs: dict[bytes, Codec] = {}
+        self._negotiated: LRUCache[bytes | None, Codec | None] = LRUCache(
+            cache_size
+        )
+        if codecs is None:
+            codecs = [_make_json_codec()] + _make_optional_codecs()
+        for codec in codecs:
+            self.register(codec)
+
+    def register(self, codec: Codec) -> None:
+        """Register a codec, replacing any codec for the same media type.
+
+        Args:
+            codec (Codec): The codec.
+        """
+        self._codecs[codec.media_type] = codec
+        self._negotiated.clear()
+
+    def find(self, media_type: bytes) -> Codec | None:
+        """Find the codec for a media type.
+
+        Args:
+            media_type (bytes): The media type, e.g. the media type of the
+                `content-type` header.
+
+        Returns:
+            Codec | None: The codec, or None if the media type is not
+                registered.
+        """
+        return self._codecs.get(media_type)
+
+    def negotiate(self, accept: bytes | None) -> Codec | None:
+        """Choose the codec for a response from the value of the `accept`
+        header.
+
+        The result is cached for each distinct header value.
+
+        Args:
+            accept (bytes | None): The value of the `accept` header, or None if
+                the header was not sent.
+
+        Returns:
+            Codec | None: The codec, or None if none of the registered codecs
+                is acceptable.
+        """
+        if accept in self._negotiated:
+            return self._negotiated.get(accept)
+        codec = self._select(accept)
+        self._negotiated.put(accept, codec)
+        return codec
+
+    def _select(self, accept: bytes | None) -> Codec | None:
+        default = self._codecs.get(self.default_media_type)
+        if accept is None:
+            return default
+
+        try:
+            media_ranges = header.accept(((b'accept', accept),)) or {}
+        except ValueError:
+            return default
+
+        best: Codec | None = None
+        best_quality = 0.0
+        for media_range, params in media_ranges.items():
+            quality = _quality(params)
+            if quality <= best_quality:
+                continue
+            if media_range in self._codecs:
+                best, best_quality = self._codecs[media_range], quality
+            elif media_range.endswith(b'/*'):
+                prefix = b'' if media_range == b'*/*' else media_range[:-1]
+                if (
+                        default is not None and
+                        default.media_type.startswith(prefix)
+                ):
+                    best, best_quality = default, quality
+                    continue
+                candidate = next(
+                    (
+                        codec
+                        for media_type, codec in self._codecs.items()
+                        if media_type.startswith(prefix)
+                    ),
+                    None
+                )
+                if candidate is not None:
+                    best, best_quality = candidate, quality
+
+        return best
+
+
+DEFAULT_CODEC_REGISTRY: Final[CodecRegistry] = CodecRegistry()
@@ -0,0 +1,59 @@
+"""Request deadlines"""
+
+import asyncio
+import logging
+from typing import Final
+
+from .callbacks import HttpRequestCallback
+from .request import HttpRequest
+from .response import HttpResponse
+
+LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_RESPONSE: Final[HttpResponse] = HttpResponse.from_text(
+    'Gateway Timeout',
+    status=504
+)
+
+
+async def call_with_deadline(
+        handler: HttpRequestCallback,
+        request: HttpRequest,
+        timeout: float,
+        timeout_response: HttpResponse = DEFAULT_TIMEOUT_RESPONSE
+) -> HttpResponse:
+    """Call a handler, cancelling it if it has not responded within a time
+    limit.
+
+    The deadline of the request is set to the earlier of its current deadline
+    and the time limit.
+
+    Args:
+        handler (HttpRequestCallback): The handler.
+        request (HttpRequest): The request.
+        timeout (float): The time limit in seconds.
+        timeout_response (HttpResponse, optional): The response to send if the
+            time limit is reached, which is copied before it is sent. Defaults
+            to DEFAULT_TIMEOUT_RESPONSE.
+
+    Returns:
+        HttpResponse: The response.
+    """
+    deadline = asyncio.get_running_loop().time() + timeout
+    if request.deadline is not None and request.deadline < deadline:
+        deadline = request.deadline
+    request.deadline = deadline
+
+    timer = asyncio.timeout_at(deadline)
+    try:
+        async with timer:
+            return await handler(request)
+    except TimeoutError:
+        if not timer.expired():
+            # A timeout raised by the handler rather than the deadline.
+            raise
+        LOGGER.warning(
+            'Request for "%s" exceeded its deadline.',
+            request.scope['path']
+        )
+        return timeout_response.copy()
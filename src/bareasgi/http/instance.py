@@ -1,9 +1,11 @@
 """The http instance"""
 
 import asyncio
-from asyncio import Queue, Task
+from asyncio import Task
+from collections import deque
 import logging
 from typing import (
+    TYPE_CHECKING,
     Any,
     AsyncIterable,
     Final,
@@ -18,30 +20,52 @@ from .typing import (
     ASGIHTTPReceiveEvent,
     ASGIHTTPSendCallable,
     HTTPRequestEvent,
+    HTTPResponsePathsendEvent,
     HTTPResponseStartEvent,
+    HTTPResponseZerocopysendEvent,
     HTTPServerPushEvent
 )
 
+from ..limits import MemoryBudget
 from ..utils import NullIter
 
+from .body import FileBody
 from .callbacks import HttpMiddlewareCallback
+from .codecs import CodecRegistry
+from .deadline import DEFAULT_TIMEOUT_RESPONSE, call_with_deadline
 from .errors import HttpInternalError, HttpDisconnectError
 from .request import HttpRequest
 from .response import HttpResponse, PushResponse
 from .router import HttpRouter
 from .middleware import make_middleware_chain
 
+if TYPE_CHECKING:
+    from ..streams import StreamLimits
+
 LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
 
+# The body of a refused request is not read, so the connection is closed.
+MEMORY_EXHAUSTED_RESPONSE: Final[HttpResponse] = HttpResponse.from_text(
+    'Service Unavailable',
+    status=503,
+    headers=[(b'retry-after', b'1'), (b'connection', b'close')]
+)
+
+# The longest time to pause reading a request body for the memory budget.
+MEMORY_PAUSE: Final[float] = 1.0
+
 
 class BodyIterator:
     """Iterate over the body content"""
 
+    __slots__ = ('_receive', '_queue', '_more_body', '_memory_budget')
+
     def __init__(
             self,
             receive: ASGIHTTPReceiveCallable,
             body: bytes,
-            more_body: bool
+            more_body: bool,
+            memory_budget: MemoryBudget | None = None
     ) -> None:
         """Initialise the body iterator
 
@@ -49,18 +73,27 @@ class BodyIterator:
             receive (Receive): The receive callable
             body (bytes): The initial body
             more_body (bool): Signifies if there is additional content to come.
+            memory_budget (MemoryBudget | None, optional): A budget from which
+                the content which has not been consumed is reserved. Defaults
+                to None.
         """
         self._receive = receive
-        self._queue: Queue = Queue()
-        self._queue.put_nowait(body)
+        # Content which has been received but not yet consumed. A deque is
+        # used rather than an asyncio queue as it is never waited on.
+        self._queue: deque[bytes] = deque((body,))
         self._more_body = more_body
+        self._memory_budget = memory_budget
+        if memory_budget is not None:
+            memory_budget.reserve(len(body))
 
     def __aiter__(self):
         return self
 
     async def __anext__(self):
-        if not self._queue.empty():
-            body = await self._queue.get()
+        if self._queue:
+            body = self._queue.popleft()
+            if self._memory_budget is not None:
+                self._memory_budget.release(len(body))
             return body
 
         if not self._more_body:
@@ -88,24 +121,64 @@ class BodyIterator:
     async def flush(self) -> None:
         """Flush all remaining http.request messages"""
         while self._more_body:
-            await self._queue.put(await self._read())
+            if self._memory_budget is None:
+                self._queue.append(await self._read())
+            else:
+                # Pause reading, so the client is slowed, while the budget is
+                # exhausted.
+                await self._memory_budget.wait(MEMORY_PAUSE)
+                body = await self._read()
+                self._memory_budget.reserve(len(body))
+                self._queue.append(body)
+
+    def discard(self) -> None:
+        """Discard the content which has not been consumed."""
+        if self._memory_budget is not None:
+            self._memory_budget.release(sum(len(body) for body in self._queue))
+        self._queue.clear()
 
 
 class HttpInstance:
     """An HTTP instance services an HTTP request."""
 
+    __slots__ = (
+        'scope',
+        'info',
+        'codecs',
+        'handler',
+        'matches',
+        'priority',
+        'request_timeout',
+        'timeout_response',
+        'idle_timeout',
+        'stream_limits',
+        'memory_budget'
+    )
+
     def __init__(
             self,
             scope: HTTPScope,
             router: HttpRouter,
             middleware: Iterable[HttpMiddlewareCallback],
-            info: dict[str, Any]
+            info: dict[str, Any],
+            codecs: CodecRegistry | None = None,
+            request_timeout: float | None = None,
+            timeout_response: HttpResponse = DEFAULT_TIMEOUT_RESPONSE,
+            idle_timeout: float | None = None,
+            stream_limits: 'StreamLimits | None' = None,
+            memory_budget: MemoryBudget | None = None
     ) -> None:
         self.scope = scope
         self.info = info
+        self.codecs = codecs
+        self.request_timeout = request_timeout
+        self.timeout_response = timeout_response
+        self.idle_timeout = idle_timeout
+        self.stream_limits = stream_limits
+        self.memory_budget = memory_budget
 
         # Find the route.
-        self.handler, self.matches = router.resolve(
+        self.handler, self.matches, self.priority = router.resolve_route(
             scope['method'],
             scope['path']
         )
@@ -128,41 +201,125 @@ class HttpInstance:
         try:
             request_event = await self._receive_request(receive)
 
-            response = await self._handle_request(receive, request_event)
-
-            await self._send_response(receive, send, response)
+            route = (
+                None if self.stream_limits is None
+                else self.stream_limits.route(self.scope)
+            )
+            if route is None:
+                await self._handle(receive, send, request_event)
+            else:
+                await self._process_stream(receive, send, request_event, route)
 
         except asyncio.CancelledError:
             pass
 
-    async def _receive_request(
+    async def _process_stream(
             self,
             receive: ASGIHTTPReceiveCallable,
-    ) -> HTTPRequestEvent:
-        event = await receive()
-        if event['type'] != 'http.request':
-            raise HttpInternalError('Expected http.request')
-        return cast(HTTPRequestEvent, event)
+            send: ASGIHTTPSendCallable,
+            request_event: HTTPRequestEvent,
+            route: str
+    ) -> None:
+        stream_limits = cast('StreamLimits', self.stream_limits)
+        client = self.scope.get('client')
+        address = None if client is None else client[0]
+
+        if not stream_limits.open(route, address):
+            if not await self._discard_body(receive, request_event):
+                return
+            await self._send_response(
+                receive,
+                send,
+                stream_limits.rejection_response.copy()
+            )
+            return
+
+        try:
+            await self._handle(receive, send, request_event)
+        finally:
+            stream_limits.close(route, address)
 
-    async def _handle_request(
+    async def _handle(
             self,
             receive: ASGIHTTPReceiveCallable,
+            send: ASGIHTTPSendCallable,
             request_event: HTTPRequestEvent
-    ) -> HttpResponse:
+    ) -> None:
+        more_body = request_event.get('more_body', False)
+        if (
+                more_body and
+                self.memory_budget is not None and
+                not self.memory_budget.admit()
+        ):
+            LOGGER.warning(
+                'Refusing the request for "%s" as the memory budget is '
+                'exhausted.',
+                self.scope['path']
+            )
+            # Reading the rest of the body could take as long as handling it,
+            # so the response is sent at once.
+            await self._send_response_events(
+                send,
+                MEMORY_EXHAUSTED_RESPONSE.copy()
+            )
+            return
+
         body = BodyIterator(
             receive,
             request_event.get('body', b''),
-            request_event.get('more_body', False)
+            more_body,
+            self.memory_budget
         )
+        try:
+            response = await self._handle_request(body)
+            await self._send_response(receive, send, response)
+        finally:
+            body.discard()
+
+    async def _discard_body(
+            self,
+            receive: ASGIHTTPReceiveCallable,
+            request_event: HTTPRequestEvent
+    ) -> bool:
+        # Read and drop the rest of a body which will not be handled, so the
+        # response can be sent. Returns False if the client disconnected.
+        more_body = request_event.get('more_body', False)
+        while more_body:
+            event = await receive()
+            if event['type'] == 'http.disconnect':
+                return False
+            more_body = cast(HTTPRequestEvent, event).get('more_body', False)
+        return True
+
+    async def _receive_request(
+            self,
+            receive: ASGIHTTPReceiveCallable,
+    ) -> HTTPRequestEvent:
+        event = await receive()
+        if event['type'] != 'http.request':
+            raise HttpInternalError('Expected http.request')
+        return cast(HTTPRequestEvent, event)
+
+    async def _handle_request(self, body: BodyIterator) -> HttpResponse:
         request = HttpRequest(
             self.scope,
             self.info,
             {},
             self.matches,
-            body
+            body,
+            codecs=self.codecs,
+            priority=self.priority
         )
 
-        response = await self.handler(request)
+        if self.request_timeout is None:
+            response = await self.handler(request)
+        else:
+            response = await call_with_deadline(
+                self.handler,
+                request,
+                self.request_timeout,
+                self.timeout_response
+            )
 
         # Typically the request handler has already processed the request
         # body, but we flush all the "http.request" messages so we can catch
@@ -185,40 +342,39 @@ class HttpInstance:
         )
         pending: set[asyncio.Future] = {send_task, receive_task}
 
-        is_connected = True
-
-        while is_connected:
-
-            done, pending = await asyncio.wait(
-                pending,
-                return_when=asyncio.FIRST_COMPLETED
-            )
+        try:
+            while True:
 
-            if receive_task in done:
-                event = receive_task.result()
-                LOGGER.debug('Received event type "%s".', event)
+                done, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
 
-                # Cancel pending tasks.
-                for task in pending:
-                    try:
-                        task.cancel()
-                        await task
-                    except:  # pylint: disable=bare-except
-                        pass
+                if receive_task in done:
+                    event = receive_task.result()
+                    LOGGER.debug('Received event type "%s".', event)
 
-                # Check for abnormal disconnection.
-                if event['type'] != 'http.disconnect':
-                    raise HttpInternalError(
-                        f'Unexpected request type "{event["type"]}"'
-                    )
+                    # Check for abnormal disconnection.
+                    if event['type'] != 'http.disconnect':
+                        raise HttpInternalError(
+                            f'Unexpected request type "{event["type"]}"'
+                        )
 
-                LOGGER.debug('Disconnecting.')
+                    LOGGER.debug('Disconnecting.')
+                    break
 
-                is_connected = False
-            elif send_task in done:
                 # Fetch result to trigger possible exceptions
                 send_task.result()
 
+        finally:
+            # Cancel pending tasks, including when sending failed.
+            for task in pending:
+                try:
+                    task.cancel()
+                    await task
+                except:  # pylint: disable=bare-except
+                    pass
+
         LOGGER.debug('Finish handling request.')
 
     async def _send_response_events(
@@ -235,6 +391,10 @@ class HttpInstance:
         if response.pushes is not None and self._is_http_push_supported:
             await self._send_response_push_event(send, response.pushes)
 
+        if isinstance(response.body, FileBody):
+            if await self._send_file_body_event(send, response.body):
+                return
+
         await self._send_response_body_event(send, response.body or NullIter())
 
     async def _send_response_start_event(
@@ -269,6 +429,47 @@ class HttpInstance:
             }
             await send(server_push_event)
 
+    async def _send_file_body_event(
+            self,
+            send: ASGIHTTPSendCallable,
+            body: FileBody
+    ) -> bool:
+        extensions = self.scope.get('extensions') or {}
+
+        if 'http.response.pathsend' in extensions and body.is_whole_file:
+            LOGGER.debug(
+                'Sending "http.response.pathsend" for "%s".',
+                body.path
+            )
+            pathsend_event: HTTPResponsePathsendEvent = {
+                'type': 'http.response.pathsend',
+                'path': body.path
+            }
+            await send(pathsend_event)
+            return True
+
+        if 'http.response.zerocopysend' in extensions:
+            LOGGER.debug(
+                'Sending "http.response.zerocopysend" for "%s".',
+                body.path
+            )
+            file = await asyncio.to_thread(open, body.path, 'rb')
+            try:
+                zerocopysend_event: HTTPResponseZerocopysendEvent = {
+                    'type': 'http.response.zerocopysend',
+                    'file': file,
+                    'offset': body.offset,
+                    'more_body': False
+                }
+                if body.count is not None:
+                    zerocopysend_event['count'] = body.count
+                await send(zerocopysend_event)
+            finally:
+                file.close()
+            return True
+
+        return False
+
     async def _send_response_body_event(
             self,
             send: ASGIHTTPSendCallable,
@@ -282,10 +483,20 @@ class HttpInstance:
             prev = buf
             try:
                 # Try to get more body
-                buf = await body_iter.__anext__()
+                if self.idle_timeout is None:
+                    buf = await body_iter.__anext__()
+                else:
+                    async with asyncio.timeout(self.idle_timeout):
+                        buf = await body_iter.__anext__()
             except StopAsyncIteration:
                 # The previous buf was the last
                 more_body = False
+            except TimeoutError:
+                LOGGER.warning(
+                    'Abandoning the response for "%s" as the body was idle.',
+                    self.scope['path']
+                )
+                raise
 
             if is_first_time and more_body:
                 is_first_time = False
@@ -0,0 +1,303 @@
+"""Streaming support for multipart/form-data"""
+
+from __future__ import annotations
+
+from tempfile import SpooledTemporaryFile
+from typing import (
+    IO,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Mapping
+)
+
+
+class MultipartError(Exception):
+    """Exception raised when the multipart content is malformed"""
+
+
+def _parse_options(value: bytes) -> tuple[bytes, Mapping[bytes, bytes]]:
+    """Parse a header value of the form `value; name="option"; ...`"""
+    parts: list[bytes] = []
+    start, in_quotes, i = 0, False, 0
+    while i < len(value):
+        char = value[i:i+1]
+        if char == b'\\' and in_quotes:
+            i += 1
+        elif char == b'"':
+            in_quotes = not in_quotes
+        elif char == b';' and not in_quotes:
+            parts.append(value[start:i])
+            start = i + 1
+        i += 1
+    parts.append(value[start:])
+
+    options: dict[bytes, bytes] = {}
+    for part in parts[1:]:
+        name, _sep, option = part.strip().partition(b'=')
+        option = option.strip()
+        if len(option) >= 2 and option.startswith(b'"') and option.endswith(b'"'):
+            option = option[1:-1].replace(b'\\"', b'"').replace(b'\\\\', b'\\')
+        options[name.strip().lower()] = option
+    return parts[0].strip().lower(), options
+
+
+class MultipartPart:
+    """A part of a multipart message.
+
+    The content of the part is streamed from the request body, so it must be
+    consumed before the next part is requested. Any content which has not been
+    consumed is discarded when the next part is read.
+    """
+
+    def __init__(
+            self,
+            headers: list[tuple[bytes, bytes]],
+            content: AsyncIterable[bytes]
+    ) -> None:
+        """A part of a multipart message.
+
+        Args:
+            headers (list[tuple[bytes, bytes]]): The headers of the part, with
+                the names in lower case.
+            content (AsyncIterable[bytes]): The content of the part.
+        """
+        self.headers = headers
+        self.content = content
+
+        disposition = next(
+            (value for name, value in headers if name == b'content-disposition'),
+            None
+        )
+        options = _parse_options(disposition)[1] if disposition else {}
+        name = options.get(b'name')
+        filename = options.get(b'filename')
+        self.name = name.decode() if name is not None else None
+        self.filename = filename.decode() if filename is not None else None
+        self.content_type = next(
+            (value for name, value in headers if name == b'content-type'),
+            None
+        )
+
+    async def read(self) -> bytes:
+        """Read the whole content of the part into memory.
+
+        Returns:
+            bytes: The content.
+        """
+        buf = bytearray()
+        async for chunk in self.content:
+            buf += chunk
+        return bytes(buf)
+
+    async def text(self, encoding: str = 'utf-8') -> str:
+        """Read the whole content of the part as text.
+
+        Args:
+            encoding (str, optional): The encoding. Defaults to 'utf-8'.
+
+        Returns:
+            str: The content as text.
+        """
+        return (await self.read()).decode(encoding)
+
+    async def stream_to(
+            self,
+            callback: Callable[[bytes], Awaitable[None]]
+    ) -> int:
+        """Pass each chunk of the content to a callback.
+
+        Args:
+            callback (Callable[[bytes], Awaitable[None]]): The callback.
+
+        Returns:
+            int: The number of bytes in the content.
+        """
+        size = 0
+        async for chunk in self.content:
+            size += len(chunk)
+            await callback(chunk)
+        return size
+
+    async def spool(self, max_size: int = 1024 * 1024) -> IO[bytes]:
+        """Write the content to a temporary file which is held in memory until
+        it exceeds `max_size` bytes, at which point it is moved to disk.
+
+        The file is positioned at the start of the content. The caller is
+        responsible for closing it.
+
+        Args:
+            max_size (int, optional): The size at which the content is written
+                to disk. Defaults to 1MB.
+
+        Returns:
+            IO[bytes]: The file.
+        """
+        file = SpooledTemporaryFile(max_size=max_size)  # pylint: disable=consider-using-with
+        try:
+            async for chunk in self.content:
+                file.write(chunk)
+            file.seek(0)
+            return file  # type: ignore
+        except BaseException:
+            file.close()
+            raise
+
+    def __str__(self) -> str:
+        return (
+            '<MultipartPart: '
+            f'name={self.name!r}'
+            f', filename={self.filename!r}'
+            f', content_type={self.content_type!r}'
+            '>'
+        )
+
+    __repr__ = __str__
+
+
+class _MultipartReader:
+
+    def __init__(
+            self,
+            body: AsyncIterable[bytes],
+            boundary: bytes,
+            max_header_size: int
+    ) -> None:
+        self._body = body.__aiter__()
+        self._delimiter = b'\r\n--' + boundary
+        self._max_header_size = max_header_size
+        # The leading CRLF allows the first boundary to be found with the same
+        # delimiter as the rest.
+        self._buf = bytearray(b'\r\n')
+        self._is_eof = False
+
+    async def _fill(self) -> bool:
+        if self._is_eof:
+            return False
+        try:
+            self._buf += await self._body.__anext__()
+            return True
+        except StopAsyncIteration:
+            self._is_eof = True
+            return False
+
+    async def _find(self, pattern: bytes, limit: int | None = None) -> int:
+        # Only search the bytes which have arrived since the last search.
+        start = 0
+        while True:
+            index = self._buf.find(pattern, start)
+            if index != -1:
+                return index
+            if limit is not None and len(self._buf) > limit:
+                raise MultipartError('Header too large')
+            start = max(0, len(self._buf) - len(pattern) + 1)
+            if not await self._fill():
+                raise MultipartError('Unexpected end of content')
+
+    async def _ensure(self, size: int) -> None:
+        while len(self._buf) < size:
+            if not await self._fill():
+                raise MultipartError('Unexpected end of content')
+
+    async def _skip_preamble(self) -> None:
+        delimiter_length = len(self._delimiter)
+        while True:
+            index = self._buf.find(self._delimiter)
+            if index != -1:
+                del self._buf[:index + delimiter_length]
+                return
+            # Keep enough of the tail to match a delimiter split across chunks.
+            del self._buf[:max(0, len(self._buf) - delimiter_length + 1)]
+            if not await self._fill():
+                raise MultipartError('No boundary found')
+
+    async def _read_headers(self) -> list[tuple[bytes, bytes]] | None:
+        await self._ensure(2)
+        if self._buf[:2] == b'--':
+            # The close delimiter.
+            return None
+
+        # Skip any transport padding after the boundary.
+        index = await self._find(b'\r\n', self._max_header_size)
+        del self._buf[:index + 2]
+
+        await self._ensure(2)
+        if self._buf[:2] == b'\r\n':
+            del self._buf[:2]
+            return []
+
+        index = await self._find(b'\r\n\r\n', self._max_header_size)
+        lines = bytes(self._buf[:index]).split(b'\r\n')
+        del self._buf[:index + 4]
+
+        headers: list[tuple[bytes, bytes]] = []
+        for line in lines:
+            name, sep, value = line.partition(b':')
+            if not sep:
+                raise MultipartError('Invalid header')
+            headers.append((name.strip().lower(), value.strip()))
+        return headers
+
+    async def _read_content(self) -> AsyncIterator[bytes]:
+        delimiter_length = len(self._delimiter)
+        while True:
+            index = self._buf.find(self._delimiter)
+            if index != -1:
+                if index:
+                    yield bytes(self._buf[:index])
+                del self._buf[:index + delimiter_length]
+                return
+            # Everything before a possible partial delimiter is content.
+            safe = len(self._buf) - delimiter_length + 1
+            if safe > 0:
+                yield bytes(self._buf[:safe])
+                del self._buf[:safe]
+            if not await self._fill():
+                raise MultipartError('Unexpected end of content')
+
+    async def parts(self) -> AsyncIterator[MultipartPart]:
+        await self._skip_preamble()
+        while True:
+            headers = await self._read_headers()
+            if headers is None:
+                return
+            content = self._read_content()
+            yield MultipartPart(headers, content)
+            # Discard anything the consumer did not read.
+            async for _ in content:
+                pass
+
+
+def multipart_reader(
+        body: AsyncIterable[bytes],
+        boundary: bytes,
+        *,
+        max_header_size: int = 16384
+) -> AsyncIterator[MultipartPart]:
+    """Read the parts of a multipart message as they arrive.
+
+    The body is never held in memory: the content of each part is streamed
+    from the body as it is consumed.
+
+    ```python
+    async for part in multipart_reader(request.body, boundary):
+        if part.filename is None:
+            fields[part.name] = await part.text()
+        else:
+            files[part.name] = await part.spool()
+    ```
+
+    Args:
+        body (AsyncIterable[bytes]): The body of the message.
+        boundary (bytes): The boundary from the `content-type` header.
+        max_header_size (int, optional): The maximum size of the headers of a
+            part. Defaults to 16384.
+
+    Raises:
+        MultipartError: If the content is malformed.
+
+    Returns:
+        AsyncIterator[MultipartPart]: The parts.
+    """
+    return _MultipartReader(body, boundary, max_header_size).parts()
@@ -0,0 +1,78 @@
+"""Parsing for query strings and url-encoded forms"""
+
+from types import MappingProxyType
+from typing import Final, Mapping
+from urllib.parse import parse_qsl
+
+from ..lru import LRUCache
+
+QueryParams = Mapping[str, tuple[str, ...]]
+
+EMPTY_QUERY_PARAMS: Final[QueryParams] = MappingProxyType({})
+
+QUERY_STRING_CACHE: Final[LRUCache[bytes, QueryParams]] = LRUCache(1024)
+"""A process wide cache of parsed query strings keyed on the raw bytes. Set
+`QUERY_STRING_CACHE.maxsize` to zero to disable it."""
+
+MAX_CACHED_QUERY_STRING_LENGTH: Final[int] = 1024
+
+
+def _parse(raw: bytes, encoding: str) -> QueryParams:
+    params: dict[str, list[str]] = {}
+    for name, value in parse_qsl(
+            raw.decode('latin-1'),
+            keep_blank_values=True,
+            encoding=encoding
+    ):
+        params.setdefault(name, []).append(value)
+    return MappingProxyType({
+        name: tuple(values)
+        for name, values in params.items()
+    })
+
+
+def parse_url_encoded(
+        raw: bytes,
+        *,
+        encoding: str = 'utf-8',
+        use_cache: bool = True
+) -> QueryParams:
+    """Parse a query string or url-encoded form.
+
+    As the result may be shared between requests it is immutable. Each name
+    maps to a tuple of the values in the order they were given.
+
+    ```python
+    >>> parse_url_encoded(b'a=1&b=2&a=3')
+    mappingproxy({'a': ('1', '3'), 'b': ('2',)})
+    ```
+
+    Args:
+        raw (bytes): The percent encoded content.
+        encoding (str, optional): The encoding of the percent encoded
+            characters. Defaults to 'utf-8'.
+        use_cache (bool, optional): If True, short utf-8 content is looked up
+            in, and added to, the process wide cache. Defaults to True.
+
+    Raises:
+        LookupError: If the encoding is unknown.
+
+    Returns:
+        QueryParams: A mapping of names to values.
+    """
+    if not raw:
+        return EMPTY_QUERY_PARAMS
+
+    if (
+            not use_cache or
+            encoding != 'utf-8' or
+            len(raw) > MAX_CACHED_QUERY_STRING_LENGTH or
+            QUERY_STRING_CACHE.maxsize <= 0
+    ):
+        return _parse(raw, encoding)
+
+    params = QUERY_STRING_CACHE.get(raw)
+    if params is None:
+        params = _parse(raw, encoding)
+        QUERY_STRING_CACHE.put(raw, params)
+    return params
@@ -0,0 +1,216 @@
+"""Support for range requests"""
+
+import os
+import secrets
+from typing import AsyncIterator
+
+from .body import BytesBody, FileBody
+from .request import HttpRequest
+from .response import HttpResponse
+
+ByteRange = tuple[int, int]
+
+
+def parse_range(value: bytes, length: int) -> list[ByteRange] | None:
+    """Parse the value of a `range` header.
+
+    ```python
+    >>> parse_range(b'bytes=0-99, -100', 1000)
+    [(0, 100), (900, 1000)]
+    ```
+
+    Args:
+        value (bytes): The header value.
+        length (int): The length of the content.
+
+    Returns:
+        list[ByteRange] | None: The satisfiable ranges as start and end
+            (exclusive) positions, which will be empty if none were
+            satisfiable, or None if the header was invalid and must be
+            ignored.
+    """
+    unit, sep, specs = value.partition(b'=')
+    if not sep or unit.strip().lower() != b'bytes':
+        return None
+
+    ranges: list[ByteRange] = []
+    for spec in specs.split(b','):
+        spec = spec.strip()
+        if not spec:
+            continue
+        first, sep, last = spec.partition(b'-')
+        first, last = first.strip(), last.strip()
+        if not sep or (first and not first.isdigit()) or (
+                last and not last.isdigit()
+        ):
+            return None
+        if first:
+            start = int(first)
+            end = int(last) + 1 if last else length
+            if last and end <= start:
+                return None
+        elif last:
+            start, end = max(0, length - int(last)), length
+            if start == end:
+                continue
+        else:
+            return None
+        if start < length:
+            ranges.append((start, min(end, length)))
+
+    return ranges
+
+
+def _content_length(body: BytesBody | FileBody) -> int | None:
+    if isinstance(body, BytesBody):
+        return len(body.content)
+    if body.count is not None:
+        return body.count
+    try:
+        return os.stat(body.path).st_size - body.offset
+    except OSError:
+        return None
+
+
+def _slice(body: BytesBody | FileBody, start: int, end: int) -> BytesBody | FileBody:
+    if isinstance(body, BytesBody):
+        return BytesBody(body.content[start:end], body.chunk_size)
+    return FileBody(
+        body.path,
+        offset=body.offset + start,
+        count=end - start,
+        chunk_size=body.chunk_size
+    )
+
+
+def _is_if_range_match(
+        if_range: bytes,
+        headers: list[tuple[bytes, bytes]]
+) -> bool:
+    if_range = if_range.strip()
+    if if_range.startswith(b'W/'):
+        # Weak validators are never used for ranges.
+        return False
+    name = b'etag' if if_range.startswith(b'"') else b'last-modified'
+    return any(k == name and v == if_range for k, v in headers)
+
+
+async def _multipart_writer(
+        parts: list[tuple[bytes, BytesBody | FileBody]],
+        boundary: bytes
+) -> AsyncIterator[bytes]:
+    for part_headers, body in parts:
+        yield part_headers
+        async for chunk in body:
+            yield chunk
+    yield b'\r\n--' + boundary + b'--\r\n'
+
+
+def apply_range(
+        request: HttpRequest,
+        response: HttpResponse,
+        *,
+        max_ranges: int = 16
+) -> HttpResponse:
+    """Apply the `range` and `if-range` headers of a request to a response.
+
+    Only successful responses to `GET` requests with a `BytesBody` or
+    `FileBody` body are considered. A single range produces a 206 response
+    containing the range, and multiple ranges produce a 206
+    `multipart/byteranges` response. A file body is positioned at the start of
+    each range rather than being read from the start. If none of the ranges
+    can be satisfied a 416 response is returned.
+
+    Args:
+        request (HttpRequest): The request.
+        response (HttpResponse): The full response.
+        max_ranges (int, optional): The maximum number of ranges. Requests
+            with more ranges receive the full response. Defaults to 16.
+
+    Returns:
+        HttpResponse: The response for the requested range, or the original
+            response.
+    """
+    body = response.body
+    if (
+            response.status != 200 or
+            not isinstance(body, (BytesBody, FileBody)) or
+            request.scope['method'] != 'GET'
+    ):
+        return response
+
+    headers = [
+        (name, value)
+        for name, value in response.headers or []
+        if name != b'accept-ranges'
+    ]
+    headers.append((b'accept-ranges', b'bytes'))
+
+    value = request.header(b'range')
+    if value is None:
+        response.headers = headers
+        return response
+
+    if_range = request.header(b'if-range')
+    if if_range is not None and not _is_if_range_match(if_range, headers):
+        response.headers = headers
+        return response
+
+    length = _content_length(body)
+    if length is None:
+        # The file can not be read, which will be reported when it is sent.
+        return response
+
+    ranges = parse_range(value, length)
+    if ranges is None or len(ranges) > max_ranges:
+        response.headers = headers
+        return response
+
+    if not ranges:
+        return HttpResponse(
+            416,
+            [(b'content-range', f'bytes */{length}'.encode('ascii'))]
+        )
+
+    headers = [
+        (name, value)
+        for name, value in headers
+        if name not in (b'content-length', b'content-range')
+    ]
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers.append((
+            b'content-range',
+            f'bytes {start}-{end - 1}/{length}'.encode('ascii')
+        ))
+        headers.append((b'content-length', str(end - start).encode('ascii')))
+        return HttpResponse(206, headers, _slice(body, start, end))
+
+    content_type = next(
+        (value for name, value in headers if name == b'content-type'),
+        None
+    )
+    boundary = secrets.token_hex(16).encode('ascii')
+    parts: list[tuple[bytes, BytesBody | FileBody]] = []
+    content_length = len(b'\r\n--' + boundary + b'--\r\n')
+    for start, end in ranges:
+        part_headers = b'\r\n--' + boundary + b'\r\n'
+        if content_type is not None:
+            part_headers += b'content-type: ' + content_type + b'\r\n'
+        part_headers += (
+            f'content-range: bytes {start}-{end - 1}/{length}\r\n\r\n'
+        ).encode('ascii')
+        parts.append((part_headers, _slice(body, start, end)))
+        content_length += len(part_headers) + end - start
+
+    headers = [
+        (name, value)
+        for name, value in headers
+        if name != b'content-type'
+    ]
+    headers.append(
+        (b'content-type', b'multipart/byteranges; boundary=' + boundary)
+    )
+    headers.append((b'content-length', str(content_length).encode('ascii')))
+    return HttpResponse(206, headers, _multipart_writer(parts, boundary))
@@ -1,23 +1,46 @@
 """The http request"""
 
+import asyncio
 from json import loads
-from typing import Any, AsyncIterable, Callable, Mapping
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Mapping
 
 from bareutils import header, bytes_reader, text_reader
 
+from .codecs import DEFAULT_CODEC_REGISTRY, CodecRegistry
+from .multipart import MultipartError, MultipartPart, multipart_reader
+from .query import QueryParams, parse_url_encoded
 from .typing import HTTPScope
 
 
 class HttpRequest:
     """An HTTP request"""
 
+    __slots__ = (
+        'scope',
+        'info',
+        'context',
+        'matches',
+        'body',
+        'codecs',
+        'deadline',
+        'priority',
+        '_headers',
+        '_cookies',
+        '_query',
+        '_form',
+    )
+
     def __init__(
             self,
             scope: HTTPScope,
             info: dict[str, Any],
             context: dict[str, Any],
             matches: Mapping[str, Any],
-            body: AsyncIterable[bytes]
+            body: AsyncIterable[bytes],
+            *,
+            codecs: CodecRegistry | None = None,
+            deadline: float | None = None,
+            priority: str | None = None
     ) -> None:
         """An HTTP request.
 
@@ -28,12 +51,119 @@ class HttpRequest:
                 requests.
             matches (Mapping[str, Any]): Matches made by the router.
             body (AsyncIterable[bytes]): The body.
+            codecs (CodecRegistry | None, optional): The codecs used to
+                decode and encode content. Defaults to None, in which case the
+                default registry is used.
+            deadline (float | None, optional): The event loop time by which
+                the response must be produced, if any. Defaults to None.
+            priority (str | None, optional): The priority class of the route,
+                if any. Defaults to None.
         """
         self.scope = scope
         self.info = info
         self.context = context
         self.matches = matches
         self.body = body
+        self.codecs = codecs or DEFAULT_CODEC_REGISTRY
+        self.deadline = deadline
+        self.priority = priority
+        self._headers: dict[bytes, list[bytes]] | None = None
+        self._cookies: Mapping[bytes, list[bytes]] | None = None
+        self._query: QueryParams | None = None
+        self._form: QueryParams | None = None
+
+    @property
+    def time_remaining(self) -> float | None:
+        """The number of seconds until the deadline of the request.
+
+        A handler can pass this to its own downstream calls, so they give up
+        when the request would be abandoned anyway.
+
+        ```python
+        async with asyncio.timeout(request.time_remaining):
+            rows = await db.fetch(query)
+        ```
+
+        Returns:
+            float | None: The seconds remaining, which may be negative, or None
+                if the request has no deadline.
+        """
+        if self.deadline is None:
+            return None
+        return self.deadline - asyncio.get_running_loop().time()
+
+    @property
+    def headers(self) -> Mapping[bytes, list[bytes]]:
+        """The request headers indexed by lower case name.
+
+        The index is built on first access, so subsequent lookups do not scan
+        the headers.
+
+        Returns:
+            Mapping[bytes, list[bytes]]: A mapping of each header name to the
+                list of its values in the order they were received.
+        """
+        if self._headers is None:
+            headers: dict[bytes, list[bytes]] = {}
+            for name, value in self.scope['headers']:
+                headers.setdefault(name.lower(), []).append(value)
+            self._headers = headers
+        return self._headers
+
+    def header(
+            self,
+            name: bytes,
+            default: bytes | None = None
+    ) -> bytes | None:
+        """Find the first value of a header.
+
+        Args:
+            name (bytes): The header name.
+            default (bytes | None, optional): The value to return if the header
+                is not present. Defaults to None.
+
+        Returns:
+            bytes | None: The value of the header if found, otherwise the
+                default.
+        """
+        values = self.headers.get(name.lower())
+        return values[0] if values else default
+
+    def header_items(self, name: bytes) -> list[tuple[bytes, bytes]]:
+        """Find the headers with the given name.
+
+        The result can be passed to the `bareutils.header` parsers without
+        scanning all the request headers.
+
+        ```python
+        accept_encoding = header.accept_encoding(
+            request.header_items(b'accept-encoding')
+        )
+        ```
+
+        Args:
+            name (bytes): The header name.
+
+        Returns:
+            list[tuple[bytes, bytes]]: The matching name-value pairs.
+        """
+        name = name.lower()
+        return [(name, value) for value in self.headers.get(name, ())]
+
+    @property
+    def cookies(self) -> Mapping[bytes, list[bytes]]:
+        """The request cookies.
+
+        The cookie headers are parsed on first access, and the result is kept
+        for the lifetime of the request.
+
+        Returns:
+            Mapping[bytes, list[bytes]]: A mapping of each cookie name to its
+                values.
+        """
+        if self._cookies is None:
+            self._cookies = header.cookie(self.header_items(b'cookie'))
+        return self._cookies
 
     @property
     def url(self) -> str:
@@ -43,11 +173,65 @@ class HttpRequest:
             str: The url.
         """
         scheme = self.scope['scheme']
-        host = header.find(b'host', self.scope['headers'], b'unknown')
+        host = self.header(b'host', b'unknown')
         assert host is not None
         path = self.scope['path']
         return f"{scheme}://{host.decode()}{path}"
 
+    @property
+    def query(self) -> QueryParams:
+        """The query string parameters.
+
+        The query string is parsed on first access, and the result is kept
+        for the lifetime of the request. Identical query strings share a
+        process wide cache.
+
+        ```python
+        async def search(request: HttpRequest) -> HttpResponse:
+            terms = request.query.get('q', ())
+            ...
+        ```
+
+        Returns:
+            QueryParams: A mapping of each name to a tuple of its values.
+        """
+        if self._query is None:
+            self._query = parse_url_encoded(
+                self.scope.get('query_string', b'')
+            )
+        return self._query
+
+    async def form(self) -> QueryParams:
+        """Return the fields of a url-encoded form body.
+
+        The body is consumed and parsed on the first call, and the result is
+        returned on subsequent calls.
+
+        Raises:
+            ValueError: If the content type is not
+                `application/x-www-form-urlencoded`, or has an unknown
+                charset.
+
+        Returns:
+            QueryParams: A mapping of each field name to a tuple of its values.
+        """
+        if self._form is None:
+            content_type = header.content_type(self.header_items(b'content-type'))
+            if content_type is None or content_type[0].strip() != (
+                    b'application/x-www-form-urlencoded'
+            ):
+                raise ValueError('The content type is not a url-encoded form')
+            charset = (content_type[1] or {}).get(b'charset', b'utf-8')
+            try:
+                self._form = parse_url_encoded(
+                    await self.content(),
+                    encoding=charset.decode(),
+                    use_cache=False
+                )
+            except LookupError as error:
+                raise ValueError('The form has an unknown charset') from error
+        return self._form
+
     async def text(self, encoding: str = 'utf-8') -> str:
         """Return the request body as text.
 
@@ -73,18 +257,90 @@ class HttpRequest:
         """
         return await bytes_reader(self.body)
 
-    async def json(self, decode: Callable[[bytes], Any] = loads) -> Any:
+    async def json(self, decode: Callable[[bytes], Any] | None = None) -> Any:
         """Return the contents of the request body as JSON.
 
         This function consumes the body. Calling it a second time will generate
         an error.
 
         Args:
-            decode (Callable[[Union[str, bytes]], Any], optional): A function to
-                decode the body to json. Defaults to `json.loads`.
+            decode (Callable[[bytes], Any] | None, optional): A function to
+                decode the body to json. Defaults to None, in which case the
+                `application/json` codec is used.
 
         Returns:
             Any: The body as JSON.
         """
+        if decode is None:
+            codec = self.codecs.find(b'application/json')
+            decode = codec.decode if codec is not None else loads
         data = await self.content()
         return decode(data)
+
+    async def decode(self) -> Any:
+        """Decode the request body with the codec for its content type.
+
+        This function consumes the body. Calling it a second time will generate
+        an error.
+
+        Raises:
+            ValueError: If there is no codec for the content type.
+
+        Returns:
+            Any: The decoded body.
+        """
+        content_type = header.content_type(self.header_items(b'content-type'))
+        media_type = (
+            content_type[0].strip()
+            if content_type is not None
+            else self.codecs.default_media_type
+        )
+        codec = self.codecs.find(media_type)
+        if codec is None:
+            raise ValueError(f'No codec for media type "{media_type!r}"')
+        data = await self.content()
+        return codec.decode(data)
+
+    def multipart(
+            self,
+            *,
+            max_header_size: int = 16384
+    ) -> AsyncIterator[MultipartPart]:
+        """Read the parts of a `multipart/form-data` body as they arrive.
+
+        This function consumes the body. The content of each part must be
+        read before the next part is requested.
+
+        ```python
+        async for part in request.multipart():
+            if part.filename is not None:
+                with await part.spool() as file:
+                    save_upload(part.filename, file)
+        ```
+
+        Args:
+            max_header_size (int, optional): The maximum size of the headers of
+                a part. Defaults to 16384.
+
+        Raises:
+            MultipartError: If the content type is not multipart, or has no
+                boundary.
+
+        Returns:
+            AsyncIterator[MultipartPart]: The parts.
+        """
+        content_type = header.content_type(self.header_items(b'content-type'))
+        if content_type is None or not content_type[0].strip().startswith(
+                b'multipart/'
+        ):
+            raise MultipartError('The content type is not multipart')
+        boundary = (content_type[1] or {}).get(b'boundary')
+        if not boundary:
+            raise MultipartError('The content type has no boundary')
+        if boundary.startswith(b'"') and boundary.endswith(b'"'):
+            boundary = boundary[1:-1]
+        return multipart_reader(
+            self.body,
+            boundary,
+            max_header_size=max_header_size
+        )
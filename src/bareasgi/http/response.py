@@ -3,16 +3,67 @@
 from __future__ import annotations
 
 from json import dumps
-from typing import Any, AsyncIterable, Callable, Iterable
+import mimetypes
+import os
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable
 
-from bareutils import bytes_writer, text_writer
+from .body import BytesBody, FileBody
+from .request import HttpRequest
 
 PushResponse = tuple[str, list[tuple[bytes, bytes]]]
 
 
+async def _encode_batches(
+        items: AsyncIterable[Any],
+        encode_bytes: Callable[[Any], bytes],
+        batch_size: int
+) -> AsyncIterator[list[bytes]]:
+    batch: list[bytes] = []
+    async for item in items:
+        batch.append(encode_bytes(item))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _json_array_writer(
+        items: AsyncIterable[Any],
+        encode_bytes: Callable[[Any], bytes],
+        batch_size: int
+) -> AsyncIterator[bytes]:
+    separator = b'['
+    async for batch in _encode_batches(items, encode_bytes, batch_size):
+        yield separator + b','.join(batch)
+        separator = b','
+    # An empty sequence never sent the opening bracket.
+    yield b']' if separator == b',' else b'[]'
+
+
+async def _ndjson_writer(
+        items: AsyncIterable[Any],
+        encode_bytes: Callable[[Any], bytes],
+        batch_size: int
+) -> AsyncIterator[bytes]:
+    async for batch in _encode_batches(items, encode_bytes, batch_size):
+        yield b'\n'.join(batch) + b'\n'
+
+
+def _make_encode_bytes(
+        encode: Callable[[Any], str],
+        encode_bytes: Callable[[Any], bytes] | None
+) -> Callable[[Any], bytes]:
+    if encode_bytes is not None:
+        return encode_bytes
+    return lambda data: encode(data).encode()
+
+
 class HttpResponse:
     """The HTTP response"""
 
+    __slots__ = ('status', 'headers', 'body', 'pushes')
+
     def __init__(
             self,
             status: int,
@@ -37,6 +88,24 @@ class HttpResponse:
         self.body = body
         self.pushes = pushes
 
+    def copy(self) -> HttpResponse:
+        """Make a shallow copy of the response.
+
+        This allows a response to be built once and sent many times, as
+        middleware may modify the status and headers of the response it
+        receives. The body is shared, so it must be re-iterable, like
+        `BytesBody`.
+
+        Returns:
+            HttpResponse: The copy.
+        """
+        return HttpResponse(
+            self.status,
+            None if self.headers is None else list(self.headers),
+            self.body,
+            self.pushes
+        )
+
     @classmethod
     def from_bytes(
             cls,
@@ -65,7 +134,7 @@ class HttpResponse:
         return HttpResponse(
             status,
             [(b'content-type', content_type)] + (headers or []),
-            bytes_writer(content, chunk_size)
+            BytesBody(content, chunk_size)
         )
 
     @classmethod
@@ -99,7 +168,7 @@ class HttpResponse:
         return HttpResponse(
             status,
             [(b'content-type', content_type)] + (headers or []),
-            text_writer(text, encoding, chunk_size)
+            BytesBody(text.encode(encoding), chunk_size)
         )
 
     @classmethod
@@ -143,3 +212,193 @@ class HttpResponse:
             content_type=content_type,
             headers=headers
         )
+
+    @classmethod
+    def from_file(
+            cls,
+            path: str | os.PathLike,
+            *,
+            status: int = 200,
+            content_type: bytes | None = None,
+            headers: list[tuple[bytes, bytes]] | None = None,
+            chunk_size: int = 65536
+    ) -> HttpResponse:
+        """Create an HTTP response from the contents of a file.
+
+        If the server supports the `http.response.pathsend` or
+        `http.response.zerocopysend` ASGI extensions the file is sent by the
+        server, otherwise it is read in chunks.
+
+        Args:
+            path (str | os.PathLike): The path of the file.
+            status (int, optional): An optional status code. Defaults to `200`.
+            content_type (bytes | None, optional): The content type. Defaults
+                to None, in which case it is guessed from the file name.
+            headers (list[tuple[bytes, bytes]] | None): Optional headers.
+                Defaults to `None`.
+            chunk_size (int, optional): The size of the chunks in which the
+                file is read when it cannot be sent by the server. Defaults to
+                65536.
+
+        Raises:
+            OSError: If the file cannot be accessed.
+
+        Returns:
+            HttpResponse: The HTTP response.
+        """
+        if content_type is None:
+            media_type, _encoding = mimetypes.guess_type(os.fspath(path))
+            content_type = (
+                media_type or 'application/octet-stream'
+            ).encode('ascii')
+        content_length = os.stat(path).st_size
+        return HttpResponse(
+            status,
+            [
+                (b'content-type', content_type),
+                (b'content-length', str(content_length).encode('ascii'))
+            ] + (headers or []),
+            FileBody(path, chunk_size=chunk_size)
+        )
+
+    @classmethod
+    def from_data(
+            cls,
+            request: HttpRequest,
+            data: Any,
+            *,
+            status: int = 200,
+            headers: list[tuple[bytes, bytes]] | None = None
+    ) -> HttpResponse:
+        """Create an HTTP response from data encoded with the codec negotiated
+        from the `accept` header of the request.
+
+        ```python
+        async def get_info(request: HttpRequest) -> HttpResponse:
+            return HttpResponse.from_data(request, request.info)
+        ```
+
+        Args:
+            request (HttpRequest): The request, which provides the codecs and
+                the `accept` header.
+            data (Any): The data to encode.
+            status (int, optional): An optional status code. Defaults to `200`.
+            headers (list[tuple[bytes, bytes]] | None): Optional headers.
+                Defaults to `None`.
+
+        Returns:
+            HttpResponse: The encoded response, or a 406 response if no codec
+                was acceptable.
+        """
+        codec = request.codecs.negotiate(request.header(b'accept'))
+        if codec is None:
+            return HttpResponse(406)
+        return cls.from_bytes(
+            codec.encode(data),
+            status=status,
+            content_type=codec.media_type,
+            headers=[(b'vary', b'accept')] + (headers or [])
+        )
+
+    @classmethod
+    def from_json_stream(
+            cls,
+            items: AsyncIterable[Any],
+            *,
+            status: int = 200,
+            content_type: bytes = b'application/json',
+            headers: list[tuple[bytes, bytes]] | None = None,
+            encode: Callable[[Any], str] = dumps,
+            encode_bytes: Callable[[Any], bytes] | None = None,
+            batch_size: int = 100
+    ) -> HttpResponse:
+        """Create an HTTP response which streams the items as a JSON array.
+
+        The items are encoded in batches as they arrive, so the whole array is
+        never held in memory and the first bytes are sent as soon as the first
+        batch is ready.
+
+        ```python
+        async def rows(cursor):
+            async for row in cursor:
+                yield dict(row)
+
+        return HttpResponse.from_json_stream(rows(cursor))
+        ```
+
+        Args:
+            items (AsyncIterable[Any]): The items of the array.
+            status (int, optional): An optional status code. Defaults to `200`.
+            content_type (bytes, optional): An optional content type. Defaults
+                to `b'application/json'`.
+            headers (list[tuple[bytes, bytes]] | None): Optional headers.
+                Defaults to `None`.
+            encode (Callable[[Any], str], optional): A function to convert an
+                item to a JSON string. Defaults to `json.dumps`.
+            encode_bytes (Callable[[Any]], bytes] | None, optional): An
+                optional function to convert an item to JSON bytes. If
+                specified this will be preferred to the `encode` argument.
+                Defaults to None.
+            batch_size (int, optional): The number of items to encode into
+                each chunk. Defaults to 100.
+
+        Returns:
+            HttpResponse: A streaming JSON http response.
+        """
+        return HttpResponse(
+            status,
+            [(b'content-type', content_type)] + (headers or []),
+            _json_array_writer(
+                items,
+                _make_encode_bytes(encode, encode_bytes),
+                batch_size
+            )
+        )
+
+    @classmethod
+    def from_ndjson_stream(
+            cls,
+            items: AsyncIterable[Any],
+            *,
+            status: int = 200,
+            content_type: bytes = b'application/x-ndjson',
+            headers: list[tuple[bytes, bytes]] | None = None,
+            encode: Callable[[Any], str] = dumps,
+            encode_bytes: Callable[[Any], bytes] | None = None,
+            batch_size: int = 100
+    ) -> HttpResponse:
+        """Create an HTTP response which streams the items as newline
+        delimited JSON.
+
+        Each item is written as a single line of JSON. The items are encoded
+        in batches as they arrive.
+
+        Args:
+            items (AsyncIterable[Any]): The items to send.
+            status (int, optional): An optional status code. Defaults to `200`.
+            content_type (bytes, optional): An optional content type. Defaults
+                to `b'application/x-ndjson'`.
+            headers (list[tuple[bytes, bytes]] | None): Optional headers.
+                Defaults to `None`.
+            encode (Callable[[Any], str], optional): A function to convert an
+                item to a JSON string. The string must not contain newlines.
+                Defaults to `json.dumps`.
+            encode_bytes (Callable[[Any]], bytes] | None, optional): An
+                optional function to convert an item to JSON bytes. If
+                specified this will be preferred to the `encode` argument.
+                Defaults to None.
+            batch_size (int, optional): The number of items to encode into
+                each chunk. Defaults to 100.
+
+        Returns:
+            HttpResponse: A streaming NDJSON http response.
+        """
+        return HttpResponse(
+            status,
+            [(b'content-type', content_type)] + (headers or []),
+            _ndjson_writer(
+                items,
+                _make_encode_bytes(encode, encode_bytes),
+                batch_size
+            )
+        )
@@ -29,7 +29,9 @@ class HttpRouter(metaclass=ABCMeta):
             self,
             methods: set[str],
             path: str,
-            callback: HttpRequestCallback
+            callback: HttpRequestCallback,
+            *,
+            priority: str | None = None
     ) -> None:
         """Add an HTTP request handler
 
@@ -37,6 +39,9 @@ class HttpRouter(metaclass=ABCMeta):
             methods (set[str]): The supported HTTP methods.
             path (str): The path.
             callback (HttpRequestCallback): The request handler.
+            priority (str | None, optional): The priority class of the
+                requests, e.g. "batch", used by admission control. Defaults to
+                None.
         """
 
     @abstractmethod
@@ -55,3 +60,23 @@ class HttpRouter(metaclass=ABCMeta):
             Tuple[HttpRequestCallback, Mapping[str, Any]]: A handler and the route
                 matches.
         """
+
+    def resolve_route(
+            self,
+            method: str,
+            path: str
+    ) -> tuple[HttpRequestCallback, Mapping[str, Any], str | None]:
+        """Resolve a request to a handler with the route matches and priority
+
+        Routers which support priorities should override this.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The path.
+
+        Returns:
+            tuple[HttpRequestCallback, Mapping[str, Any], str | None]: A
+                handler, the route matches, and the priority class if any.
+        """
+        handler, matches = self.resolve(method, path)
+        return handler, matches, None
@@ -22,7 +22,17 @@ The HTTP protocol should be signified to ASGI applications with a `type` value
 of 'http'.
 """
 
-from typing import Any, Awaitable, Callable, Iterable, Literal, TypedDict, Union
+from typing import (
+    IO,
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    Literal,
+    NotRequired,
+    TypedDict,
+    Union
+)
 
 from ..versions import ASGIVersions
 
@@ -230,6 +240,46 @@ class HTTPServerPushEvent(TypedDict):
     headers: Iterable[tuple[bytes, bytes]]
 
 
+class HTTPResponsePathsendEvent(TypedDict):
+    """Path Send - `send` event
+
+    ASGI servers that implement this extension will provide
+    `http.response.pathsend` in the extensions part of the scope. The message
+    is sent in place of the Response Body messages, and the server sends the
+    content of the file itself.
+
+    Attributes:
+        type (Literal["http.response.pathsend"]): The message type.
+        path (str): The absolute path of the file to send.
+    """
+    type: Literal["http.response.pathsend"]
+    path: str
+
+
+class HTTPResponseZerocopysendEvent(TypedDict):
+    """Zero Copy Send - `send` event
+
+    ASGI servers that implement this extension will provide
+    `http.response.zerocopysend` in the extensions part of the scope. The
+    server sends the content of the file with `os.sendfile` or similar.
+
+    Attributes:
+        type (Literal["http.response.zerocopysend"]): The message type.
+        file (IO[bytes]): A file object with an underlying OS file descriptor.
+        offset (int): The position in the file at which to start. Optional;
+            if missing the current position of the file is used.
+        count (int): The number of bytes to send. Optional; if missing the
+            file is sent to the end.
+        more_body (bool): Signifies if there is additional content to come.
+            Optional; if missing defaults to `False`.
+    """
+    type: Literal["http.response.zerocopysend"]
+    file: IO[bytes]
+    offset: NotRequired[int]
+    count: NotRequired[int]
+    more_body: bool
+
+
 class HTTPDisconnectEvent(TypedDict):
     """Disconnect - `receive` event
 
@@ -258,12 +308,16 @@ ASGIHTTPSendEventType = Union[
     Literal["http.response.start"],
     Literal["http.response.body"],
     Literal["http.response.push"],
+    Literal["http.response.pathsend"],
+    Literal["http.response.zerocopysend"],
 ]
 
 ASGIHTTPSendEvent = Union[
     HTTPResponseStartEvent,
     HTTPResponseBodyEvent,
     HTTPServerPushEvent,
+    HTTPResponsePathsendEvent,
+    HTTPResponseZerocopysendEvent,
 ]
 
 ASGIHTTPReceiveCallable = Callable[[], Awaitable[ASGIHTTPReceiveEvent]]
@@ -8,6 +8,8 @@ from .typing import LifespanScope
 class LifespanRequest:
     """A class holding a lifespan request"""
 
+    __slots__ = ('scope', 'info')
+
     def __init__(
             self,
             scope: LifespanScope,
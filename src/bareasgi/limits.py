@@ -0,0 +1,383 @@
+"""Limits on concurrency and memory"""
+
+import asyncio
+from collections import deque
+from typing import Mapping
+
+
+class MemoryBudget:
+    """A process wide budget for buffered bytes.
+
+    Buffers reserve bytes from the budget while they hold content, and
+    release them when they let it go. Optional buffers, such as cache entries,
+    are only kept if there is room, and work which would buffer more, such as
+    reading request bodies, can wait for room.
+
+    ```python
+    budget = MemoryBudget(512 * 1024 * 1024)
+    app = Application(
+        memory_budget=budget,
+        middlewares=[ResponseCacheMiddleware(memory_budget=budget)]
+    )
+    ```
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """A process wide budget for buffered bytes.
+
+        Args:
+            max_size (int): The maximum number of bytes to buffer.
+        """
+        self.max_size = max_size
+        self.reserved = 0
+        self.refused = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def available(self) -> int:
+        """The number of bytes which may be reserved.
+
+        Returns:
+            int: The number of bytes, which is negative if the budget has been
+                exceeded.
+        """
+        return self.max_size - self.reserved
+
+    def admit(self) -> bool:
+        """Check if there is room for more buffering, counting a refusal if
+        not.
+
+        Returns:
+            bool: True if there is room.
+        """
+        if self.reserved < self.max_size:
+            return True
+        self.refused += 1
+        return False
+
+    def try_reserve(self, size: int) -> bool:
+        """Reserve bytes if there is room.
+
+        Args:
+            size (int): The number of bytes.
+
+        Returns:
+            bool: True if the bytes were reserved.
+        """
+        if size > self.max_size - self.reserved:
+            self.refused += 1
+            return False
+        self.reserved += size
+        return True
+
+    def reserve(self, size: int) -> None:
+        """Reserve bytes which are already held, even if there is no room.
+
+        Args:
+            size (int): The number of bytes.
+        """
+        self.reserved += size
+
+    def release(self, size: int) -> None:
+        """Release reserved bytes, waking the tasks waiting for room.
+
+        Args:
+            size (int): The number of bytes.
+        """
+        self.reserved -= size
+        while self._waiters and self.reserved < self.max_size:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def wait(self, timeout: float | None = None) -> bool:
+        """Wait until there is room in the budget.
+
+        Args:
+            timeout (float | None, optional): The maximum number of seconds to
+                wait, or None to wait until there is room. Defaults to None.
+
+        Returns:
+            bool: True if there is room, or False if the timeout expired.
+        """
+        if self.reserved < self.max_size:
+            return True
+        loop = asyncio.get_running_loop()
+        waiter: asyncio.Future[None] = loop.create_future()
+        self._waiters.append(waiter)
+        try:
+            async with asyncio.timeout(timeout):
+                await waiter
+            return True
+        except TimeoutError:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            return self.reserved < self.max_size
+
+
+class ConcurrencyLimit:
+    """A limit on the number of concurrent tasks, with a bounded queue of
+    tasks waiting for a slot.
+
+    ```python
+    limit = ConcurrencyLimit(10, max_queue=20)
+    if await limit.acquire(timeout=1):
+        try:
+            ...
+        finally:
+            limit.release()
+    ```
+    """
+
+    def __init__(self, limit: int, max_queue: int = 0) -> None:
+        """A limit on the number of concurrent tasks.
+
+        Args:
+            limit (int): The maximum number of concurrent tasks.
+            max_queue (int, optional): The maximum number of tasks which may
+                wait for a slot. Defaults to 0.
+        """
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._limit = limit
+        self._waiters: deque[asyncio.Future[bool]] = deque()
+
+    @property
+    def limit(self) -> int:
+        """The maximum number of concurrent tasks.
+
+        When the limit is raised waiting tasks are given the new slots. When it
+        is lowered the tasks in flight are allowed to finish.
+
+        Returns:
+            int: The limit.
+        """
+        return self._limit
+
+    @limit.setter
+    def limit(self, value: int) -> None:
+        self._limit = value
+        while self.in_flight < self._limit and self._wake():
+            self.in_flight += 1
+
+    @property
+    def queued(self) -> int:
+        """The number of tasks waiting for a slot.
+
+        Returns:
+            int: The number of tasks.
+        """
+        return len(self._waiters)
+
+    def _next_waiter(self) -> asyncio.Future[bool] | None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                return waiter
+        return None
+
+    def _discard(self, waiter: asyncio.Future[bool]) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            # Already skipped by a release.
+            pass
+
+    def _wake(self) -> bool:
+        waiter = self._next_waiter()
+        if waiter is None:
+            return False
+        waiter.set_result(True)
+        return True
+
+    async def _wait(
+            self,
+            waiter: asyncio.Future[bool],
+            timeout: float | None
+    ) -> bool:
+        try:
+            async with asyncio.timeout(timeout):
+                return await waiter
+        except TimeoutError:
+            # The slot may have been handed over as the timeout expired.
+            if waiter.done() and not waiter.cancelled():
+                return waiter.result()
+            self._discard(waiter)
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                if waiter.result():
+                    self.release()
+            else:
+                self._discard(waiter)
+            raise
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free, without waiting.
+
+        Returns:
+            bool: True if a slot was taken.
+        """
+        if self.in_flight < self._limit and not self.queued:
+            self.in_flight += 1
+            return True
+        return False
+
+    async def acquire(self, timeout: float | None = None) -> bool:
+        """Take a slot, waiting in the queue for one to become free.
+
+        Args:
+            timeout (float | None, optional): The maximum number of seconds to
+                wait, or None to wait until a slot is free. Defaults to None.
+
+        Returns:
+            bool: True if a slot was taken, or False if the queue was full or
+                the timeout expired.
+        """
+        if self.try_acquire():
+            return True
+        if len(self._waiters) >= self.max_queue:
+            return False
+
+        waiter: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        return await self._wait(waiter, timeout)
+
+    def release(self) -> None:
+        """Return a slot, handing it to the next waiting task if any."""
+        if self.in_flight > self._limit or not self._wake():
+            self.in_flight -= 1
+
+
+class PriorityConcurrencyLimit(ConcurrencyLimit):
+    """A limit on the number of concurrent tasks, where the tasks waiting for a
+    slot are queued by priority class.
+
+    Free slots are shared between the waiting classes in proportion to their
+    weights, by weighted fair queuing. When the queue is full a task may take
+    the place of the most recent waiting task of a class with a lower weight,
+    which then fails to acquire a slot.
+
+    ```python
+    limit = PriorityConcurrencyLimit(
+        10,
+        {'interactive': 8, 'batch': 1},
+        max_queue=20
+    )
+    if await limit.acquire(5, priority='batch'):
+        ...
+    ```
+    """
+
+    def __init__(
+            self,
+            limit: int,
+            weights: Mapping[str, float],
+            max_queue: int = 0
+    ) -> None:
+        """A limit on the number of concurrent tasks queued by priority class.
+
+        Args:
+            limit (int): The maximum number of concurrent tasks.
+            weights (Mapping[str, float]): The weights of the priority classes.
+            max_queue (int, optional): The maximum number of tasks which may
+                wait for a slot. Defaults to 0.
+        """
+        super().__init__(limit, max_queue)
+        self.weights = dict(weights)
+        self._queues: dict[str, deque[asyncio.Future[bool]]] = {
+            name: deque() for name in self.weights
+        }
+        # The virtual time at which each class is next served.
+        self._finish_times = {name: 0.0 for name in self.weights}
+        self._virtual_time = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def queued_by_priority(self) -> dict[str, int]:
+        """The number of tasks waiting for a slot in each priority class.
+
+        Returns:
+            dict[str, int]: The number of tasks indexed by priority class.
+        """
+        return {name: len(queue) for name, queue in self._queues.items()}
+
+    def _next_waiter(self) -> asyncio.Future[bool] | None:
+        while True:
+            waiting = [name for name, queue in self._queues.items() if queue]
+            if not waiting:
+                return None
+            name = min(waiting, key=self._finish_times.__getitem__)
+            waiter = self._queues[name].popleft()
+            if waiter.done():
+                continue
+            self._virtual_time = self._finish_times[name]
+            self._finish_times[name] += 1 / self.weights[name]
+            return waiter
+
+    def _discard(self, waiter: asyncio.Future[bool]) -> None:
+        for queue in self._queues.values():
+            try:
+                queue.remove(waiter)
+                return
+            except ValueError:
+                pass
+
+    def _shed(self, priority: str) -> bool:
+        weight = self.weights[priority]
+        for name in sorted(self._queues, key=self.weights.__getitem__):
+            if self.weights[name] >= weight:
+                break
+            queue = self._queues[name]
+            while queue:
+                waiter = queue.pop()
+                if not waiter.done():
+                    waiter.set_result(False)
+                    return True
+        return False
+
+    async def acquire(
+            self,
+            timeout: float | None = None,
+            *,
+            priority: str | None = None
+    ) -> bool:
+        """Take a slot, waiting in the queue of the priority class for one to
+        become free.
+
+        Args:
+            timeout (float | None, optional): The maximum number of seconds to
+                wait, or None to wait until a slot is free. Defaults to None.
+            priority (str | None, optional): The priority class, or None for
+                the class with the highest weight. Defaults to None.
+
+        Raises:
+            KeyError: If the priority class is unknown.
+
+        Returns:
+            bool: True if a slot was taken, or False if the queue was full,
+                the timeout expired, or the place in the queue was taken by a
+                task with a higher priority.
+        """
+        if priority is None:
+            priority = max(self.weights, key=self.weights.__getitem__)
+        queue = self._queues[priority]
+        if self.try_acquire():
+            return True
+        if self.queued >= self.max_queue and not self._shed(priority):
+            return False
+
+        if not queue:
+            # A class which was idle starts from the current virtual time, so
+            # it can not claim the slots it did not use.
+            self._finish_times[priority] = max(
+                self._finish_times[priority],
+                self._virtual_time
+            )
+        waiter: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        return await self._wait(waiter, timeout)
@@ -0,0 +1,193 @@
+"""A least recently used cache"""
+
+from collections import OrderedDict
+import time
+from typing import Callable, Generic, TypeVar
+
+from .limits import MemoryBudget
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+class LRUCache(Generic[K, V]):
+    """A bounded mapping which discards the least recently used entries, and
+    optionally entries which have expired"""
+
+    def __init__(
+            self,
+            maxsize: int,
+            *,
+            ttl: float | None = None,
+            max_weight: int | None = None,
+            weigh: Callable[[V], int] | None = None,
+            on_discard: Callable[[K, V], None] | None = None,
+            clock: Callable[[], float] = time.monotonic,
+            memory_budget: MemoryBudget | None = None
+    ) -> None:
+        """A bounded mapping which discards the least recently used entries.
+
+        Args:
+            maxsize (int): The maximum number of entries. If zero or less
+                nothing is stored.
+            ttl (float | None, optional): The number of seconds for which an
+                entry is kept, or None to keep entries until they are
+                discarded to make room. Defaults to None.
+            max_weight (int | None, optional): The maximum total weight of the
+                entries, e.g. a number of bytes, or None for no limit. Defaults
+                to None.
+            weigh (Callable[[V], int] | None, optional): A function to
+                calculate the weight of a value. Defaults to None, in which
+                case every value weighs 1.
+            on_discard (Callable[[K, V], None] | None, optional): A function
+                called with each entry which is removed or replaced. Defaults
+                to None.
+            clock (Callable[[], float], optional): The clock used to expire
+                entries. Defaults to `time.monotonic`.
+            memory_budget (MemoryBudget | None, optional): A budget from
+                which the weights of the entries, as numbers of bytes, are
+                reserved. When the budget has no room the least recently used
+                entries are discarded, and if there is still no room the entry
+                is not stored. Defaults to None.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.clock = clock
+        self.memory_budget = memory_budget
+        self.evictions = 0
+        self._weigh = weigh
+        self._on_discard = on_discard
+        self._weight = 0
+        self._entries: OrderedDict[
+            K,
+            tuple[V, float | None, int]
+        ] = OrderedDict()
+
+    @property
+    def weight(self) -> int:
+        """The total weight of the entries.
+
+        Returns:
+            int: The total weight.
+        """
+        return self._weight
+
+    def _discard(self, key: K) -> None:
+        value, _expires, weight = self._entries.pop(key)
+        self._weight -= weight
+        if self.memory_budget is not None:
+            self.memory_budget.release(weight)
+        if self._on_discard is not None:
+            self._on_discard(key, value)
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """Get an entry, marking it as recently used.
+
+        Args:
+            key (K): The key.
+            default (V | None, optional): The value to return if the key is not
+                present. Defaults to None.
+
+        Returns:
+            V | None: The value, or the default if not present or expired.
+        """
+        try:
+            value, expires, _weight = self._entries[key]
+        except KeyError:
+            return default
+        if expires is not None and expires <= self.clock():
+            self.evictions += 1
+            self._discard(key)
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: K, value: V, ttl: float | None = None) -> bool:
+        """Add or replace an entry, discarding the least recently used entries
+        if the cache is full.
+
+        Args:
+            key (K): The key.
+            value (V): The value.
+            ttl (float | None, optional): The number of seconds for which the
+                entry is kept, overriding the default. Defaults to None.
+
+        Returns:
+            bool: True if the entry was stored, or False if it could not fit in
+                the cache.
+        """
+        weight = 1 if self._weigh is None else self._weigh(value)
+        if self.maxsize <= 0 or (
+                self.max_weight is not None and weight > self.max_weight
+        ):
+            return False
+        if key in self._entries:
+            self._discard(key)
+        if self.memory_budget is not None:
+            # Give up the least recently used entries to make room.
+            while self._entries and weight > self.memory_budget.available:
+                self.evictions += 1
+                self._discard(next(iter(self._entries)))
+            if not self.memory_budget.try_reserve(weight):
+                return False
+        if ttl is None:
+            ttl = self.ttl
+        expires = None if ttl is None else self.clock() + ttl
+        self._entries[key] = (value, expires, weight)
+        self._weight += weight
+        while len(self._entries) > self.maxsize or (
+                self.max_weight is not None and
+                self._weight > self.max_weight
+        ):
+            self.evictions += 1
+            self._discard(next(iter(self._entries)))
+        return True
+
+    def pop(self, key: K, default: V | None = None) -> V | None:
+        """Remove an entry.
+
+        Args:
+            key (K): The key.
+            default (V | None, optional): The value to return if the key is not
+                present. Defaults to None.
+
+        Returns:
+            V | None: The removed value, or the default if not present.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        self._discard(key)
+        return entry[0]
+
+    def expire(self) -> int:
+        """Remove the expired entries.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        now = self.clock()
+        expired = [
+            key
+            for key, (_value, expires, _weight) in self._entries.items()
+            if expires is not None and expires <= now
+        ]
+        for key in expired:
+            self._discard(key)
+        self.evictions += len(expired)
+        return len(expired)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        for key in list(self._entries):
+            self._discard(key)
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._entries.get(key)  # type: ignore
+        return entry is not None and (
+            entry[1] is None or entry[1] > self.clock()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
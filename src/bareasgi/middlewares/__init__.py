@@ -1,11 +1,42 @@
 """Middlewares"""
 
+from .adaptive import AdaptiveConcurrencyMiddleware, AdaptiveLimitStatistics
+from .admission import (
+    DEFAULT_PRIORITIES,
+    AdmissionMiddleware,
+    AdmissionStatistics
+)
+from .bulkhead import BulkheadMiddleware
+from .cache import CacheStatistics, ResponseCacheMiddleware
+from .coalescing import CoalescingMiddleware
 from .compression import (
     CompressionMiddleware,
     make_default_compression_middleware
 )
+from .deadline import DeadlineMiddleware
+from .disk_cache import DiskCache
+from .conditional import ConditionalMiddleware, VersionKeyMiddleware
+from .idempotency import IdempotencyMiddleware
+from .ranges import RangeMiddleware
+from .rate_limit import RateLimitMiddleware
 
 __all__ = [
+    'AdaptiveConcurrencyMiddleware',
+    'AdaptiveLimitStatistics',
+    'DEFAULT_PRIORITIES',
+    'AdmissionMiddleware',
+    'AdmissionStatistics',
+    'BulkheadMiddleware',
+    'CacheStatistics',
+    'ResponseCacheMiddleware',
+    'CoalescingMiddleware',
     'CompressionMiddleware',
-    'make_default_compression_middleware'
+    'make_default_compression_middleware',
+    'ConditionalMiddleware',
+    'DeadlineMiddleware',
+    'DiskCache',
+    'IdempotencyMiddleware',
+    'RangeMiddleware',
+    'RateLimitMiddleware',
+    'VersionKeyMiddleware',
 ]
@@ -0,0 +1,253 @@
+"""Middleware for adaptive concurrency limits"""
+
+import asyncio
+import logging
+import math
+from typing import Final, Mapping, NamedTuple
+
+from ..basic_router.path_definition import PathDefinition
+from ..http import (
+    HttpRequestCallback,
+    HttpRequest,
+    HttpResponse
+)
+from ..limits import ConcurrencyLimit
+from .admission import DEFAULT_OVERLOAD_RESPONSE
+
+LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
+
+DEFAULT_GROUP: Final[str] = 'default'
+
+# Response statuses which show a downstream service is overloaded.
+OVERLOAD_STATUSES: Final[frozenset[int]] = frozenset((503, 504))
+
+
+class AdaptiveLimitStatistics(NamedTuple):
+    """Statistics for an adaptive concurrency limit"""
+
+    limit: int
+    """The current concurrency limit"""
+
+    in_flight: int
+    """The number of requests being handled"""
+
+    rtt: float
+    """The estimated handler latency in seconds without queueing"""
+
+    admitted: int
+    """The number of requests which have been handled"""
+
+    rejected: int
+    """The number of requests which have been rejected"""
+
+
+class _RouteGroup:
+
+    __slots__ = ('limit', 'estimate', 'rtt', 'admitted', 'rejected')
+
+    def __init__(self, initial_limit: int, max_queue: int) -> None:
+        self.limit = ConcurrencyLimit(initial_limit, max_queue)
+        self.estimate = float(initial_limit)
+        self.rtt = 0.0
+        self.admitted = 0
+        self.rejected = 0
+
+
+class AdaptiveConcurrencyMiddleware:
+    """Adaptive concurrency limit middleware.
+
+    The number of requests handled at once is limited, and the limit is
+    adjusted from the measured handler latency, using the gradient algorithm
+    of Netflix's concurrency-limits library. A long term moving average of the
+    latency estimates the latency without queueing. While recent requests take
+    no longer than `tolerance` times this, the limit grows by about the square
+    root of the limit. As they slow down the limit shrinks in proportion. A
+    503 or 504 response from the handler, typically passed on from an
+    overloaded service, shrinks the limit by `backoff_ratio`. Requests beyond
+    the limit wait in a queue of at most `max_queue` requests for up to
+    `max_queue_time` seconds, or until the request deadline, after which they
+    receive a 503 response with a `retry-after` header.
+
+    ```python
+    limiter = AdaptiveConcurrencyMiddleware(
+        groups={
+            '/api/{path:path}': 'api',
+            '/reports/{path:path}': 'reports'
+        }
+    )
+    app = Application(middlewares=[limiter])
+    ```
+
+    Each route group has its own limit. Requests for paths which match none
+    of the `groups` patterns belong to the "default" group.
+    """
+
+    def __init__(
+            self,
+            *,
+            groups: Mapping[str, str] | None = None,
+            initial_limit: int = 20,
+            min_limit: int = 1,
+            max_limit: int = 1000,
+            max_queue: int = 0,
+            max_queue_time: float = 1.0,
+            tolerance: float = 2.0,
+            smoothing: float = 0.2,
+            backoff_ratio: float = 0.9,
+            rtt_window: int = 600,
+            rejection_response: HttpResponse = DEFAULT_OVERLOAD_RESPONSE
+    ) -> None:
+        """Constructs the adaptive concurrency limit middleware.
+
+        Args:
+            groups (Mapping[str, str] | None, optional): A map of route paths
+                to the names of their groups. Defaults to None.
+            initial_limit (int, optional): The limit of each group before any
+                latency is measured. Defaults to 20.
+            min_limit (int, optional): The smallest limit. Defaults to 1.
+            max_limit (int, optional): The largest limit. Defaults to 1000.
+            max_queue (int, optional): The maximum number of requests in each
+                group waiting to be handled. Defaults to 0.
+            max_queue_time (float, optional): The maximum number of seconds a
+                request waits to be handled. Defaults to 1.
+            tolerance (float, optional): The ratio of the recent to the
+                estimated latency above which the limit shrinks. Defaults to
+                2.
+            smoothing (float, optional): The weight given to each new limit.
+                Defaults to 0.2.
+            backoff_ratio (float, optional): The ratio by which the limit
+                shrinks on an overload response. Defaults to 0.9.
+            rtt_window (int, optional): The number of requests over which the
+                latency is averaged. Defaults to 600.
+            rejection_response (HttpResponse, optional): The response sent
+                when a request is rejected. Defaults to
+                DEFAULT_OVERLOAD_RESPONSE.
+        """
+        self.min_limit = min_limit
+        self.max_queue_time = max_queue_time
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.backoff_ratio = backoff_ratio
+        self.rtt_window = rtt_window
+        self.rejection_response = rejection_response
+        self.routes = [
+            (PathDefinition(path), name)
+            for path, name in (groups or {}).items()
+        ]
+        self._groups = {
+            name: _RouteGroup(initial_limit, max_queue)
+            for name in {DEFAULT_GROUP, *(groups or {}).values()}
+        }
+
+    @property
+    def statistics(self) -> dict[str, AdaptiveLimitStatistics]:
+        """The statistics of each route group.
+
+        Returns:
+            dict[str, AdaptiveLimitStatistics]: The statistics indexed by the
+                group name.
+        """
+        return {
+            name: AdaptiveLimitStatistics(
+                group.limit.limit,
+                group.limit.in_flight,
+                group.rtt,
+                group.admitted,
+                group.rejected
+            )
+            for name, group in self._groups.items()
+        }
+
+    def route_group(self, path: str) -> str:
+        """Find the group of a path.
+
+        Args:
+            path (str): The request path.
+
+        Returns:
+            str: The name of the group.
+        """
+        for path_definition, name in self.routes:
+            is_match, _matches = path_definition.match(path)
+            if is_match:
+                return name
+        return DEFAULT_GROUP
+
+    def _update(
+            self,
+            group: _RouteGroup,
+            rtt: float,
+            in_flight: int,
+            is_overloaded: bool
+    ) -> None:
+        if is_overloaded:
+            estimate = group.estimate * self.backoff_ratio
+        else:
+            if group.rtt == 0:
+                group.rtt = rtt
+            else:
+                group.rtt += (rtt - group.rtt) / self.rtt_window
+            if in_flight < group.estimate / 2:
+                # The limit is not being used, so there is nothing to learn.
+                return
+            gradient = 1.0 if rtt <= 0 else max(
+                0.5,
+                min(1.0, self.tolerance * group.rtt / rtt)
+            )
+            estimate = group.estimate * gradient + math.sqrt(group.estimate)
+            estimate = (
+                group.estimate * (1 - self.smoothing) +
+                estimate * self.smoothing
+            )
+            if rtt > 0 and group.rtt / rtt > 2:
+                # Let the long term average follow a fall in latency.
+                group.rtt *= 0.95
+
+        group.estimate = max(self.min_limit, min(self.max_limit, estimate))
+        group.limit.limit = int(group.estimate)
+
+    async def __call__(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        """Call the handler if the group of the request is within its limit,
+        or reject the request.
+
+        Args:
+            request (HttpRequest): The request.
+            handler (HttpRequestCallback): The handler.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        group = self._groups[self.route_group(request.scope['path'])]
+        timeout = self.max_queue_time
+        time_remaining = request.time_remaining
+        if time_remaining is not None and time_remaining < timeout:
+            timeout = time_remaining
+        if not await group.limit.acquire(max(timeout, 0.0)):
+            group.rejected += 1
+            LOGGER.debug(
+                'Rejected request for "%s" at a limit of %d.',
+                request.scope['path'],
+                group.limit.limit
+            )
+            return self.rejection_response.copy()
+
+        group.admitted += 1
+        in_flight = group.limit.in_flight
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            response = await handler(request)
+            self._update(
+                group,
+                loop.time() - start,
+                in_flight,
+                response.status in OVERLOAD_STATUSES
+            )
+            return response
+        finally:
+            group.limit.release()
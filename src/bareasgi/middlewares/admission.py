@@ -0,0 +1,238 @@
+"""Middleware for admission control"""
+
+import asyncio
+import logging
+from typing import Callable, Final, Iterable, Mapping, NamedTuple
+
+from ..basic_router.path_definition import PathDefinition
+from ..http import (
+    HttpRequestCallback,
+    HttpRequest,
+    HttpResponse
+)
+from ..limits import PriorityConcurrencyLimit
+
+LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
+
+DEFAULT_OVERLOAD_RESPONSE: Final[HttpResponse] = HttpResponse.from_text(
+    'Service Unavailable',
+    status=503,
+    headers=[(b'retry-after', b'1')]
+)
+
+# The weights of the standard priority classes.
+DEFAULT_PRIORITIES: Final[Mapping[str, float]] = {
+    'interactive': 8.0,
+    'batch': 2.0,
+    'background': 1.0
+}
+
+# The weight given to each new queue time in the moving average.
+QUEUE_TIME_SMOOTHING: Final[float] = 0.1
+
+
+class AdmissionStatistics(NamedTuple):
+    """Statistics for admission control"""
+
+    in_flight: int
+    """The number of requests being handled"""
+
+    queued: int
+    """The number of requests waiting to be handled"""
+
+    admitted: int
+    """The number of requests which have been handled"""
+
+    rejected: int
+    """The number of requests which have been rejected"""
+
+    queue_time: float
+    """The moving average of the seconds admitted requests waited"""
+
+
+class AdmissionMiddleware:
+    """Admission control middleware.
+
+    At most `max_in_flight` requests are handled at once. Further requests
+    wait in a queue of at most `max_queue` requests for up to `max_queue_time`
+    seconds, or until the request deadline, after which they are rejected. A
+    request which finds the queue full is rejected immediately. Rejected
+    requests receive a 503 response with a `retry-after` header, without
+    their body being read, so a spike in load fails some requests quickly
+    rather than slowing every request until they all time out.
+
+    ```python
+    admission = AdmissionMiddleware(
+        200,
+        max_queue=100,
+        exempt=('/health', '/metrics')
+    )
+    app = Application(middlewares=[admission])
+    ```
+
+    This should be the first middleware, so rejected requests do no other
+    work. Requests for the `exempt` paths, which may be route patterns, are
+    always handled.
+
+    When `priorities` are given, waiting requests are queued by priority
+    class, and free slots are shared between the classes in proportion to
+    their weights. A request in a class with a higher weight which finds the
+    queue full takes the place of the most recent request in the class with
+    the lowest weight. So under contention batch requests are delayed or shed
+    before interactive ones. The class of a request is given by the
+    `classify` function, for example from a client header, or else by its
+    route, or else is `default_priority`.
+
+    ```python
+    admission = AdmissionMiddleware(200, priorities=DEFAULT_PRIORITIES)
+    app = Application(middlewares=[admission])
+    app.http_router.add({'GET'}, '/export', export, priority='batch')
+    ```
+    """
+
+    def __init__(
+            self,
+            max_in_flight: int = 100,
+            *,
+            max_queue: int = 100,
+            max_queue_time: float = 1.0,
+            exempt: Iterable[str] = (),
+            rejection_response: HttpResponse = DEFAULT_OVERLOAD_RESPONSE,
+            priorities: Mapping[str, float] | None = None,
+            default_priority: str = 'interactive',
+            classify: Callable[[HttpRequest], str | None] | None = None
+    ) -> None:
+        """Constructs the admission control middleware.
+
+        Args:
+            max_in_flight (int, optional): The maximum number of requests to
+                handle at once. Defaults to 100.
+            max_queue (int, optional): The maximum number of requests waiting
+                to be handled. Defaults to 100.
+            max_queue_time (float, optional): The maximum number of seconds a
+                request waits to be handled. Defaults to 1.
+            exempt (Iterable[str], optional): The paths which are not
+                limited, e.g. health checks. Defaults to ().
+            rejection_response (HttpResponse, optional): The response sent
+                when a request is rejected. Defaults to
+                DEFAULT_OVERLOAD_RESPONSE.
+            priorities (Mapping[str, float] | None, optional): The weights of
+                the priority classes, e.g. DEFAULT_PRIORITIES, or None to queue
+                requests in order of arrival. Defaults to None.
+            default_priority (str, optional): The priority class of requests
+                without one. Defaults to 'interactive'.
+            classify (Callable[[HttpRequest], str | None] | None, optional): A
+                function returning the priority class of a request, or None to
+                use the priority of its route. Defaults to None.
+
+        Raises:
+            ValueError: If the default priority is not one of the priorities.
+        """
+        if priorities is not None and default_priority not in priorities:
+            raise ValueError(f'Unknown priority "{default_priority}"')
+        self.max_queue_time = max_queue_time
+        self.exempt = [PathDefinition(path) for path in exempt]
+        self.rejection_response = rejection_response
+        self.default_priority = default_priority
+        self.classify = classify
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_time = 0.0
+        # Without priorities every request is in one class, so is queued in
+        # order of arrival.
+        self._limit = PriorityConcurrencyLimit(
+            max_in_flight,
+            priorities or {default_priority: 1.0},
+            max_queue
+        )
+
+    @property
+    def statistics(self) -> AdmissionStatistics:
+        """The statistics of the admission control.
+
+        Returns:
+            AdmissionStatistics: The statistics.
+        """
+        return AdmissionStatistics(
+            self._limit.in_flight,
+            self._limit.queued,
+            self.admitted,
+            self.rejected,
+            self.queue_time
+        )
+
+    def priority(self, request: HttpRequest) -> str:
+        """Find the priority class of a request.
+
+        Args:
+            request (HttpRequest): The request.
+
+        Returns:
+            str: The priority class.
+        """
+        priority = None
+        if self.classify is not None:
+            priority = self.classify(request)
+        if priority is None:
+            priority = request.priority
+        if priority is None or priority not in self._limit.weights:
+            return self.default_priority
+        return priority
+
+    def is_exempt(self, path: str) -> bool:
+        """Check if a path is exempt from admission control.
+
+        Args:
+            path (str): The request path.
+
+        Returns:
+            bool: True if the path is exempt.
+        """
+        return any(
+            path_definition.match(path)[0]
+            for path_definition in self.exempt
+        )
+
+    async def __call__(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        """Call the handler if there is capacity, or reject the request.
+
+        Args:
+            request (HttpRequest): The request.
+            handler (HttpRequestCallback): The handler.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        if self.exempt and self.is_exempt(request.scope['path']):
+            return await handler(request)
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        timeout = self.max_queue_time
+        time_remaining = request.time_remaining
+        if time_remaining is not None and time_remaining < timeout:
+            timeout = time_remaining
+
+        if not await self._limit.acquire(
+                max(timeout, 0.0),
+                priority=self.priority(request)
+        ):
+            self.rejected += 1
+            LOGGER.debug(
+                'Rejected request for "%s".',
+                request.scope['path']
+            )
+            return self.rejection_response.copy()
+
+        self.admitted += 1
+        self.queue_time += QUEUE_TIME_SMOOTHING * (
+            loop.time() - start - self.queue_time
+        )
+        try:
+            return await handler(request)
+        finally:
+            self._limit.release()
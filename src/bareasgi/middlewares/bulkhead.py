@@ -0,0 +1,123 @@
+"""Middleware for per-route concurrency pools"""
+
+import logging
+from typing import Final
+
+from ..http import (
+    HttpRequestCallback,
+    HttpRequest,
+    HttpResponse
+)
+from ..limits import ConcurrencyLimit
+from .admission import DEFAULT_OVERLOAD_RESPONSE
+
+LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
+
+
+class BulkheadMiddleware:
+    """Bulkhead middleware.
+
+    A pool of at most `max_concurrent` requests which are handled at once,
+    with a small queue of requests waiting for the pool. Requests which find
+    the queue full, or wait longer than `max_queue_time`, are rejected with a
+    pre-built response. Giving slow routes their own pools stops them using
+    every connection and starving the other routes.
+
+    The middleware is added to routes as local middleware. Routes which share
+    an instance share a pool.
+
+    ```python
+    reports = BulkheadMiddleware('reports', 4, max_queue=8)
+
+    app.http_router.add(
+        {'GET'},
+        '/reports/daily',
+        make_middleware_chain(reports, handler=daily_report)
+    )
+    app.http_router.add(
+        {'GET'},
+        '/reports/annual',
+        make_middleware_chain(reports, handler=annual_report)
+    )
+    ```
+    """
+
+    def __init__(
+            self,
+            name: str,
+            max_concurrent: int,
+            *,
+            max_queue: int = 0,
+            max_queue_time: float = 1.0,
+            rejection_response: HttpResponse = DEFAULT_OVERLOAD_RESPONSE
+    ) -> None:
+        """Constructs the bulkhead middleware.
+
+        Args:
+            name (str): The name of the pool, used when logging.
+            max_concurrent (int): The maximum number of requests to handle at
+                once.
+            max_queue (int, optional): The maximum number of requests waiting
+                to be handled. Defaults to 0.
+            max_queue_time (float, optional): The maximum number of seconds a
+                request waits to be handled. Defaults to 1.
+            rejection_response (HttpResponse, optional): The response sent
+                when a request is rejected. Defaults to
+                DEFAULT_OVERLOAD_RESPONSE.
+        """
+        self.name = name
+        self.max_queue_time = max_queue_time
+        self.rejection_response = rejection_response
+        self.rejected = 0
+        self._limit = ConcurrencyLimit(max_concurrent, max_queue)
+
+    @property
+    def in_flight(self) -> int:
+        """The number of requests being handled.
+
+        Returns:
+            int: The number of requests.
+        """
+        return self._limit.in_flight
+
+    @property
+    def queued(self) -> int:
+        """The number of requests waiting to be handled.
+
+        Returns:
+            int: The number of requests.
+        """
+        return self._limit.queued
+
+    async def __call__(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        """Call the handler when the pool has capacity, or reject the request.
+
+        Args:
+            request (HttpRequest): The request.
+            handler (HttpRequestCallback): The handler.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        if not self._limit.try_acquire():
+            timeout = self.max_queue_time
+            time_remaining = request.time_remaining
+            if time_remaining is not None and time_remaining < timeout:
+                timeout = time_remaining
+            if not await self._limit.acquire(max(timeout, 0.0)):
+                self.rejected += 1
+                LOGGER.debug(
+                    'Rejected request for "%s" from the "%s" pool.',
+                    request.scope['path'],
+                    self.name
+                )
+                return self.rejection_response.copy()
+
+        try:
+            return await handler(request)
+        finally:
+            self._limit.release()
@@ -0,0 +1,927 @@
+"""Middleware for caching responses"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Final,
+    Iterable,
+    Mapping,
+    NamedTuple
+)
+
+from bareutils import header
+
+from ..basic_router.path_definition import PathDefinition
+from ..http import (
+    BytesBody,
+    HttpRequestCallback,
+    HttpRequest,
+    HttpResponse,
+    buffer_body
+)
+from ..lifespan import LifespanRequest
+from ..limits import MemoryBudget
+from ..lru import LRUCache
+from ..utils import NullIter
+from .disk_cache import DiskCache, DiskCacheWriter
+
+LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
+
+# The statuses which may be cached when they have an explicit lifetime.
+CACHEABLE_STATUSES: Final[frozenset[int]] = frozenset(
+    (200, 203, 204, 300, 301, 308, 404, 410)
+)
+
+# The approximate memory used by an entry in addition to its content.
+ENTRY_OVERHEAD: Final[int] = 256
+
+# The response header holding the tags of a response, which is not sent.
+SURROGATE_KEY: Final[bytes] = b'surrogate-key'
+
+VariantKey = tuple[str, bytes]
+CacheKey = tuple[str, bytes, tuple[bytes | None, ...]]
+
+
+class CachedResponse:
+    """A response held in the cache"""
+
+    __slots__ = (
+        'status',
+        'headers',
+        'content',
+        'created',
+        'ttl',
+        'tags',
+        'stale_while_revalidate',
+        'stale_if_error'
+    )
+
+    def __init__(
+            self,
+            status: int,
+            headers: list[tuple[bytes, bytes]],
+            content: bytes,
+            created: float,
+            ttl: float,
+            tags: tuple[bytes, ...] = (),
+            stale_while_revalidate: float = 0.0,
+            stale_if_error: float = 0.0
+    ) -> None:
+        """A response held in the cache.
+
+        Args:
+            status (int): The status code.
+            headers (list[tuple[bytes, bytes]]): The headers.
+            content (bytes): The body.
+            created (float): The time at which the response was stored.
+            ttl (float): The number of seconds for which the response is
+                fresh.
+            tags (tuple[bytes, ...], optional): The tags by which the response
+                can be purged. Defaults to ().
+            stale_while_revalidate (float, optional): The number of seconds
+                after the response becomes stale for which it may be sent
+                while it is refreshed. Defaults to 0.
+            stale_if_error (float, optional): The number of seconds after the
+                response becomes stale for which it may be sent if the handler
+                fails or the server is overloaded. Defaults to 0.
+        """
+        self.status = status
+        self.headers = headers
+        self.content = content
+        self.created = created
+        self.ttl = ttl
+        self.tags = tags
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+
+    @property
+    def size(self) -> int:
+        """The approximate number of bytes of memory used by the entry.
+
+        Returns:
+            int: The size of the entry.
+        """
+        return ENTRY_OVERHEAD + len(self.content) + sum(
+            len(name) + len(value)
+            for name, value in self.headers
+        )
+
+    def to_response(self, now: float, include_body: bool) -> HttpResponse:
+        """Make a response to send from the cached response.
+
+        Args:
+            now (float): The current time.
+            include_body (bool): If False the body is omitted, as for a `HEAD`
+                request.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        headers = self.headers + [
+            (b'age', str(int(now - self.created)).encode('ascii'))
+        ]
+        return HttpResponse(
+            self.status,
+            headers,
+            BytesBody(self.content) if include_body and self.content else None
+        )
+
+
+class CacheStatistics(NamedTuple):
+    """Statistics for a response cache"""
+
+    hits: int
+    """The number of requests answered from the cache"""
+
+    misses: int
+    """The number of cacheable requests passed to the handler"""
+
+    entries: int
+    """The number of cached responses"""
+
+    size: int
+    """The approximate memory used by the cached responses in bytes"""
+
+    evictions: int
+    """The number of responses discarded to make room or as they expired"""
+
+    stale: int = 0
+    """The number of requests answered with a stale response"""
+
+    @property
+    def hit_ratio(self) -> float:
+        """The proportion of cacheable requests answered from the cache.
+
+        Returns:
+            float: The hit ratio between 0 and 1.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def pop_surrogate_keys(response: HttpResponse) -> tuple[bytes, ...]:
+    """Remove the `surrogate-key` headers from a response, returning the tags
+    they contain.
+
+    A handler tags a response with the entities it includes, so the cached
+    response can be purged when one of them changes.
+
+    ```python
+    return HttpResponse.from_json(
+        product,
+        headers=[(b'surrogate-key', b'product-42 category-7')]
+    )
+    ```
+
+    Args:
+        response (HttpResponse): The response.
+
+    Returns:
+        tuple[bytes, ...]: The tags.
+    """
+    if not response.headers or not any(
+            name == SURROGATE_KEY for name, _ in response.headers
+    ):
+        return ()
+    tags: list[bytes] = []
+    headers: list[tuple[bytes, bytes]] = []
+    for name, value in response.headers:
+        if name == SURROGATE_KEY:
+            tags.extend(value.split())
+        else:
+            headers.append((name, value))
+    response.headers = headers
+    return tuple(dict.fromkeys(tags))
+
+
+def _cache_directives(
+        headers: Iterable[tuple[bytes, bytes]]
+) -> Mapping[bytes, int | None] | None:
+    # The directives of the cache-control headers, or None if they are
+    # malformed.
+    try:
+        return header.cache_control(headers) or {}
+    except ValueError:
+        return None
+
+
+def _vary_values(
+        request: HttpRequest,
+        names: tuple[bytes, ...]
+) -> tuple[bytes | None, ...]:
+    headers = request.headers
+    return tuple(
+        b', '.join(headers[name]) if name in headers else None
+        for name in names
+    )
+
+
+class ResponseCacheMiddleware:
+    """Response cache middleware.
+
+    Complete responses to `GET` requests are kept in a bounded in-memory LRU
+    cache, and replayed without calling the handler until they expire.
+    Responses are keyed on the path, the query string, and the values of the
+    request headers named by the `vary` header of the response.
+
+    The lifetime of a response is taken from the `s-maxage` or `max-age`
+    directives of its `cache-control` header. Otherwise the lifetime
+    configured for the first matching route pattern is used, then the default
+    lifetime. Responses with no lifetime, responses marked `no-store`,
+    `no-cache` or `private`, responses which set cookies, and responses larger
+    than `max_entry_size` are not cached. Requests with an `authorization`
+    header bypass the cache.
+
+    Responses may be tagged with a `surrogate-key` header, which is removed
+    before the response is sent. Calling `purge` with a tag removes every
+    response with that tag, taking time proportional to the number of those
+    responses.
+
+    ```python
+    cache = ResponseCacheMiddleware(
+        routes={'/products/{id:int}': 30.0},
+        max_size=32 * 1024 * 1024
+    )
+    app = Application(middlewares=[cache])
+    ```
+
+    An optional `DiskCache` adds a second tier which holds responses too
+    large, or too many, for memory. Responses found on disk are promoted to
+    memory when they fit, otherwise they are sent from the memory-mapped file.
+    The disk is read in a thread, and once the `startup` lifespan handler has
+    run responses are written to it by background tasks, so requests do not
+    wait for the file system. Bodies too large for memory are written to the
+    disk as they are sent rather than buffered first.
+
+    A response which has become stale can still be sent for a while. Within
+    its `stale-while-revalidate` window it is sent at once and refreshed by a
+    background task. Within its `stale-if-error` window it is sent when the
+    handler raises an exception or returns a 5xx status, or when `max_in_flight`
+    requests are already being handled. The windows are taken from the
+    `cache-control` header of the response, or the defaults given here.
+    Background refreshes need the `startup` and `shutdown` lifespan handlers,
+    which track the refresh tasks and cancel them on shutdown. Until `startup`
+    has run, stale responses are refreshed before responding.
+
+    ```python
+    cache = ResponseCacheMiddleware(
+        default_ttl=10,
+        stale_while_revalidate=60,
+        stale_if_error=600,
+        max_in_flight=200
+    )
+    app = Application(
+        middlewares=[cache],
+        startup_handlers=[cache.startup],
+        shutdown_handlers=[cache.shutdown]
+    )
+    ```
+    """
+
+    def __init__(
+            self,
+            *,
+            routes: Mapping[str, float] | None = None,
+            default_ttl: float | None = None,
+            max_entries: int = 1024,
+            max_size: int = 64 * 1024 * 1024,
+            max_entry_size: int = 1024 * 1024,
+            disk_cache: DiskCache | None = None,
+            stale_while_revalidate: float = 0.0,
+            stale_if_error: float = 0.0,
+            max_in_flight: int | None = None,
+            clock: Callable[[], float] = time.monotonic,
+            memory_budget: MemoryBudget | None = None
+    ) -> None:
+        """Constructs the response cache middleware.
+
+        Args:
+            routes (Mapping[str, float] | None, optional): The lifetime in
+                seconds of the responses for route patterns such as
+                '/products/{id:int}', used when a response has no `max-age`.
+                Defaults to None.
+            default_ttl (float | None, optional): The lifetime in seconds of
+                responses with no `max-age` which match no route, or None to
+                not cache them. Defaults to None.
+            max_entries (int, optional): The maximum number of responses.
+                Defaults to 1024.
+            max_size (int, optional): The maximum memory in bytes used by the
+                responses. Defaults to 64MB.
+            max_entry_size (int, optional): The size of the largest body to
+                cache in memory. Defaults to 1MB.
+            disk_cache (DiskCache | None, optional): An optional second tier
+                of the cache on disk. Defaults to None.
+            stale_while_revalidate (float, optional): The default number of
+                seconds for which a stale response is sent while it is
+                refreshed in the background. Defaults to 0.
+            stale_if_error (float, optional): The default number of seconds for
+                which a stale response is sent when the handler fails or the
+                server is overloaded. Defaults to 0.
+            max_in_flight (int | None, optional): The number of requests being
+                handled above which stale responses are sent, or None for no
+                limit. Defaults to None.
+            clock (Callable[[], float], optional): The clock used to expire
+                responses. Defaults to `time.monotonic`.
+            memory_budget (MemoryBudget | None, optional): A budget from which
+                the memory used by the responses is reserved. Defaults to
+                None.
+        """
+        self.routes = [
+            (PathDefinition(path), ttl)
+            for path, ttl in (routes or {}).items()
+        ]
+        self.default_ttl = default_ttl
+        self.max_entry_size = max_entry_size
+        self.disk_cache = disk_cache
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+        self.max_in_flight = max_in_flight
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._in_flight = 0
+        self._tasks: set[asyncio.Task] | None = None
+        self._refreshing: set[CachedResponse] = set()
+        self._entries: LRUCache[CacheKey, CachedResponse] = LRUCache(
+            max_entries,
+            max_weight=max_size,
+            weigh=lambda entry: entry.size,
+            on_discard=self._unindex_tags,
+            clock=clock,
+            memory_budget=memory_budget
+        )
+        self._tags: dict[bytes, set[CacheKey]] = {}
+        self._variants: LRUCache[VariantKey, tuple[bytes, ...]] = LRUCache(
+            max_entries
+        )
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        """The statistics of the cache.
+
+        Returns:
+            CacheStatistics: The statistics.
+        """
+        return CacheStatistics(
+            self.hits,
+            self.misses,
+            len(self._entries),
+            self._entries.weight,
+            self._entries.evictions,
+            self.stale
+        )
+
+    async def startup(self, _request: LifespanRequest) -> None:
+        """A lifespan startup handler which enables refreshing stale responses
+        and writing to the disk cache in the background.
+
+        Args:
+            _request (LifespanRequest): The lifespan request.
+        """
+        self._tasks = set()
+
+    async def shutdown(self, _request: LifespanRequest) -> None:
+        """A lifespan shutdown handler which cancels the background tasks,
+        and writes the index of the disk cache.
+
+        Args:
+            _request (LifespanRequest): The lifespan request.
+        """
+        tasks, self._tasks = self._tasks or set(), None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.disk_cache is not None:
+            await asyncio.to_thread(self.disk_cache.flush)
+
+    async def clear(self) -> None:
+        """Remove all the cached responses, including those on disk"""
+        self._entries.clear()
+        self._variants.clear()
+        if self.disk_cache is not None:
+            await asyncio.to_thread(self.disk_cache.clear)
+
+    def _unindex_tags(self, key: CacheKey, entry: CachedResponse) -> None:
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    async def purge(self, tag: bytes | str) -> int:
+        """Remove the responses with a tag.
+
+        Args:
+            tag (bytes | str): The tag.
+
+        Returns:
+            int: The number of responses removed from memory.
+        """
+        if isinstance(tag, str):
+            tag = tag.encode('latin-1')
+        keys = self._tags.pop(tag, set())
+        for key in keys:
+            self._entries.pop(key)
+        if self.disk_cache is not None:
+            await asyncio.to_thread(
+                self.disk_cache.purge,
+                tag.decode('latin-1')
+            )
+        return len(keys)
+
+    def route_ttl(self, path: str) -> float | None:
+        """Find the configured lifetime for a path.
+
+        Args:
+            path (str): The request path.
+
+        Returns:
+            float | None: The lifetime in seconds, or None if not configured.
+        """
+        for path_definition, ttl in self.routes:
+            is_match, _matches = path_definition.match(path)
+            if is_match:
+                return ttl
+        return self.default_ttl
+
+    def response_ttl(
+            self,
+            request: HttpRequest,
+            response: HttpResponse
+    ) -> float | None:
+        """Find the lifetime of a response.
+
+        Args:
+            request (HttpRequest): The request.
+            response (HttpResponse): The response.
+
+        Returns:
+            float | None: The lifetime in seconds, or None if the response
+                cannot be cached.
+        """
+        if (
+                response.status not in CACHEABLE_STATUSES or
+                response.pushes or
+                any(name == b'set-cookie' for name, _ in response.headers or [])
+        ):
+            return None
+        directives = _cache_directives(response.headers or [])
+        if (
+                directives is None or
+                b'no-store' in directives or
+                b'no-cache' in directives or
+                b'private' in directives
+        ):
+            return None
+        ttl = directives.get(b's-maxage', directives.get(b'max-age'))
+        if ttl is None:
+            return self.route_ttl(request.scope['path'])
+        return float(ttl)
+
+    def _key(self, request: HttpRequest) -> VariantKey:
+        return request.scope['path'], request.scope.get('query_string', b'')
+
+    def lookup(self, request: HttpRequest) -> CachedResponse | None:
+        """Find the cached response for a request.
+
+        Args:
+            request (HttpRequest): The request.
+
+        Returns:
+            CachedResponse | None: The cached response if present, which may
+                be stale.
+        """
+        variant_key = self._key(request)
+        vary = self._variants.get(variant_key)
+        if vary is None:
+            return None
+        return self._entries.get(
+            (*variant_key, _vary_values(request, vary))
+        )
+
+    def store(
+            self,
+            request: HttpRequest,
+            status: int,
+            headers: list[tuple[bytes, bytes]],
+            content: bytes,
+            ttl: float,
+            tags: tuple[bytes, ...] = (),
+            age: float = 0.0
+    ) -> CachedResponse | None:
+        """Store a response in memory.
+
+        Args:
+            request (HttpRequest): The request.
+            status (int): The response status.
+            headers (list[tuple[bytes, bytes]]): The response headers.
+            content (bytes): The response body.
+            ttl (float): The lifetime of the response in seconds.
+            tags (tuple[bytes, ...], optional): The tags of the response.
+                Defaults to ().
+            age (float, optional): The number of seconds since the response
+                was created. Defaults to 0.
+
+        Returns:
+            CachedResponse | None: The cached response, or None if it could
+                not be stored.
+        """
+        directives = _cache_directives(headers)
+        if directives is None:
+            return None
+        value = directives.get(b'stale-while-revalidate')
+        stale_while_revalidate = (
+            self.stale_while_revalidate if value is None else float(value)
+        )
+        value = directives.get(b'stale-if-error')
+        stale_if_error = self.stale_if_error if value is None else float(value)
+        vary = tuple(name.lower() for name in header.vary(headers) or [])
+        if b'*' in vary:
+            return None
+        variant_key = self._key(request)
+        self._variants.put(variant_key, vary)
+        headers = [
+            (name, value)
+            for name, value in headers
+            if name not in (b'content-length', b'age')
+        ]
+        headers.append((b'content-length', str(len(content)).encode('ascii')))
+        entry = CachedResponse(
+            status,
+            headers,
+            content,
+            self.clock() - age,
+            ttl,
+            tags,
+            stale_while_revalidate,
+            stale_if_error
+        )
+        key = (*variant_key, _vary_values(request, vary))
+        keep = ttl - age + max(stale_while_revalidate, stale_if_error)
+        if not self._entries.put(key, entry, keep):
+            return None
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        return entry
+
+    def _disk_key(
+            self,
+            request: HttpRequest,
+            vary: tuple[bytes, ...] | None
+    ) -> str:
+        path, query_string = self._key(request)
+        key: list = [path, query_string.decode('latin-1')]
+        if vary is not None:
+            key.append([
+                None if value is None else value.decode('latin-1')
+                for value in _vary_values(request, vary)
+            ])
+        return json.dumps(key)
+
+    async def _disk_lookup(
+            self,
+            request: HttpRequest,
+            include_body: bool
+    ) -> HttpResponse | None:
+        assert self.disk_cache is not None
+        variant = await asyncio.to_thread(
+            self.disk_cache.get,
+            self._disk_key(request, None)
+        )
+        if variant is None:
+            return None
+        vary = tuple(name.encode('latin-1') for name in variant.metadata['vary'])
+        entry = await asyncio.to_thread(
+            self.disk_cache.get,
+            self._disk_key(request, vary)
+        )
+        if entry is None:
+            return None
+
+        status: int = entry.metadata['status']
+        # The content length is known from the entry, as the content is
+        # written as it is sent.
+        headers = [
+            (name.encode('latin-1'), value.encode('latin-1'))
+            for name, value in entry.metadata['headers']
+            if name != 'content-length'
+        ] + [(b'content-length', str(entry.length).encode('ascii'))]
+        now = self.disk_cache.clock()
+        age = now - entry.metadata['created']
+        body: AsyncIterable[bytes] | None = None
+        if entry.length <= self.max_entry_size:
+            try:
+                content = await asyncio.to_thread(entry.read)
+            finally:
+                entry.close()
+            # Promote the entry to memory.
+            cached = self.store(
+                request,
+                status,
+                headers,
+                content,
+                entry.expires - now + age,
+                tuple(
+                    tag.encode('latin-1')
+                    for tag in entry.metadata.get('tags', [])
+                ),
+                age
+            )
+            if cached is not None:
+                return cached.to_response(self.clock(), include_body)
+            if include_body and content:
+                body = BytesBody(content)
+        elif include_body:
+            body = entry.iter_content()
+        else:
+            entry.close()
+
+        headers.append((b'age', str(int(age)).encode('ascii')))
+        return HttpResponse(status, headers, body)
+
+    def _open_disk_entry(
+            self,
+            request: HttpRequest,
+            status: int,
+            headers: list[tuple[bytes, bytes]],
+            ttl: float,
+            tags: tuple[bytes, ...]
+    ) -> DiskCacheWriter | None:
+        assert self.disk_cache is not None
+        vary = tuple(name.lower() for name in header.vary(headers) or [])
+        if b'*' in vary:
+            return None
+        self.disk_cache.put(
+            self._disk_key(request, None),
+            {'vary': [name.decode('latin-1') for name in vary]},
+            b'',
+            ttl
+        )
+        disk_tags = [tag.decode('latin-1') for tag in tags]
+        metadata = {
+            'status': status,
+            'headers': [
+                (name.decode('latin-1'), value.decode('latin-1'))
+                for name, value in headers
+                if name not in (b'content-length', b'age')
+            ],
+            'created': self.disk_cache.clock(),
+            'tags': disk_tags
+        }
+        return self.disk_cache.open(
+            self._disk_key(request, vary),
+            metadata,
+            ttl,
+            disk_tags
+        )
+
+    def _disk_store(
+            self,
+            request: HttpRequest,
+            status: int,
+            headers: list[tuple[bytes, bytes]],
+            content: bytes,
+            ttl: float,
+            tags: tuple[bytes, ...]
+    ) -> None:
+        writer = self._open_disk_entry(request, status, headers, ttl, tags)
+        if writer is None:
+            return
+        try:
+            if writer.write(content):
+                writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+
+    async def _tee_to_disk(
+            self,
+            request: HttpRequest,
+            status: int,
+            headers: list[tuple[bytes, bytes]],
+            body: AsyncIterable[bytes],
+            ttl: float,
+            tags: tuple[bytes, ...]
+    ) -> AsyncIterator[bytes]:
+        # Write the body to the disk as it is sent. The entry is only added if
+        # the whole body is sent.
+        writer = await asyncio.to_thread(
+            self._open_disk_entry,
+            request,
+            status,
+            headers,
+            ttl,
+            tags
+        )
+        try:
+            async for chunk in body:
+                yield chunk
+                if (
+                        writer is not None and
+                        not await asyncio.to_thread(writer.write, chunk)
+                ):
+                    LOGGER.debug(
+                        'Response for "%s" is too large to cache.',
+                        request.scope['path']
+                    )
+                    writer = None
+            if writer is not None:
+                await asyncio.to_thread(writer.commit)
+                writer = None
+        finally:
+            if writer is not None:
+                await asyncio.to_thread(writer.abort)
+
+    async def __call__(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        """Answer the request from the cache, or call the handler and cache
+        the response.
+
+        Args:
+            request (HttpRequest): The request.
+            handler (HttpRequestCallback): The handler.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        method = request.scope['method']
+        # A malformed cache-control header from the client is ignored.
+        directives = _cache_directives(
+            request.header_items(b'cache-control')
+        ) or {}
+        if (
+                method not in ('GET', 'HEAD') or
+                b'authorization' in request.headers or
+                b'no-store' in directives
+        ):
+            response = await handler(request)
+            pop_surrogate_keys(response)
+            return response
+
+        include_body = method == 'GET'
+        stale: CachedResponse | None = None
+        if b'no-cache' not in directives:
+            entry = self.lookup(request)
+            if entry is not None:
+                now = self.clock()
+                staleness = now - entry.created - entry.ttl
+                if staleness < 0:
+                    self.hits += 1
+                    return entry.to_response(now, include_body)
+                if staleness < entry.stale_if_error:
+                    stale = entry
+                if (
+                        staleness < entry.stale_while_revalidate and
+                        self._tasks is not None
+                ):
+                    self.stale += 1
+                    self._refresh(request, handler, entry)
+                    return entry.to_response(now, include_body)
+                if (
+                        stale is not None and
+                        self.max_in_flight is not None and
+                        self._in_flight >= self.max_in_flight
+                ):
+                    self.stale += 1
+                    return stale.to_response(now, include_body)
+            elif self.disk_cache is not None:
+                disk_response = await self._disk_lookup(request, include_body)
+                if disk_response is not None:
+                    self.hits += 1
+                    return disk_response
+
+        self.misses += 1
+        self._in_flight += 1
+        try:
+            response = await self._fetch(request, handler)
+        except Exception:  # pylint: disable=broad-except
+            if stale is None:
+                raise
+            LOGGER.warning(
+                'Sending a stale response for "%s" as the handler failed.',
+                request.scope['path'],
+                exc_info=True
+            )
+            self.stale += 1
+            return stale.to_response(self.clock(), include_body)
+        finally:
+            self._in_flight -= 1
+
+        if stale is not None and response.status >= 500:
+            self.stale += 1
+            return stale.to_response(self.clock(), include_body)
+
+        return response
+
+    def _refresh(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback,
+            entry: CachedResponse
+    ) -> None:
+        if entry in self._refreshing or self._tasks is None:
+            return
+        self._refreshing.add(entry)
+        refresh_request = HttpRequest(
+            request.scope,
+            request.info,
+            {},
+            request.matches,
+            NullIter(),
+            codecs=request.codecs
+        )
+        task = asyncio.create_task(
+            self._refresh_in_background(refresh_request, handler, entry)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh_in_background(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback,
+            entry: CachedResponse
+    ) -> None:
+        try:
+            await self._fetch(request, handler)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception(
+                'Failed to refresh the response for "%s".',
+                request.scope['path']
+            )
+        finally:
+            self._refreshing.discard(entry)
+
+    async def _fetch(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        response = await handler(request)
+        tags = pop_surrogate_keys(response)
+        if request.scope['method'] != 'GET':
+            return response
+
+        ttl = self.response_ttl(request, response)
+        if ttl is None or ttl <= 0:
+            return response
+
+        is_disk_writable = (
+            self.disk_cache is not None and not self.disk_cache.read_only
+        )
+        headers = response.headers or []
+
+        # Only bodies small enough to be held in memory are buffered.
+        content = b''
+        if response.body is not None:
+            buffered, response.body = await buffer_body(
+                response.body,
+                self.max_entry_size
+            )
+            if buffered is None:
+                if is_disk_writable:
+                    response.body = self._tee_to_disk(
+                        request,
+                        response.status,
+                        headers,
+                        response.body,
+                        ttl,
+                        tags
+                    )
+                else:
+                    LOGGER.debug(
+                        'Response for "%s" is too large to cache.',
+                        request.scope['path']
+                    )
+                return response
+            content = buffered
+
+        self.store(request, response.status, headers, content, ttl, tags)
+        if is_disk_writable:
+            store = asyncio.to_thread(
+                self._disk_store,
+                request,
+                response.status,
+                headers,
+                content,
+                ttl,
+                tags
+            )
+            if self._tasks is None:
+                await store
+            else:
+                # Write to the disk after the response is sent.
+                task = asyncio.create_task(store)
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        return response
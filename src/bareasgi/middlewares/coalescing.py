@@ -0,0 +1,214 @@
+"""Middleware for coalescing identical concurrent requests"""
+
+import asyncio
+import logging
+from typing import AsyncIterable, Final, Iterable
+import weakref
+
+from ..http import (
+    BytesBody,
+    HttpRequestCallback,
+    HttpRequest,
+    HttpResponse,
+    buffer_body
+)
+from ..limits import MemoryBudget
+
+LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
+
+RequestKey = tuple[str, str, bytes, tuple[bytes | None, ...]]
+SharedResponse = tuple[
+    int,
+    list[tuple[bytes, bytes]],
+    AsyncIterable[bytes] | None
+]
+
+
+class _ReservedBody(BytesBody):
+    """A shared body whose memory is released from the budget when no
+    response holds it, whether or not it was sent.
+    """
+
+    __slots__ = ('__weakref__',)
+
+    def __init__(self, content: bytes, memory_budget: MemoryBudget) -> None:
+        super().__init__(content)
+        weakref.finalize(self, memory_budget.release, len(content))
+
+
+class CoalescingMiddleware:
+    """Single flight request coalescing middleware.
+
+    When identical requests arrive while the first is still being handled,
+    the handler is called once, and the response is shared with every waiting
+    request. Requests are identical when they have the same method, path, query
+    string, and values for the configured headers. The response body is
+    buffered so each waiter can send it.
+
+    ```python
+    app = Application(middlewares=[CoalescingMiddleware()])
+    ```
+
+    By default the `authorization` and `cookie` headers are part of the key,
+    so responses are never shared between users, and responses which set
+    cookies are never shared. If the handler raises an exception the waiters
+    receive the same exception. If the body is larger
+    than `max_size`, or there is no room for it in the memory budget, or the
+    first request is cancelled, the waiters call the handler themselves.
+    """
+
+    def __init__(
+            self,
+            *,
+            headers: Iterable[bytes] = (b'authorization', b'cookie'),
+            methods: Iterable[str] = ('GET', 'HEAD'),
+            max_size: int = 1024 * 1024,
+            memory_budget: MemoryBudget | None = None
+    ) -> None:
+        """Constructs the request coalescing middleware.
+
+        Args:
+            headers (Iterable[bytes], optional): The names of the request
+                headers which are part of the key. Defaults to
+                (b'authorization', b'cookie').
+            methods (Iterable[str], optional): The methods of the requests to
+                coalesce. Defaults to ('GET', 'HEAD').
+            max_size (int, optional): The size of the largest body which can be
+                shared. Defaults to 1MB.
+            memory_budget (MemoryBudget | None, optional): A budget from which
+                the memory used by the shared bodies is reserved until no
+                response holds them. Defaults to None.
+        """
+        self.headers = tuple(name.lower() for name in headers)
+        self.methods = frozenset(methods)
+        self.max_size = max_size
+        self.memory_budget = memory_budget
+        self.coalesced = 0
+        self._in_flight: dict[
+            RequestKey,
+            asyncio.Future[SharedResponse | None]
+        ] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """The number of distinct requests being handled.
+
+        Returns:
+            int: The number of requests.
+        """
+        return len(self._in_flight)
+
+    def _key(self, request: HttpRequest) -> RequestKey:
+        headers = request.headers
+        return (
+            request.scope['method'],
+            request.scope['path'],
+            request.scope.get('query_string', b''),
+            tuple(
+                b', '.join(headers[name]) if name in headers else None
+                for name in self.headers
+            )
+        )
+
+    async def _buffer(
+            self,
+            response: HttpResponse
+    ) -> tuple[bytes | None, int]:
+        if response.body is None:
+            return b'', 0
+        if self.memory_budget is None:
+            content, response.body = await buffer_body(
+                response.body,
+                self.max_size
+            )
+            return content, 0
+
+        if not self.memory_budget.try_reserve(self.max_size):
+            return None, 0
+        try:
+            content, response.body = await buffer_body(
+                response.body,
+                self.max_size
+            )
+        finally:
+            self.memory_budget.release(self.max_size)
+        if content is None:
+            return None, 0
+        self.memory_budget.reserve(len(content))
+        return content, len(content)
+
+    async def _share(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback,
+            future: asyncio.Future[SharedResponse | None]
+    ) -> HttpResponse:
+        try:
+            response = await handler(request)
+            if response.pushes or any(
+                    name.lower() == b'set-cookie'
+                    for name, _value in response.headers or []
+            ):
+                content, reserved = None, 0
+            else:
+                content, reserved = await self._buffer(response)
+        except asyncio.CancelledError:
+            future.set_result(None)
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            # Mark the exception as retrieved, in case there are no waiters.
+            future.exception()
+            raise
+
+        if content is None:
+            future.set_result(None)
+            return response
+
+        # The same body is given to every response. Its reservation is
+        # released when the last of them is dropped.
+        if not content:
+            response.body = None
+        elif reserved and self.memory_budget is not None:
+            response.body = _ReservedBody(content, self.memory_budget)
+        else:
+            response.body = BytesBody(content)
+        future.set_result(
+            (response.status, list(response.headers or []), response.body)
+        )
+        return response
+
+    async def __call__(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        """Call the handler, or wait for an identical request being handled.
+
+        Args:
+            request (HttpRequest): The request.
+            handler (HttpRequestCallback): The handler.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        if request.scope['method'] not in self.methods:
+            return await handler(request)
+
+        key = self._key(request)
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            try:
+                return await self._share(request, handler, future)
+            finally:
+                del self._in_flight[key]
+
+        self.coalesced += 1
+        shared = await asyncio.shield(future)
+        if shared is None:
+            LOGGER.debug('Unable to share the response for "%s".', key[1])
+            return await handler(request)
+        status, headers, body = shared
+        return HttpResponse(status, list(headers), body)
@@ -172,22 +172,17 @@ class CompressionMiddleware:
         Returns:
             HttpResponse: The response.
         """
-        content_encoding = header.content_encoding(request.scope['headers'])
+        content_encoding = header.content_encoding(
+            request.header_items(b'content-encoding')
+        )
         if content_encoding:
             for encoding in content_encoding:
                 if encoding in self.decompressors:
                     decompressor = self.decompressors[encoding]
-                    decompressed_body = compression_reader_adapter(
+                    request.body = compression_reader_adapter(
                         request.body,
                         decompressor()
                     )
-                    request = HttpRequest(
-                        request.scope,
-                        request.info,
-                        request.context,
-                        request.matches,
-                        decompressed_body
-                    )
                     break
             else:
                 # Unsupported media type
@@ -195,14 +190,20 @@ class CompressionMiddleware:
 
         response = await handler(request)
 
-        if response.status < 200 or response.status >= 300:
+        if (
+                response.status < 200 or
+                response.status >= 300 or
+                response.status == 206
+        ):
+            # Partial content must not be compressed as the content range
+            # refers to the unencoded representation.
             return response
 
         if response.headers is None:
             response.headers = []
 
         accept_encoding = header.accept_encoding(
-            request.scope['headers'],
+            request.header_items(b'accept-encoding'),
             add_identity=True
         ) or {b'identity': 1}
         content_encoding = (
@@ -225,6 +226,13 @@ class CompressionMiddleware:
         response.headers = [(k, v) for k, v in response.headers if k not in (
             b'content-length', b'content-encoding', b'vary')]
 
+        # A strong entity tag identifies the unencoded content, so the encoded
+        # content can only have a weak one.
+        response.headers = [
+            (k, b'W/' + v if k == b'etag' and not v.startswith(b'W/') else v)
+            for k, v in response.headers
+        ]
+
         # Add the content-encoding. We don't know the length, so the content
         # length is omitted and chunking is used.
         response.headers.append((b'content-encoding', encoding))
@@ -0,0 +1,252 @@
+"""Middleware for conditional requests"""
+
+import hashlib
+from typing import Awaitable, Callable
+
+from ..http import (
+    FileBody,
+    HttpRequestCallback,
+    HttpRequest,
+    HttpResponse,
+    buffer_body
+)
+
+VersionKey = Callable[[HttpRequest], Awaitable[bytes | str | int | None]]
+
+# The headers a 304 response should carry (RFC 9110 section 15.4.5).
+NOT_MODIFIED_HEADERS = frozenset((
+    b'cache-control',
+    b'content-location',
+    b'date',
+    b'etag',
+    b'expires',
+    b'vary',
+))
+
+
+def is_etag_match(etag: bytes, if_none_match: bytes) -> bool:
+    """Check an entity tag against the value of an `if-none-match` header
+    using the weak comparison.
+
+    Args:
+        etag (bytes): The entity tag.
+        if_none_match (bytes): The header value.
+
+    Returns:
+        bool: True if the entity tag matches.
+    """
+    if if_none_match.strip() == b'*':
+        return True
+    etag = etag.removeprefix(b'W/')
+    return any(
+        candidate.strip().removeprefix(b'W/') == etag
+        for candidate in if_none_match.split(b',')
+    )
+
+
+def not_modified(response_headers: list[tuple[bytes, bytes]]) -> HttpResponse:
+    """Make a 304 response from the headers of the full response.
+
+    Args:
+        response_headers (list[tuple[bytes, bytes]]): The headers of the full
+            response.
+
+    Returns:
+        HttpResponse: The 304 response.
+    """
+    return HttpResponse(
+        304,
+        [
+            (name, value)
+            for name, value in response_headers
+            if name in NOT_MODIFIED_HEADERS
+        ]
+    )
+
+
+def _find_etag(headers: list[tuple[bytes, bytes]]) -> bytes | None:
+    return next((value for name, value in headers if name == b'etag'), None)
+
+
+class ConditionalMiddleware:
+    """Conditional request middleware.
+
+    Successful responses to `GET` and `HEAD` requests which have no `etag`
+    header are given a strong entity tag by hashing the body as it is
+    buffered. When the request has a matching `if-none-match` header a 304
+    response is returned in place of the body.
+
+    Bodies larger than `max_size`, and file bodies, are sent unchanged
+    without an entity tag.
+
+    ```python
+    app = Application(
+        middlewares=[
+            make_default_compression_middleware(),
+            ConditionalMiddleware()
+        ]
+    )
+    ```
+
+    The middleware should come after the compression middleware, so the
+    entity tag is computed for the unencoded content.
+    """
+
+    def __init__(self, max_size: int = 1024 * 1024) -> None:
+        """Constructs the conditional request middleware.
+
+        Args:
+            max_size (int, optional): The size of the largest body to buffer
+                and hash. Defaults to 1MB.
+        """
+        self.max_size = max_size
+
+    async def __call__(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        """Call the handler, and replace the response with a 304 response if
+        the client already has it.
+
+        Args:
+            request (HttpRequest): The request.
+            handler (HttpRequestCallback): The handler.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        response = await handler(request)
+
+        if (
+                response.status != 200 or
+                request.scope['method'] not in ('GET', 'HEAD')
+        ):
+            return response
+
+        if response.headers is None:
+            response.headers = []
+        if_none_match = request.header(b'if-none-match')
+
+        etag = _find_etag(response.headers)
+        if etag is None:
+            if response.body is None or isinstance(response.body, FileBody):
+                return response
+
+            digest = hashlib.blake2b(digest_size=16)
+            content, response.body = await buffer_body(
+                response.body,
+                self.max_size,
+                digest.update
+            )
+            if content is None:
+                return response
+
+            etag = b'"' + digest.hexdigest().encode('ascii') + b'"'
+            response.headers = [
+                (name, value)
+                for name, value in response.headers
+                if name != b'content-length'
+            ]
+            response.headers.append((b'etag', etag))
+            response.headers.append(
+                (b'content-length', str(len(content)).encode('ascii'))
+            )
+
+        if if_none_match is not None and is_etag_match(etag, if_none_match):
+            return not_modified(response.headers)
+
+        return response
+
+
+class VersionKeyMiddleware:
+    """Answer conditional requests from a cheap version key, before the
+    handler builds the response.
+
+    The version key function returns a value, such as a database row version,
+    which changes whenever the content changes. The entity tag is derived from
+    the key, so a client with a current copy receives a 304 response without
+    the handler being called. The middleware is added to a route as local
+    middleware.
+
+    ```python
+    async def get_version(request: HttpRequest) -> int | None:
+        return await db.fetch_version(request.matches['id'])
+
+    app.http_router.add(
+        {'GET'},
+        '/items/{id:int}',
+        make_middleware_chain(VersionKeyMiddleware(get_version), handler=get_item)
+    )
+    ```
+
+    When the version key function returns None the handler is always called.
+    """
+
+    def __init__(
+            self,
+            version_key: VersionKey,
+            headers: list[tuple[bytes, bytes]] | None = None
+    ) -> None:
+        """Answer conditional requests from a cheap version key.
+
+        Args:
+            version_key (VersionKey): An async function which returns the
+                version of the requested content, or None if unknown.
+            headers (list[tuple[bytes, bytes]] | None, optional): Headers to
+                send with a 304 response, such as `cache-control`. Defaults to
+                None.
+        """
+        self.version_key = version_key
+        self.headers = headers or []
+
+    def make_etag(self, version: bytes | str | int) -> bytes:
+        """Make an entity tag from a version key.
+
+        Args:
+            version (bytes | str | int): The version key.
+
+        Returns:
+            bytes: The entity tag.
+        """
+        if not isinstance(version, bytes):
+            version = str(version).encode('utf-8')
+        digest = hashlib.blake2b(version, digest_size=16)
+        return b'"v' + digest.hexdigest().encode('ascii') + b'"'
+
+    async def __call__(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        """Return a 304 response if the client has the current version,
+        otherwise call the handler and tag the response with the version.
+
+        Args:
+            request (HttpRequest): The request.
+            handler (HttpRequestCallback): The handler.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        if request.scope['method'] not in ('GET', 'HEAD'):
+            return await handler(request)
+
+        version = await self.version_key(request)
+        if version is None:
+            return await handler(request)
+
+        etag = self.make_etag(version)
+        if_none_match = request.header(b'if-none-match')
+        if if_none_match is not None and is_etag_match(etag, if_none_match):
+            return not_modified(self.headers + [(b'etag', etag)])
+
+        response = await handler(request)
+        if response.status == 200:
+            response.headers = [
+                (name, value)
+                for name, value in response.headers or []
+                if name != b'etag'
+            ]
+            response.headers.append((b'etag', etag))
+        return response
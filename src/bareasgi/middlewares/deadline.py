@@ -0,0 +1,69 @@
+"""Middleware for per-route deadlines"""
+
+from ..http import (
+    DEFAULT_TIMEOUT_RESPONSE,
+    HttpRequestCallback,
+    HttpRequest,
+    HttpResponse,
+    call_with_deadline
+)
+
+
+class DeadlineMiddleware:
+    """Deadline middleware.
+
+    The handler is cancelled if it has not responded within `timeout` seconds,
+    and the timeout response is sent instead. The deadline is the earlier of
+    this and any application deadline, and is available to the handler as
+    `request.deadline`.
+
+    This is typically used as local middleware, to give a route a different
+    deadline to the application.
+
+    ```python
+    app = Application(request_timeout=10)
+
+    app.http_router.add(
+        {'GET'},
+        '/report',
+        make_middleware_chain(DeadlineMiddleware(2), handler=report)
+    )
+    ```
+    """
+
+    def __init__(
+            self,
+            timeout: float,
+            timeout_response: HttpResponse = DEFAULT_TIMEOUT_RESPONSE
+    ) -> None:
+        """Constructs the deadline middleware.
+
+        Args:
+            timeout (float): The number of seconds within which the handler
+                must respond.
+            timeout_response (HttpResponse, optional): The response sent when
+                the deadline is exceeded. Defaults to DEFAULT_TIMEOUT_RESPONSE.
+        """
+        self.timeout = timeout
+        self.timeout_response = timeout_response
+
+    async def __call__(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        """Call the handler, cancelling it if the deadline is exceeded.
+
+        Args:
+            request (HttpRequest): The request.
+            handler (HttpRequestCallback): The handler.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        return await call_with_deadline(
+            handler,
+            request,
+            self.timeout,
+            self.timeout_response
+        )
@@ -0,0 +1,609 @@
+"""A disk backed second tier for the response cache"""
+
+import asyncio
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import IO, Any, AsyncIterator, Callable, Final, Iterable
+
+LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
+
+MAGIC: Final[bytes] = b'BRC1'
+PREFIX: Final[struct.Struct] = struct.Struct('>4sI')
+INDEX_FILE: Final[str] = 'index.json'
+ENTRY_SUFFIX: Final[str] = '.entry'
+
+# The size, expiry time and tags of an entry.
+IndexEntry = tuple[int, float, tuple[str, ...]]
+
+
+class DiskCacheEntry:
+    """An entry read from the disk cache.
+
+    The content is memory-mapped, so only the pages which are sent are read
+    from the disk, and they are shared with other processes reading the same
+    entry. The map is closed once the content has been iterated over, or by
+    `close`.
+    """
+
+    __slots__ = ('metadata', 'expires', '_map', '_offset', 'length')
+
+    def __init__(
+            self,
+            metadata: dict[str, Any],
+            expires: float,
+            map_: mmap.mmap | None,
+            offset: int,
+            length: int
+    ) -> None:
+        self.metadata = metadata
+        self.expires = expires
+        self._map = map_
+        self._offset = offset
+        self.length = length
+
+    def read(self) -> bytes:
+        """Read the content into memory.
+
+        Returns:
+            bytes: The content.
+        """
+        return self._read(self._offset, self._offset + self.length)
+
+    def _read(self, start: int, end: int) -> bytes:
+        if self._map is None:
+            return b''
+        return self._map[start:end]
+
+    def close(self) -> None:
+        """Close the map of the content."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    async def iter_content(
+            self,
+            chunk_size: int = 65536
+    ) -> AsyncIterator[bytes]:
+        """Iterate over the content in chunks, closing the map when done.
+
+        The pages are read in a thread, so a slow disk does not block the
+        event loop.
+
+        Args:
+            chunk_size (int, optional): The size of the chunks. Defaults to
+                65536.
+
+        Yields:
+            bytes: The chunks of the content.
+        """
+        try:
+            end = self._offset + self.length
+            for start in range(self._offset, end, chunk_size):
+                yield await asyncio.to_thread(
+                    self._read,
+                    start,
+                    min(start + chunk_size, end)
+                )
+        finally:
+            self.close()
+
+
+class DiskCacheWriter:
+    """An entry being written to the disk cache.
+
+    The content is written to a temporary file as it arrives, and the entry
+    is added to the cache by `commit`. If the content grows larger than the
+    largest entry the cache will store the entry is abandoned.
+
+    The methods do blocking file operations, so should be run in a thread.
+    """
+
+    __slots__ = (
+        '_cache',
+        '_name',
+        '_expires',
+        '_tags',
+        '_file',
+        '_path',
+        '_size',
+        '_length'
+    )
+
+    def __init__(
+            self,
+            cache: 'DiskCache',
+            name: str,
+            expires: float,
+            tags: tuple[str, ...],
+            file: IO[bytes],
+            path: str,
+            size: int
+    ) -> None:
+        self._cache = cache
+        self._name = name
+        self._expires = expires
+        self._tags = tags
+        self._file: IO[bytes] | None = file
+        self._path = path
+        self._size = size
+        self._length = 0
+
+    def write(self, content: bytes) -> bool:
+        """Write content to the entry.
+
+        Args:
+            content (bytes): The content.
+
+        Returns:
+            bool: True if the content was written, or False if the entry has
+                been abandoned.
+        """
+        if self._file is None:
+            return False
+        self._size += len(content)
+        self._length += len(content)
+        if (
+                self._length > self._cache.max_entry_size or
+                self._size > self._cache.max_size
+        ):
+            self.abort()
+            return False
+        self._file.write(content)
+        return True
+
+    def commit(self) -> bool:
+        """Add the entry to the cache.
+
+        Returns:
+            bool: True if the entry was added.
+        """
+        if self._file is None:
+            return False
+        file, self._file = self._file, None
+        file.close()
+        self._cache._commit(  # pylint: disable=protected-access
+            self._path,
+            self._name,
+            (self._size, self._expires, self._tags)
+        )
+        return True
+
+    def abort(self) -> None:
+        """Abandon the entry."""
+        if self._file is None:
+            return
+        file, self._file = self._file, None
+        file.close()
+        os.unlink(self._path)
+
+
+class DiskCache:
+    """A size bounded cache of responses stored as files in a directory.
+
+    Each entry is a file holding a small JSON header followed by the content,
+    named by a hash of its key, and is written to a temporary file which is
+    then renamed so readers never see a partial entry. Entries are read with
+    `mmap`. An index of the entry sizes in least recently used order is kept
+    by the writing process in `index.json`, so the cache survives restarts and
+    the least recently used entries are removed when it grows beyond
+    `max_size`. The index also maps tags to entries, so the entries with a tag
+    can be purged without reading the others.
+
+    Many processes on the same host may share the directory. One process
+    opens it for writing, and the others with `read_only=True`, in which case
+    they look entries up but never write or remove files.
+
+    ```python
+    disk_cache = DiskCache('/var/cache/reports', max_size=20 * 1024 ** 3)
+    cache = ResponseCacheMiddleware(default_ttl=3600, disk_cache=disk_cache)
+    ```
+    """
+
+    def __init__(
+            self,
+            directory: str | os.PathLike,
+            *,
+            max_size: int = 1024 ** 3,
+            max_entry_size: int = 64 * 1024 * 1024,
+            read_only: bool = False,
+            flush_interval: float = 10.0,
+            clock: Callable[[], float] = time.time
+    ) -> None:
+        """A size bounded cache of responses stored as files in a directory.
+
+        Args:
+            directory (str | os.PathLike): The directory holding the entries.
+            max_size (int, optional): The maximum total size of the entries in
+                bytes. Defaults to 1GB.
+            max_entry_size (int, optional): The size of the largest content to
+                store. Defaults to 64MB.
+            read_only (bool, optional): If True entries are only read.
+                Defaults to False.
+            flush_interval (float, optional): The minimum number of seconds
+                between writes of the index. Defaults to 10.
+            clock (Callable[[], float], optional): The clock used to expire
+                entries. As entries are shared between processes and restarts
+                this must be a wall clock. Defaults to `time.time`.
+        """
+        self.directory = os.path.abspath(directory)
+        self.max_size = max_size
+        self.max_entry_size = max_entry_size
+        self.read_only = read_only
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index: OrderedDict[str, IndexEntry] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self._size = 0
+        self._is_dirty = False
+        self._flushed = 0.0
+        if not read_only:
+            os.makedirs(self.directory, exist_ok=True)
+            self._load_index()
+
+    @property
+    def size(self) -> int:
+        """The total size of the entries in bytes, as known to the writing
+        process.
+
+        Returns:
+            int: The size.
+        """
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @classmethod
+    def _name(cls, key: str) -> str:
+        return hashlib.sha256(key.encode('utf-8')).hexdigest() + ENTRY_SUFFIX
+
+    def _read_header(
+            self,
+            map_: mmap.mmap
+    ) -> tuple[dict[str, Any], int]:
+        magic, length = PREFIX.unpack_from(map_, 0)
+        if magic != MAGIC:
+            raise ValueError('Invalid cache entry')
+        start = PREFIX.size
+        return json.loads(map_[start:start + length]), start + length
+
+    def _load_index(self) -> None:
+        try:
+            with open(self._path(INDEX_FILE), 'rb') as file:
+                indexed: dict[str, IndexEntry] = {
+                    name: (size, expires, tuple(tags))
+                    for name, size, expires, tags in json.load(file)['entries']
+                }
+        except (OSError, ValueError, KeyError, TypeError):
+            LOGGER.info('Rebuilding disk cache index for "%s".', self.directory)
+            indexed = {}
+
+        # Entries written since the index was last flushed are the most
+        # recently used.
+        present: set[str] = set()
+        unindexed: list[tuple[float, str, IndexEntry]] = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith('.tmp'):
+                os.unlink(entry.path)
+            elif entry.name in indexed:
+                present.add(entry.name)
+            elif entry.name.endswith(ENTRY_SUFFIX):
+                try:
+                    with open(entry.path, 'rb') as file:
+                        magic, length = PREFIX.unpack(file.read(PREFIX.size))
+                        if magic != MAGIC:
+                            raise ValueError('Invalid cache entry')
+                        header = json.loads(file.read(length))
+                    status = entry.stat()
+                    unindexed.append((
+                        status.st_mtime,
+                        entry.name,
+                        (
+                            status.st_size,
+                            header['expires'],
+                            tuple(header.get('tags', ()))
+                        )
+                    ))
+                except (OSError, ValueError, KeyError, struct.error):
+                    os.unlink(entry.path)
+
+        for name, value in indexed.items():
+            if name in present:
+                self._add(name, value)
+        for _mtime, name, value in sorted(unindexed):
+            self._add(name, value)
+        self._is_dirty = True
+        LOGGER.debug('Loaded disk cache of %d entries.', len(self._index))
+
+    def flush(self) -> None:
+        """Write the index, if it has changed."""
+        if self.read_only or not self._is_dirty:
+            return
+        with self._lock:
+            entries = [
+                (name, size, expires, tags)
+                for name, (size, expires, tags) in self._index.items()
+            ]
+            self._is_dirty = False
+            self._flushed = self.clock()
+        self._write_atomically(
+            INDEX_FILE,
+            [json.dumps({'entries': entries}).encode('utf-8')]
+        )
+
+    def _write_atomically(self, name: str, parts: list[bytes]) -> None:
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for part in parts:
+                    file.write(part)
+            os.replace(tmp_path, self._path(name))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _add(self, name: str, value: IndexEntry) -> None:
+        self._index[name] = value
+        self._size += value[0]
+        for tag in value[2]:
+            self._tags.setdefault(tag, set()).add(name)
+        self._is_dirty = True
+
+    def _unindex(self, name: str) -> None:
+        size, _expires, tags = self._index.pop(name)
+        self._size -= size
+        for tag in tags:
+            names = self._tags.get(tag)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._tags[tag]
+        self._is_dirty = True
+
+    def _unlink(self, names: Iterable[str]) -> None:
+        # Files are removed outside the lock, so other threads are not held
+        # up by the file system.
+        for name in names:
+            try:
+                os.unlink(self._path(name))
+            except FileNotFoundError:
+                pass
+
+    def get(self, key: str) -> DiskCacheEntry | None:
+        """Get an entry.
+
+        This does blocking file operations, so should be run in a thread.
+
+        Args:
+            key (str): The key.
+
+        Returns:
+            DiskCacheEntry | None: The entry, or None if not present or
+                expired.
+        """
+        name = self._name(key)
+        try:
+            with open(self._path(name), 'rb') as file:
+                map_ = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # An empty file can not be mapped.
+            return None
+
+        try:
+            header, offset = self._read_header(map_)
+            if header['key'] != key:
+                map_.close()
+                return None
+            expires = header['expires']
+        except (ValueError, KeyError, struct.error):
+            LOGGER.warning('Invalid disk cache entry "%s".', name)
+            map_.close()
+            return None
+
+        if expires <= self.clock():
+            map_.close()
+            if not self.read_only:
+                with self._lock:
+                    is_indexed = name in self._index
+                    if is_indexed:
+                        self.evictions += 1
+                        self._unindex(name)
+                if is_indexed:
+                    self._unlink([name])
+            return None
+
+        if not self.read_only:
+            with self._lock:
+                if name in self._index:
+                    self._index.move_to_end(name)
+                    self._is_dirty = True
+
+        length = len(map_) - offset
+        if not length:
+            map_.close()
+        return DiskCacheEntry(
+            header['metadata'],
+            expires,
+            map_ if length else None,
+            offset,
+            length
+        )
+
+    def open(
+            self,
+            key: str,
+            metadata: dict[str, Any],
+            ttl: float,
+            tags: Iterable[str] = ()
+    ) -> DiskCacheWriter | None:
+        """Start writing an entry, so the content can be written as it
+        arrives.
+
+        This does blocking file operations, so should be run in a thread.
+
+        Args:
+            key (str): The key.
+            metadata (dict[str, Any]): Data about the entry which can be
+                serialized as JSON.
+            ttl (float): The number of seconds for which the entry is kept.
+            tags (Iterable[str], optional): Tags by which the entry can be
+                purged. Defaults to ().
+
+        Returns:
+            DiskCacheWriter | None: The writer, or None if the cache is read
+                only.
+        """
+        if self.read_only:
+            return None
+
+        expires = self.clock() + ttl
+        tags = tuple(tags)
+        header = json.dumps({
+            'key': key,
+            'expires': expires,
+            'tags': tags,
+            'metadata': metadata
+        }).encode('utf-8')
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp', dir=self.directory)
+        file = os.fdopen(fd, 'wb')
+        writer = DiskCacheWriter(
+            self,
+            self._name(key),
+            expires,
+            tags,
+            file,
+            tmp_path,
+            PREFIX.size + len(header)
+        )
+        try:
+            file.write(PREFIX.pack(MAGIC, len(header)))
+            file.write(header)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer
+
+    def _commit(self, tmp_path: str, name: str, value: IndexEntry) -> None:
+        try:
+            os.replace(tmp_path, self._path(name))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        evicted: list[str] = []
+        with self._lock:
+            if name in self._index:
+                self._unindex(name)
+            self._add(name, value)
+            while self._size > self.max_size:
+                self.evictions += 1
+                evicted.append(next(iter(self._index)))
+                self._unindex(evicted[-1])
+        self._unlink(evicted)
+
+        if self.clock() - self._flushed >= self.flush_interval:
+            self.flush()
+
+    def put(
+            self,
+            key: str,
+            metadata: dict[str, Any],
+            content: bytes,
+            ttl: float,
+            tags: Iterable[str] = ()
+    ) -> bool:
+        """Add or replace an entry, removing the least recently used entries
+        if the cache is full.
+
+        This does blocking file operations, so should be run in a thread.
+
+        Args:
+            key (str): The key.
+            metadata (dict[str, Any]): Data about the entry which can be
+                serialized as JSON.
+            content (bytes): The content.
+            ttl (float): The number of seconds for which the entry is kept.
+            tags (Iterable[str], optional): Tags by which the entry can be
+                purged. Defaults to ().
+
+        Returns:
+            bool: True if the entry was stored.
+        """
+        if len(content) > self.max_entry_size:
+            return False
+        writer = self.open(key, metadata, ttl, tags)
+        if writer is None:
+            return False
+        try:
+            return writer.write(content) and writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+
+    def remove(self, key: str) -> bool:
+        """Remove an entry.
+
+        This does blocking file operations, so should be run in a thread.
+
+        Args:
+            key (str): The key.
+
+        Returns:
+            bool: True if the entry was present.
+        """
+        if self.read_only:
+            return False
+        name = self._name(key)
+        with self._lock:
+            if name not in self._index:
+                return False
+            self._unindex(name)
+        self._unlink([name])
+        return True
+
+    def purge(self, tag: str) -> int:
+        """Remove the entries with a tag.
+
+        This does blocking file operations, so should be run in a thread.
+
+        Args:
+            tag (str): The tag.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        if self.read_only:
+            return 0
+        with self._lock:
+            names = list(self._tags.get(tag, ()))
+            for name in names:
+                self._unindex(name)
+        self._unlink(names)
+        return len(names)
+
+    def clear(self) -> None:
+        """Remove all the entries.
+
+        This does blocking file operations, so should be run in a thread.
+        """
+        if self.read_only:
+            return
+        with self._lock:
+            names = list(self._index)
+            for name in names:
+                self._unindex(name)
+        self._unlink(names)
+        self.flush()
@@ -0,0 +1,230 @@
+"""Middleware for idempotent retries of unsafe requests"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Final, Iterable
+
+from ..http import (
+    BytesBody,
+    HttpRequestCallback,
+    HttpRequest,
+    HttpResponse,
+    buffer_body
+)
+from ..limits import MemoryBudget
+from ..lru import LRUCache
+
+LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
+
+# The approximate memory used by a stored response in addition to its content.
+ENTRY_OVERHEAD: Final[int] = 256
+
+IdempotencyKey = tuple[bytes, str, str, tuple[bytes | None, ...]]
+# The status, headers and body of a response, or None for the body if it was
+# too large to store.
+StoredResponse = tuple[int, list[tuple[bytes, bytes]], bytes | None]
+
+
+def _weigh(response: StoredResponse) -> int:
+    _status, headers, content = response
+    return ENTRY_OVERHEAD + len(content or b'') + sum(
+        len(name) + len(value)
+        for name, value in headers
+    )
+
+
+class IdempotencyMiddleware:
+    """Idempotency key middleware.
+
+    When a request has an `idempotency-key` header the first response is
+    stored, and a retry with the same key is answered with the stored response
+    instead of calling the handler again. The replayed response has an
+    `idempotent-replayed: true` header. A retry which arrives while the first
+    request is still being handled waits for it.
+
+    ```python
+    app = Application(middlewares=[IdempotencyMiddleware(ttl=24 * 60 * 60)])
+    ```
+
+    Keys are scoped by the method, the path, and by default the
+    `authorization` header, so one client can not replay the response of
+    another. Only responses with a 2xx status are stored. Failures, such as a
+    409 conflict, a 429 rate limit or a 5xx error, and requests where the
+    handler raised an exception are not stored, so they can be retried. When
+    the body of a response is larger than `max_entry_size`, or there is no
+    room for it, only the status and headers are stored and replayed, so the
+    handler is still not called again.
+    """
+
+    def __init__(
+            self,
+            *,
+            methods: Iterable[str] = ('POST', 'PATCH'),
+            headers: Iterable[bytes] = (b'authorization',),
+            ttl: float = 24 * 60 * 60,
+            max_entries: int = 10000,
+            max_size: int = 64 * 1024 * 1024,
+            max_entry_size: int = 64 * 1024,
+            clock: Callable[[], float] = time.monotonic,
+            memory_budget: MemoryBudget | None = None
+    ) -> None:
+        """Constructs the idempotency key middleware.
+
+        Args:
+            methods (Iterable[str], optional): The methods of the requests for
+                which responses are stored. Defaults to ('POST', 'PATCH').
+            headers (Iterable[bytes], optional): The names of the request
+                headers which scope the keys. Defaults to (b'authorization',).
+            ttl (float, optional): The number of seconds for which a response
+                is stored. Defaults to one day.
+            max_entries (int, optional): The maximum number of stored
+                responses. Defaults to 10000.
+            max_size (int, optional): The maximum memory in bytes used by the
+                stored responses. Defaults to 64MB.
+            max_entry_size (int, optional): The size of the largest body to
+                store. Defaults to 64KB.
+            clock (Callable[[], float], optional): The clock used to expire
+                responses. Defaults to `time.monotonic`.
+            memory_budget (MemoryBudget | None, optional): A budget from which
+                the memory used by the stored responses is reserved. Defaults
+                to None.
+        """
+        self.methods = frozenset(methods)
+        self.headers = tuple(name.lower() for name in headers)
+        self.max_entry_size = max_entry_size
+        self.replays = 0
+        self._responses: LRUCache[IdempotencyKey, StoredResponse] = LRUCache(
+            max_entries,
+            ttl=ttl,
+            max_weight=max_size,
+            weigh=_weigh,
+            clock=clock,
+            memory_budget=memory_budget
+        )
+        self._in_flight: dict[
+            IdempotencyKey,
+            asyncio.Future[StoredResponse | None]
+        ] = {}
+
+    def _key(
+            self,
+            request: HttpRequest,
+            idempotency_key: bytes
+    ) -> IdempotencyKey:
+        headers = request.headers
+        return (
+            idempotency_key,
+            request.scope['method'],
+            request.scope['path'],
+            tuple(
+                b', '.join(headers[name]) if name in headers else None
+                for name in self.headers
+            )
+        )
+
+    def _replay(self, stored: StoredResponse) -> HttpResponse:
+        self.replays += 1
+        status, headers, content = stored
+        if content is None:
+            # Only the status and headers were stored.
+            headers = [
+                (name, value)
+                for name, value in headers
+                if name.lower() != b'content-length'
+            ]
+        return HttpResponse(
+            status,
+            headers + [(b'idempotent-replayed', b'true')],
+            BytesBody(content) if content else None
+        )
+
+    def _store(
+            self,
+            key: IdempotencyKey,
+            request: HttpRequest,
+            stored: StoredResponse
+    ) -> StoredResponse:
+        status, headers, content = stored
+        if content is not None and self._responses.put(key, stored):
+            return stored
+        LOGGER.debug(
+            'Storing only the status and headers of the response for "%s".',
+            request.scope['path']
+        )
+        stored = (status, headers, None)
+        if not self._responses.put(key, stored):
+            LOGGER.warning(
+                'Unable to store the response for "%s", so a retry will call '
+                'the handler again.',
+                request.scope['path']
+            )
+        return stored
+
+    async def _handle(
+            self,
+            key: IdempotencyKey,
+            request: HttpRequest,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        future: asyncio.Future[StoredResponse | None] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._in_flight[key] = future
+        stored: StoredResponse | None = None
+        try:
+            response = await handler(request)
+            if 200 <= response.status < 300 and not response.pushes:
+                content: bytes | None = b''
+                if response.body is not None:
+                    content, response.body = await buffer_body(
+                        response.body,
+                        self.max_entry_size
+                    )
+                stored = self._store(
+                    key,
+                    request,
+                    (response.status, list(response.headers or []), content)
+                )
+            return response
+        finally:
+            del self._in_flight[key]
+            future.set_result(stored)
+
+    async def __call__(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        """Replay the stored response for a retried request, or call the
+        handler and store its response.
+
+        Args:
+            request (HttpRequest): The request.
+            handler (HttpRequestCallback): The handler.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        idempotency_key = request.header(b'idempotency-key')
+        if (
+                idempotency_key is None or
+                request.scope['method'] not in self.methods
+        ):
+            return await handler(request)
+
+        key = self._key(request, idempotency_key)
+        while True:
+            stored = self._responses.get(key)
+            if stored is not None:
+                return self._replay(stored)
+
+            future = self._in_flight.get(key)
+            if future is None:
+                return await self._handle(key, request, handler)
+
+            # Wait for the first request. If it failed, the first waiter to
+            # wake calls the handler.
+            stored = await asyncio.shield(future)
+            if stored is not None:
+                return self._replay(stored)
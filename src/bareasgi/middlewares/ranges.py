@@ -0,0 +1,56 @@
+"""Middleware for range requests"""
+
+from ..http import (
+    HttpRequestCallback,
+    HttpRequest,
+    HttpResponse,
+    apply_range
+)
+
+
+class RangeMiddleware:
+    """Range request middleware.
+
+    Responses with a `BytesBody` or `FileBody` body are advertised with
+    `accept-ranges: bytes`, and requests with a `range` header receive the
+    partial content. Other responses are returned unchanged.
+
+    ```python
+    app = Application(middlewares=[RangeMiddleware()])
+
+    @app.http_router.add({'GET'}, '/video')
+    async def video(request: HttpRequest) -> HttpResponse:
+        return HttpResponse.from_file('/var/media/video.mp4')
+    ```
+
+    When used with the compression middleware this middleware should come
+    after it in the list of middlewares, so that ranges are applied to the
+    unencoded content.
+    """
+
+    def __init__(self, max_ranges: int = 16) -> None:
+        """Constructs the range middleware.
+
+        Args:
+            max_ranges (int, optional): The maximum number of ranges in a
+                request. Requests with more ranges receive the full response.
+                Defaults to 16.
+        """
+        self.max_ranges = max_ranges
+
+    async def __call__(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        """Call the handler and apply any requested range to the response.
+
+        Args:
+            request (HttpRequest): The request.
+            handler (HttpRequestCallback): The handler.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        response = await handler(request)
+        return apply_range(request, response, max_ranges=self.max_ranges)
@@ -0,0 +1,167 @@
+"""Middleware for rate limiting"""
+
+import logging
+import math
+import time
+from typing import Callable, Final, Hashable
+
+from ..http import (
+    HttpRequestCallback,
+    HttpRequest,
+    HttpResponse
+)
+from ..lru import LRUCache
+
+LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
+
+DEFAULT_RATE_LIMITED_RESPONSE: Final[HttpResponse] = HttpResponse.from_text(
+    'Too Many Requests',
+    status=429
+)
+
+# The tokens in a bucket and when they were counted.
+Bucket = tuple[float, float]
+
+
+def client_address(request: HttpRequest) -> str | None:
+    """Find the address of the client.
+
+    Args:
+        request (HttpRequest): The request.
+
+    Returns:
+        str | None: The address, or None if not known.
+    """
+    client = request.scope.get('client')
+    return None if client is None else client[0]
+
+
+class RateLimitMiddleware:
+    """Token bucket rate limit middleware.
+
+    Each key has a bucket of at most `burst` tokens, which refills at `rate`
+    tokens a second. A request takes a token from the bucket of its key, and
+    if the bucket is empty it receives a 429 response with a `retry-after`
+    header.
+
+    ```python
+    # 10 requests a second per API key, with bursts of 50.
+    limiter = RateLimitMiddleware(10, 50, header=b'x-api-key')
+    app = Application(middlewares=[limiter])
+    ```
+
+    By default the key is the address of the client. It can instead be the
+    value of a request header, or come from a function of the request.
+    Requests without a key are not limited. Buckets are refilled when they are
+    next used, and a bucket which would have refilled is discarded, so at most
+    `max_keys` buckets are kept and each request does a constant amount of
+    work.
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            burst: int,
+            *,
+            header: bytes | None = None,
+            key: Callable[[HttpRequest], Hashable | None] | None = None,
+            max_keys: int = 1000000,
+            limited_response: HttpResponse = DEFAULT_RATE_LIMITED_RESPONSE,
+            clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Constructs the rate limit middleware.
+
+        Args:
+            rate (float): The number of requests a second allowed for each key.
+            burst (int): The number of requests allowed at once for each key.
+            header (bytes | None, optional): The name of a request header
+                holding the key, e.g. an API key. Defaults to None.
+            key (Callable[[HttpRequest], Hashable | None] | None, optional): A
+                function returning the key of a request, or None if the
+                request is not limited. Defaults to None, in which case the
+                header or the client address is used.
+            max_keys (int, optional): The maximum number of buckets kept. When
+                full the least recently used are discarded. Defaults to
+                1000000.
+            limited_response (HttpResponse, optional): The response sent when a
+                request is limited. Defaults to DEFAULT_RATE_LIMITED_RESPONSE.
+            clock (Callable[[], float], optional): The clock used to refill
+                the buckets. Defaults to `time.monotonic`.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.header = None if header is None else header.lower()
+        self.key = key
+        self.limited_response = limited_response
+        self.clock = clock
+        self.limited = 0
+        self._buckets: LRUCache[Hashable, Bucket] = LRUCache(
+            max_keys,
+            ttl=burst / rate,
+            clock=clock
+        )
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _key(self, request: HttpRequest) -> Hashable | None:
+        if self.key is not None:
+            return self.key(request)
+        if self.header is not None:
+            return request.header(self.header)
+        return client_address(request)
+
+    def take(self, key: Hashable) -> float:
+        """Take a token from the bucket of a key.
+
+        Args:
+            key (Hashable): The key.
+
+        Returns:
+            float: Zero if a token was taken, otherwise the number of seconds
+                until one will be available.
+        """
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = float(self.burst)
+        else:
+            tokens, counted = bucket
+            tokens = min(self.burst, tokens + (now - counted) * self.rate)
+
+        if tokens < 1:
+            return (1 - tokens) / self.rate
+
+        self._buckets.put(key, (tokens - 1, now))
+        return 0.0
+
+    async def __call__(
+            self,
+            request: HttpRequest,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        """Call the handler if the key of the request is within its rate, or
+        reject the request.
+
+        Args:
+            request (HttpRequest): The request.
+            handler (HttpRequestCallback): The handler.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        key = self._key(request)
+        if key is None:
+            return await handler(request)
+
+        retry_after = self.take(key)
+        if retry_after == 0:
+            return await handler(request)
+
+        self.limited += 1
+        LOGGER.debug('Rate limited request for "%s".', request.scope['path'])
+        response = self.limited_response.copy()
+        response.headers = (response.headers or []) + [
+            (b'retry-after', str(math.ceil(retry_after)).encode('ascii'))
+        ]
+        return response
@@ -0,0 +1,240 @@
+"""Static file serving"""
+
+import asyncio
+from datetime import timezone
+from email.utils import formatdate
+import logging
+import mimetypes
+import os
+import stat
+from typing import Final
+
+from bareutils import header
+
+from .http import BytesBody, FileBody, HttpRequest, HttpResponse, apply_range
+from .lru import LRUCache
+
+LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
+
+
+class _CachedFile:
+
+    __slots__ = (
+        'path',
+        'mtime_ns',
+        'size',
+        'headers',
+        'etag',
+        'last_modified',
+        'content'
+    )
+
+    def __init__(
+            self,
+            path: str,
+            mtime_ns: int,
+            size: int,
+            content_type: bytes,
+            cache_control: bytes | None,
+            content: bytes | None
+    ) -> None:
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.etag = f'"{size:x}-{mtime_ns:x}"'.encode('ascii')
+        self.last_modified = mtime_ns // 1_000_000_000
+        self.headers = [
+            (b'content-type', content_type),
+            (b'etag', self.etag),
+            (
+                b'last-modified',
+                formatdate(self.last_modified, usegmt=True).encode('ascii')
+            ),
+        ]
+        if cache_control is not None:
+            self.headers.append((b'cache-control', cache_control))
+        self.content = content
+
+    def is_current(self, status: os.stat_result) -> bool:
+        return (
+            status.st_mtime_ns == self.mtime_ns and
+            status.st_size == self.size
+        )
+
+
+def _is_match(etag: bytes, if_none_match: bytes) -> bool:
+    if if_none_match.strip() == b'*':
+        return True
+    return any(
+        candidate.strip().removeprefix(b'W/') == etag
+        for candidate in if_none_match.split(b',')
+    )
+
+
+class StaticFiles:
+    """A request handler which serves the files in a directory.
+
+    Small files are kept in a bounded in-memory cache with their precomputed
+    headers, and large files are streamed (or sent by the server when it
+    supports the ASGI `pathsend` or `zerocopysend` extensions). Each request
+    revalidates the cached file with a `stat` call, and conditional requests
+    which match are answered with 304 directly from the cache. Range requests
+    are answered with the partial content, seeking into large files rather
+    than reading them from the start.
+
+    ```python
+    app = Application()
+    app.http_router.add(
+        {'GET', 'HEAD'},
+        '/static/{path:path}',
+        StaticFiles('/var/www/static')
+    )
+    ```
+    """
+
+    def __init__(
+            self,
+            directory: str | os.PathLike,
+            *,
+            path_variable: str = 'path',
+            index_file: str | None = 'index.html',
+            max_file_size: int = 256 * 1024,
+            max_cache_size: int = 64 * 1024 * 1024,
+            max_cache_entries: int = 4096,
+            cache_control: bytes | None = None,
+            chunk_size: int = 65536
+    ) -> None:
+        """A request handler which serves the files in a directory.
+
+        Args:
+            directory (str | os.PathLike): The directory containing the files.
+            path_variable (str, optional): The name of the route variable which
+                holds the path of the file relative to the directory. Defaults
+                to 'path'.
+            index_file (str | None, optional): The file to serve when the path
+                is a directory, if any. Defaults to 'index.html'.
+            max_file_size (int, optional): The size of the largest file which
+                is kept in memory. Defaults to 256KB.
+            max_cache_size (int, optional): The total size of the files kept in
+                memory. Defaults to 64MB.
+            max_cache_entries (int, optional): The maximum number of files for
+                which headers are cached. Defaults to 4096.
+            cache_control (bytes | None, optional): An optional value for the
+                `cache-control` header. Defaults to None.
+            chunk_size (int, optional): The size of the chunks in which large
+                files are read. Defaults to 65536.
+        """
+        self.directory = os.path.realpath(directory)
+        self.path_variable = path_variable
+        self.index_file = index_file
+        self.max_file_size = max_file_size
+        self.cache_control = cache_control
+        self.chunk_size = chunk_size
+        self._cache: LRUCache[str, _CachedFile] = LRUCache(
+            max_cache_entries,
+            max_weight=max_cache_size,
+            weigh=lambda entry: len(entry.content or b'')
+        )
+
+    def _resolve(self, relative_path: str) -> str | None:
+        if '\0' in relative_path:
+            return None
+        path = os.path.realpath(
+            os.path.join(self.directory, relative_path.lstrip('/'))
+        )
+        if os.path.commonpath((self.directory, path)) != self.directory:
+            return None
+        return path
+
+    def _stat(self, path: str) -> tuple[str, os.stat_result] | None:
+        try:
+            status = os.stat(path)
+            if stat.S_ISDIR(status.st_mode) and self.index_file:
+                path = os.path.join(path, self.index_file)
+                status = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(status.st_mode):
+            return None
+        return path, status
+
+    async def _load(self, path: str, status: os.stat_result) -> _CachedFile:
+        media_type, _encoding = mimetypes.guess_type(path)
+        content_type = (media_type or 'application/octet-stream').encode()
+        content: bytes | None = None
+        if status.st_size <= self.max_file_size:
+            content = await asyncio.to_thread(_read_file, path)
+            if len(content) != status.st_size:
+                # The file changed while it was read.
+                content = None
+        entry = _CachedFile(
+            path,
+            status.st_mtime_ns,
+            status.st_size,
+            content_type,
+            self.cache_control,
+            content
+        )
+        self._cache.put(path, entry)
+        return entry
+
+    def _is_not_modified(self, request: HttpRequest, entry: _CachedFile) -> bool:
+        if_none_match = request.header(b'if-none-match')
+        if if_none_match is not None:
+            return _is_match(entry.etag, if_none_match)
+        try:
+            if_modified_since = header.if_modified_since(
+                request.header_items(b'if-modified-since')
+            )
+        except ValueError:
+            return False
+        if if_modified_since is None:
+            return False
+        if if_modified_since.tzinfo is None:
+            if_modified_since = if_modified_since.replace(tzinfo=timezone.utc)
+        return entry.last_modified <= if_modified_since.timestamp()
+
+    async def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Serve a file.
+
+        Args:
+            request (HttpRequest): The request.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        if request.scope['method'] not in ('GET', 'HEAD'):
+            return HttpResponse(405, [(b'allow', b'GET, HEAD')])
+
+        path = self._resolve(str(request.matches.get(self.path_variable, '')))
+        found = (
+            await asyncio.to_thread(self._stat, path) if path is not None
+            else None
+        )
+        if found is None:
+            return HttpResponse(404)
+        path, status = found
+
+        entry = self._cache.get(path)
+        if entry is None or not entry.is_current(status):
+            LOGGER.debug('Loading "%s".', path)
+            entry = await self._load(path, status)
+
+        if self._is_not_modified(request, entry):
+            return HttpResponse(304, entry.headers[1:])
+
+        headers = entry.headers + [
+            (b'content-length', str(entry.size).encode('ascii'))
+        ]
+        if request.scope['method'] == 'HEAD':
+            return HttpResponse(200, headers)
+        body = (
+            BytesBody(entry.content) if entry.content is not None
+            else FileBody(path, count=entry.size, chunk_size=self.chunk_size)
+        )
+        return apply_range(request, HttpResponse(200, headers, body))
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as file:
+        return file.read()
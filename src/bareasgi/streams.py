@@ -0,0 +1,186 @@
+"""Limits for long lived connections"""
+
+import logging
+from typing import AbstractSet, Any, Final, Iterable, Mapping, NamedTuple
+
+from .basic_router.path_definition import PathDefinition
+from .http import HttpResponse
+
+LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
+
+DEFAULT_STREAM_REJECTION_RESPONSE: Final[HttpResponse] = (
+    HttpResponse.from_text(
+        'Service Unavailable',
+        status=503,
+        headers=[(b'retry-after', b'5')]
+    )
+)
+
+# The route of WebSockets which match none of the stream routes.
+WEBSOCKET_ROUTE: Final[str] = 'websocket'
+
+# The WebSocket close code for "try again later".
+TRY_AGAIN_LATER: Final[int] = 1013
+
+# A route path, or the HTTP methods and path of a route.
+StreamRoute = str | tuple[AbstractSet[str], str]
+
+
+class StreamStatistics(NamedTuple):
+    """Statistics for long lived connections"""
+
+    streams: int
+    """The number of open streams"""
+
+    rejected: int
+    """The number of streams which have been rejected"""
+
+    routes: Mapping[str, int]
+    """The number of open streams for each route"""
+
+
+class StreamLimits:
+    """Limits for long lived connections.
+
+    Server sent event streams, long polls and WebSockets hold their resources
+    for minutes, so they are counted separately from other requests. At most
+    `max_streams` may be open at once, and at most `max_per_client` from each
+    client address. An HTTP stream over the limit receives the rejection
+    response without the handler being called, and a WebSocket is closed,
+    by default with code 1013 (try again later).
+
+    ```python
+    app = Application(
+        stream_limits=StreamLimits(
+            ['/events', '/poll/{topic}'],
+            max_streams=5000,
+            max_per_client=4
+        )
+    )
+    ```
+
+    HTTP requests are streams when their path matches one of the `routes`. A
+    route may be given as the methods and path, like `add` on the router, in
+    which case HTTP requests with other methods are not streams.
+
+    ```python
+    StreamLimits([({'GET'}, '/orders/{id}/events'), '/poll/{topic}'])
+    ```
+
+    Every WebSocket is a stream, counted under its route if it matches one,
+    or otherwise under "websocket".
+    """
+
+    def __init__(
+            self,
+            routes: Iterable[StreamRoute] = (),
+            *,
+            max_streams: int = 1000,
+            max_per_client: int = 10,
+            rejection_response: HttpResponse = (
+                DEFAULT_STREAM_REJECTION_RESPONSE
+            ),
+            close_code: int = TRY_AGAIN_LATER
+    ) -> None:
+        """Limits for long lived connections.
+
+        Args:
+            routes (Iterable[StreamRoute], optional): The paths, or the
+                methods and paths, of the routes which stream. Defaults to ().
+            max_streams (int, optional): The maximum number of open streams.
+                Defaults to 1000.
+            max_per_client (int, optional): The maximum number of open streams
+                for each client address. Defaults to 10.
+            rejection_response (HttpResponse, optional): The response sent
+                when an HTTP stream is rejected. Defaults to
+                DEFAULT_STREAM_REJECTION_RESPONSE.
+            close_code (int, optional): The code with which a rejected
+                WebSocket is closed. Defaults to 1013 (try again later).
+        """
+        self.routes: list[tuple[AbstractSet[str] | None, PathDefinition]] = [
+            (None, PathDefinition(route)) if isinstance(route, str)
+            else (route[0], PathDefinition(route[1]))
+            for route in routes
+        ]
+        self.max_streams = max_streams
+        self.max_per_client = max_per_client
+        self.rejection_response = rejection_response
+        self.close_code = close_code
+        self.streams = 0
+        self.rejected = 0
+        self._clients: dict[str, int] = {}
+        self._routes: dict[str, int] = {}
+
+    @property
+    def statistics(self) -> StreamStatistics:
+        """The statistics of the streams.
+
+        Returns:
+            StreamStatistics: The statistics.
+        """
+        return StreamStatistics(
+            self.streams,
+            self.rejected,
+            dict(self._routes)
+        )
+
+    def route(self, scope: Mapping[str, Any]) -> str | None:
+        """Find the stream route of a connection.
+
+        Args:
+            scope (Mapping[str, Any]): The ASGI scope.
+
+        Returns:
+            str | None: The route, or None if the connection is not a stream.
+        """
+        path = scope['path']
+        method = scope.get('method')
+        for methods, path_definition in self.routes:
+            if methods is not None and method is not None and (
+                    method not in methods
+            ):
+                continue
+            is_match, _matches = path_definition.match(path)
+            if is_match:
+                return path_definition.path
+        if scope['type'] == 'websocket':
+            return WEBSOCKET_ROUTE
+        return None
+
+    def open(self, route: str, client: str | None) -> bool:
+        """Count a stream as open, if it is within the limits.
+
+        Args:
+            route (str): The stream route.
+            client (str | None): The client address, if known.
+
+        Returns:
+            bool: True if the stream was opened, or False if it was rejected.
+        """
+        if self.streams >= self.max_streams or (
+                client is not None and
+                self._clients.get(client, 0) >= self.max_per_client
+        ):
+            self.rejected += 1
+            LOGGER.debug('Rejected stream for "%s" from %s.', route, client)
+            return False
+
+        self.streams += 1
+        self._routes[route] = self._routes.get(route, 0) + 1
+        if client is not None:
+            self._clients[client] = self._clients.get(client, 0) + 1
+        return True
+
+    def close(self, route: str, client: str | None) -> None:
+        """Count an open stream as closed.
+
+        Args:
+            route (str): The stream route.
+            client (str | None): The client address, if known.
+        """
+        self.streams -= 1
+        self._routes[route] -= 1
+        if client is not None:
+            self._clients[client] -= 1
+            if not self._clients[client]:
+                del self._clients[client]
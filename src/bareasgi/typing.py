@@ -10,6 +10,8 @@ from .http.typing import (
     HTTPDisconnectEvent,
     HTTPResponseStartEvent,
     HTTPResponseBodyEvent,
+    HTTPResponsePathsendEvent,
+    HTTPResponseZerocopysendEvent,
     HTTPServerPushEvent
 )
 
@@ -52,6 +54,8 @@ ASGIReceiveEvent = Union[
 ASGISendEvent = Union[
     HTTPResponseStartEvent,
     HTTPResponseBodyEvent,
+    HTTPResponsePathsendEvent,
+    HTTPResponseZerocopysendEvent,
     HTTPServerPushEvent,
     HTTPDisconnectEvent,
     WebSocketAcceptEvent,
@@ -1,7 +1,7 @@
 """A handler for websocket event requests."""
 
 import logging
-from typing import Any, Final, Iterable, cast
+from typing import TYPE_CHECKING, Any, Final, Iterable, cast
 
 from .typing import (
     WebSocketScope,
@@ -21,6 +21,9 @@ from .request import WebSocketRequest
 from .router import WebSocketRouter
 from .websocket import WebSocket
 
+if TYPE_CHECKING:
+    from ..streams import StreamLimits
+
 LOGGER: Final[logging.Logger] = logging.getLogger(__name__)
 
 
@@ -99,10 +102,12 @@ class WebSocketInstance:
             scope: WebSocketScope,
             router: WebSocketRouter,
             middleware: Iterable[WebSocketMiddlewareCallback],
-            info: dict[str, Any]
+            info: dict[str, Any],
+            stream_limits: 'StreamLimits | None' = None
     ) -> None:
         self.scope = scope
         self.info = info
+        self.stream_limits = stream_limits
 
         # Find the route.
         handler, matches = router.resolve(scope['path'])
@@ -126,15 +131,10 @@ class WebSocketInstance:
         LOGGER.debug('Received event type "%s".', event['type'])
 
         if event['type'] == 'websocket.connect':
-            await self.handler(
-                WebSocketRequest(
-                    self.scope,
-                    self.info,
-                    {},
-                    self.matches,
-                    WebSocketImpl(receive, send)
-                )
-            )
+            if self.stream_limits is None:
+                await self._handle_request(receive, send)
+            else:
+                await self._process_stream(receive, send, self.stream_limits)
         elif event['type'] == 'websocket.disconnect':
             pass
         else:
@@ -145,3 +145,40 @@ class WebSocketInstance:
             raise WebSocketInternalError(
                 f'Unknown request type "{event["type"]}'
             )
+
+    async def _handle_request(
+            self,
+            receive: ASGIWebSocketReceiveCallable,
+            send: ASGIWebSocketSendCallable
+    ) -> None:
+        await self.handler(
+            WebSocketRequest(
+                self.scope,
+                self.info,
+                {},
+                self.matches,
+                WebSocketImpl(receive, send)
+            )
+        )
+
+    async def _process_stream(
+            self,
+            receive: ASGIWebSocketReceiveCallable,
+            send: ASGIWebSocketSendCallable,
+            stream_limits: 'StreamLimits'
+    ) -> None:
+        route = cast(str, stream_limits.route(self.scope))
+        client = self.scope.get('client')
+        address = None if client is None else client[0]
+
+        if not stream_limits.open(route, address):
+            # Accept before closing, so the client receives the close code.
+            web_socket = WebSocketImpl(receive, send)
+            await web_socket.accept()
+            await web_socket.close(stream_limits.close_code)
+            return
+
+        try:
+            await self._handle_request(receive, send)
+        finally:
+            stream_limits.close(route, address)
@@ -10,6 +10,8 @@ from .websocket import WebSocket
 class WebSocketRequest:
     """A WebSocket request"""
 
+    __slots__ = ('scope', 'info', 'context', 'matches', 'web_socket')
+
     def __init__(
             self,
             scope: WebSocketScope,
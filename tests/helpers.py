@@ -0,0 +1,54 @@
+"""Helpers for building requests in tests"""
+
+from typing import Any
+
+from bareasgi import HttpRequest, bytes_writer
+from bareasgi.utils import NullIter
+
+
+def make_scope(
+        path: str = '/',
+        headers: list[tuple[bytes, bytes]] | None = None,
+        *,
+        scope_type: str = 'http',
+        method: str = 'GET',
+        query_string: bytes = b'',
+        client: str = '127.0.0.1'
+) -> dict[str, Any]:
+    return {
+        'type': scope_type,
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'query_string': query_string,
+        'root_path': '',
+        'headers': headers or [],
+        'client': (client, 1234),
+        'server': ('127.0.0.1', 5000),
+    }
+
+
+def make_request(
+        path: str = '/',
+        headers: list[tuple[bytes, bytes]] | None = None,
+        *,
+        method: str = 'GET',
+        query_string: bytes = b'',
+        client: str = '127.0.0.1',
+        matches: dict[str, Any] | None = None,
+        body: bytes | None = None
+) -> HttpRequest:
+    return HttpRequest(
+        make_scope(  # type: ignore
+            path,
+            headers,
+            method=method,
+            query_string=query_string,
+            client=client
+        ),
+        {},
+        {},
+        matches or {},
+        NullIter() if body is None else bytes_writer(body)
+    )
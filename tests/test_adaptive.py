@@ -0,0 +1,108 @@
+"""Tests for adaptive concurrency limits"""
+
+import asyncio
+
+import pytest
+
+from bareasgi import HttpRequest, HttpResponse
+from bareasgi.middlewares import AdaptiveConcurrencyMiddleware
+from .helpers import make_request
+
+
+@pytest.mark.asyncio
+async def test_limit_adapts():
+    status = 200
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        await asyncio.sleep(0.001)
+        return HttpResponse(status)
+
+    limiter = AdaptiveConcurrencyMiddleware(
+        groups={'/api/{path:path}': 'api'},
+        initial_limit=4
+    )
+    assert limiter.route_group('/api/items') == 'api'
+    assert limiter.route_group('/other') == 'default'
+
+    for _ in range(5):
+        await asyncio.gather(*(
+            limiter(make_request('/api/items'), handler)
+            for _ in range(4)
+        ))
+    statistics = limiter.statistics['api']
+    assert statistics.limit > 4
+    assert statistics.rtt > 0
+    assert statistics.admitted == 20
+    assert limiter.statistics['default'].limit == 4
+
+    status = 503
+    await limiter(make_request('/api/items'), handler)
+    assert limiter.statistics['api'].limit < statistics.limit
+
+
+@pytest.mark.asyncio
+async def test_requests_beyond_the_limit_are_rejected():
+    release = asyncio.Event()
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        await release.wait()
+        return HttpResponse(204)
+
+    limiter = AdaptiveConcurrencyMiddleware(initial_limit=1)
+    first = asyncio.create_task(limiter(make_request(), handler))
+    await asyncio.sleep(0)
+    response = await limiter(make_request(), handler)
+    assert response.status == 503
+    release.set()
+    assert (await first).status == 204
+
+    statistics = limiter.statistics['default']
+    assert statistics.in_flight == 0
+    assert statistics.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_limit_shrinks_as_latency_rises():
+    delay = 0.001
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        await asyncio.sleep(delay)
+        return HttpResponse(204)
+
+    limiter = AdaptiveConcurrencyMiddleware(initial_limit=4)
+    for _ in range(5):
+        await asyncio.gather(*(
+            limiter(make_request(), handler)
+            for _ in range(4)
+        ))
+    limit = limiter.statistics['default'].limit
+
+    delay = 0.05
+    await asyncio.gather(*(
+        limiter(make_request(), handler)
+        for _ in range(limit)
+    ))
+    assert limiter.statistics['default'].limit < limit
+
+
+@pytest.mark.asyncio
+async def test_queued_requests_time_out():
+    release = asyncio.Event()
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        await release.wait()
+        return HttpResponse(204)
+
+    limiter = AdaptiveConcurrencyMiddleware(
+        initial_limit=1,
+        max_queue=1,
+        max_queue_time=0.01
+    )
+    first = asyncio.create_task(limiter(make_request(), handler))
+    await asyncio.sleep(0)
+    response = await limiter(make_request(), handler)
+    assert response.status == 503
+    assert dict(response.headers)[b'retry-after'] == b'1'
+    release.set()
+    assert (await first).status == 204
+    assert limiter.statistics['default'].rejected == 1
@@ -0,0 +1,157 @@
+"""Tests for admission control"""
+
+import asyncio
+
+import pytest
+
+from bareasgi import HttpRequest, HttpResponse, bytes_reader
+from bareasgi.basic_router.http_router import BasicHttpRouter
+from bareasgi.middlewares import DEFAULT_PRIORITIES, AdmissionMiddleware
+from bareasgi.limits import ConcurrencyLimit, PriorityConcurrencyLimit
+from .helpers import make_request
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit():
+    limit = ConcurrencyLimit(1, max_queue=2)
+    assert await limit.acquire()
+    first = asyncio.create_task(limit.acquire())
+    second = asyncio.create_task(limit.acquire(timeout=0.01))
+    await asyncio.sleep(0)
+    assert limit.queued == 2
+    assert not await limit.acquire()
+
+    assert not await second
+    assert limit.queued == 1
+    limit.release()
+    assert await first
+    assert limit.in_flight == 1
+
+    limit.limit = 3
+    assert limit.try_acquire()
+    limit.limit = 1
+    limit.release()
+    limit.release()
+    assert limit.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_excess_requests_are_rejected():
+    release = asyncio.Event()
+
+    async def handler(request: HttpRequest) -> HttpResponse:
+        if request.scope['path'] == '/slow':
+            await release.wait()
+        return HttpResponse.from_text('ok')
+
+    admission = AdmissionMiddleware(
+        1,
+        max_queue=1,
+        max_queue_time=10,
+        exempt=('/health',)
+    )
+    slow = asyncio.create_task(admission(make_request('/slow'), handler))
+    queued = asyncio.create_task(admission(make_request(), handler))
+    await asyncio.sleep(0)
+
+    response = await admission(make_request(), handler)
+    assert response.status == 503
+    assert dict(response.headers)[b'retry-after'] == b'1'
+    assert await bytes_reader(response.body) == b'Service Unavailable'
+
+    response = await admission(make_request('/health'), handler)
+    assert response.status == 200
+
+    release.set()
+    assert (await slow).status == 200
+    assert (await queued).status == 200
+
+    statistics = admission.statistics
+    assert statistics.in_flight == 0
+    assert statistics.queued == 0
+    assert statistics.admitted == 2
+    assert statistics.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_priority_concurrency_limit():
+    limit = PriorityConcurrencyLimit(
+        1,
+        {'interactive': 2, 'batch': 1},
+        max_queue=4
+    )
+    assert limit.try_acquire()
+
+    order: list[str] = []
+
+    async def wait(priority: str) -> None:
+        if await limit.acquire(priority=priority):
+            order.append(priority)
+            limit.release()
+        else:
+            order.append(f'shed {priority}')
+
+    tasks = [
+        asyncio.create_task(wait(priority))
+        for priority in ('batch', 'batch', 'batch', 'interactive')
+    ]
+    await asyncio.sleep(0)
+    assert limit.queued_by_priority() == {'interactive': 1, 'batch': 3}
+
+    # The queue is full, so the most recent batch request is shed.
+    tasks.append(asyncio.create_task(wait('interactive')))
+    for _ in range(2):
+        await asyncio.sleep(0)
+    assert order == ['shed batch']
+
+    limit.release()
+    await asyncio.gather(*tasks)
+    assert order == [
+        'shed batch', 'interactive', 'batch', 'interactive', 'batch'
+    ]
+    assert limit.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_route_priorities():
+    release = asyncio.Event()
+    priorities = []
+
+    async def handler(request: HttpRequest) -> HttpResponse:
+        priorities.append(request.priority)
+        await release.wait()
+        return HttpResponse(204)
+
+    router = BasicHttpRouter(HttpResponse(404))
+    router.add({'GET'}, '/export', handler, priority='batch')
+    router.add({'GET'}, '/items', handler)
+    assert router.resolve_route('GET', '/export')[2] == 'batch'
+    assert router.resolve_route('GET', '/items')[2] is None
+
+    admission = AdmissionMiddleware(
+        1,
+        max_queue=1,
+        max_queue_time=10,
+        priorities=DEFAULT_PRIORITIES
+    )
+
+    def _call(path: str):
+        handler, matches, priority = router.resolve_route('GET', path)
+        request = make_request(path)
+        request.matches = matches
+        request.priority = priority
+        return asyncio.create_task(admission(request, handler))
+
+    first = _call('/items')
+    batch = _call('/export')
+    await asyncio.sleep(0)
+    assert admission.priority(make_request()) == 'interactive'
+
+    interactive = _call('/items')
+    await asyncio.sleep(0)
+    assert (await batch).status == 503
+
+    release.set()
+    assert (await first).status == 204
+    assert (await interactive).status == 204
+    assert priorities == [None, None]
@@ -0,0 +1,107 @@
+"""Tests for bulkheads"""
+
+import asyncio
+
+import pytest
+
+from bareasgi import HttpRequest, HttpResponse, make_middleware_chain
+from bareasgi.middlewares import BulkheadMiddleware
+from .helpers import make_request
+
+
+@pytest.mark.asyncio
+async def test_slow_routes_do_not_starve_others():
+    release = asyncio.Event()
+
+    async def report(_request: HttpRequest) -> HttpResponse:
+        await release.wait()
+        return HttpResponse(200)
+
+    async def api(_request: HttpRequest) -> HttpResponse:
+        return HttpResponse(204)
+
+    reports = BulkheadMiddleware('reports', 1, max_queue=1, max_queue_time=10)
+    report_handler = make_middleware_chain(reports, handler=report)
+    api_handler = make_middleware_chain(
+        BulkheadMiddleware('api', 10),
+        handler=api
+    )
+
+    tasks = [
+        asyncio.create_task(report_handler(make_request('/reports/1')))
+        for _ in range(2)
+    ]
+    await asyncio.sleep(0)
+    assert reports.in_flight == 1
+    assert reports.queued == 1
+
+    response = await report_handler(make_request('/reports/2'))
+    assert response.status == 503
+    assert reports.rejected == 1
+
+    response = await api_handler(make_request('/items'))
+    assert response.status == 204
+
+    release.set()
+    assert [response.status for response in await asyncio.gather(*tasks)] == [
+        200, 200
+    ]
+    assert reports.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_queued_requests_time_out():
+    release = asyncio.Event()
+
+    async def report(_request: HttpRequest) -> HttpResponse:
+        await release.wait()
+        return HttpResponse(200)
+
+    reports = BulkheadMiddleware('reports', 1, max_queue=2, max_queue_time=10)
+    first = asyncio.create_task(reports(make_request(), report))
+    await asyncio.sleep(0)
+
+    # The request deadline is sooner than the queue time.
+    request = make_request()
+    request.deadline = asyncio.get_running_loop().time() + 0.01
+    response = await reports(request, report)
+    assert response.status == 503
+    assert reports.queued == 0
+
+    reports.max_queue_time = 0.01
+    response = await reports(make_request(), report)
+    assert response.status == 503
+    assert reports.rejected == 2
+
+    release.set()
+    assert (await first).status == 200
+    assert reports.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_routes_sharing_an_instance_share_a_pool():
+    release = asyncio.Event()
+
+    async def report(_request: HttpRequest) -> HttpResponse:
+        await release.wait()
+        return HttpResponse(200)
+
+    reports = BulkheadMiddleware('reports', 1)
+    exports = BulkheadMiddleware('exports', 1)
+    daily = make_middleware_chain(reports, handler=report)
+    annual = make_middleware_chain(reports, handler=report)
+    export = make_middleware_chain(exports, handler=report)
+
+    first = asyncio.create_task(daily(make_request('/reports/daily')))
+    await asyncio.sleep(0)
+    response = await annual(make_request('/reports/annual'))
+    assert response.status == 503
+
+    second = asyncio.create_task(export(make_request('/export')))
+    await asyncio.sleep(0)
+    assert reports.in_flight == exports.in_flight == 1
+    assert reports.rejected == 1
+    assert exports.rejected == 0
+
+    release.set()
+    assert (await first).status == (await second).status == 200
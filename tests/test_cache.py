@@ -0,0 +1,353 @@
+"""Tests for the response cache"""
+
+import asyncio
+
+import pytest
+
+from bareasgi import HttpRequest, HttpResponse, LifespanRequest, bytes_reader
+from bareasgi.middlewares import DiskCache, ResponseCacheMiddleware
+from .helpers import make_request
+
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _stream(text: str):
+    yield text.encode()
+
+
+@pytest.mark.asyncio
+async def test_hits_are_replayed():
+    clock = FakeClock()
+    calls = []
+
+    async def handler(request: HttpRequest) -> HttpResponse:
+        calls.append(request)
+        return HttpResponse(
+            200,
+            [(b'cache-control', b'max-age=10')],
+            _stream(f'call {len(calls)}')
+        )
+
+    cache = ResponseCacheMiddleware(clock=clock)
+    response = await cache(make_request(), handler)
+    assert await bytes_reader(response.body) == b'call 1'
+
+    clock.now += 5
+    response = await cache(make_request(), handler)
+    assert await bytes_reader(response.body) == b'call 1'
+    assert dict(response.headers)[b'age'] == b'5'
+    assert dict(response.headers)[b'content-length'] == b'6'
+
+    response = await cache(make_request(query_string=b'a=1'), handler)
+    assert await bytes_reader(response.body) == b'call 2'
+
+    clock.now += 6
+    response = await cache(make_request(), handler)
+    assert await bytes_reader(response.body) == b'call 3'
+
+    statistics = cache.statistics
+    assert statistics.hits == 1
+    assert statistics.misses == 3
+    assert statistics.entries == 2
+    assert statistics.evictions == 1
+    assert statistics.hit_ratio == 0.25
+
+
+@pytest.mark.asyncio
+async def test_vary():
+    async def handler(request: HttpRequest) -> HttpResponse:
+        return HttpResponse.from_text(
+            (request.header(b'accept-language') or b'').decode(),
+            headers=[(b'vary', b'Accept-Language')]
+        )
+
+    cache = ResponseCacheMiddleware(default_ttl=60)
+    for language in (b'en', b'fr', b'en', b'fr'):
+        response = await cache(
+            make_request(headers=[(b'accept-language', language)]),
+            handler
+        )
+        assert await bytes_reader(response.body) == language
+
+    assert cache.statistics.hits == 2
+    assert cache.statistics.entries == 2
+
+
+@pytest.mark.asyncio
+async def test_route_ttl_and_uncacheable():
+    async def handler(request: HttpRequest) -> HttpResponse:
+        if request.scope['path'] == '/private':
+            return HttpResponse.from_text(
+                'private',
+                headers=[(b'cache-control', b'private, max-age=60')]
+            )
+        return HttpResponse.from_text('item')
+
+    cache = ResponseCacheMiddleware(routes={'/items/{id:int}': 30})
+    assert cache.route_ttl('/items/1') == 30
+    assert cache.route_ttl('/other') is None
+
+    for path in ('/items/1', '/items/1', '/other', '/other', '/private'):
+        await cache(make_request(path), handler)
+    await cache(
+        make_request('/items/1', [(b'authorization', b'Bearer token')]),
+        handler
+    )
+
+    assert cache.statistics.hits == 1
+    assert cache.statistics.entries == 1
+
+
+@pytest.mark.asyncio
+async def test_large_bodies_are_not_cached():
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        return HttpResponse(200, None, _stream('x' * 100))
+
+    cache = ResponseCacheMiddleware(default_ttl=60, max_entry_size=10)
+    response = await cache(make_request(), handler)
+    assert await bytes_reader(response.body) == b'x' * 100
+    assert cache.statistics.entries == 0
+
+
+@pytest.mark.asyncio
+async def test_disk_cache(tmp_path):
+    calls = []
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        calls.append(1)
+        return HttpResponse(
+            200,
+            [(b'content-type', b'text/plain')],
+            _stream('x' * 100)
+        )
+
+    disk_cache = DiskCache(tmp_path, flush_interval=0)
+    cache = ResponseCacheMiddleware(
+        default_ttl=60,
+        max_entry_size=10,
+        disk_cache=disk_cache
+    )
+    response = await cache(make_request('/report'), handler)
+    assert await bytes_reader(response.body) == b'x' * 100
+    assert cache.statistics.entries == 0
+    assert len(disk_cache) == 2
+
+    # A new process sharing the directory.
+    cache = ResponseCacheMiddleware(
+        default_ttl=60,
+        max_entry_size=10,
+        disk_cache=DiskCache(tmp_path, read_only=True)
+    )
+    response = await cache(make_request('/report'), handler)
+    assert response.status == 200
+    assert dict(response.headers)[b'content-length'] == b'100'
+    assert await bytes_reader(response.body) == b'x' * 100
+    assert len(calls) == 1
+
+    # The writer restarts, and evicts to make room.
+    disk_cache = DiskCache(tmp_path, max_size=400)
+    assert len(disk_cache) == 2
+    assert disk_cache.put('other', {}, b'y' * 300, 60)
+    assert disk_cache.get('other').read() == b'y' * 300
+    assert disk_cache.evictions > 0
+    assert disk_cache.size <= 400
+
+
+@pytest.mark.asyncio
+async def test_large_bodies_are_streamed_to_disk(tmp_path):
+    produced = []
+
+    async def chunks():
+        for _ in range(10):
+            produced.append(1)
+            yield b'x' * 100
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        return HttpResponse(200, None, chunks())
+
+    disk_cache = DiskCache(tmp_path)
+    cache = ResponseCacheMiddleware(
+        default_ttl=60,
+        max_entry_size=150,
+        disk_cache=disk_cache
+    )
+
+    # Only enough for the memory tier is read before the response is sent,
+    # and an incomplete body is not stored.
+    response = await cache(make_request('/report'), handler)
+    assert len(produced) == 2
+    body = response.body.__aiter__()
+    assert await body.__anext__() == b'x' * 100
+    await body.aclose()
+    assert len(disk_cache) == 1
+    assert not list(tmp_path.glob('.tmp*'))
+
+    response = await cache(make_request('/report'), handler)
+    assert await bytes_reader(response.body) == b'x' * 1000
+    assert len(disk_cache) == 2
+
+    entry = disk_cache.get(cache._disk_key(  # pylint: disable=protected-access
+        make_request('/report'),
+        ()
+    ))
+    assert [len(chunk) async for chunk in entry.iter_content(400)] == [
+        400, 400, 200
+    ]
+    assert entry.read() == b''
+
+
+@pytest.mark.asyncio
+async def test_purge(tmp_path):
+    async def handler(request: HttpRequest) -> HttpResponse:
+        item = request.scope['path'].rsplit('/', 1)[1]
+        return HttpResponse.from_text(
+            item,
+            headers=[(b'surrogate-key', f'item-{item} items'.encode())]
+        )
+
+    disk_cache = DiskCache(tmp_path)
+    cache = ResponseCacheMiddleware(default_ttl=60, disk_cache=disk_cache)
+    for item in ('1', '2', '3'):
+        response = await cache(make_request(f'/items/{item}'), handler)
+        assert b'surrogate-key' not in dict(response.headers)
+    assert cache.statistics.entries == 3
+
+    assert await cache.purge('item-2') == 1
+    assert cache.statistics.entries == 2
+    assert len(disk_cache) == 5
+
+    assert await cache.purge(b'items') == 2
+    assert cache.statistics.entries == 0
+    assert len(disk_cache) == 3
+    assert await cache.purge('items') == 0
+
+    # The tags survive a restart, including entries not yet in the index.
+    await cache(make_request('/items/4'), handler)
+    assert DiskCache(tmp_path).purge('item-4') == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_store_in_background(tmp_path):
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        return HttpResponse.from_text('x' * 100)
+
+    disk_cache = DiskCache(tmp_path)
+    cache = ResponseCacheMiddleware(
+        default_ttl=60,
+        max_entry_size=10,
+        disk_cache=disk_cache
+    )
+    lifespan = LifespanRequest({'type': 'lifespan'}, {})  # type: ignore
+    await cache.startup(lifespan)
+
+    response = await cache(make_request('/report'), handler)
+    assert await bytes_reader(response.body) == b'x' * 100
+    while cache._tasks:  # pylint: disable=protected-access
+        await asyncio.sleep(0.01)
+    assert len(disk_cache) == 2
+
+    await cache.clear()
+    assert len(disk_cache) == 0
+    assert not list(tmp_path.glob('*.entry'))
+
+    await cache.shutdown(lifespan)
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate():
+    clock = FakeClock()
+    calls = []
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        calls.append(1)
+        return HttpResponse.from_text(
+            f'call {len(calls)}',
+            headers=[(b'cache-control', b'max-age=10, stale-while-revalidate=30')]
+        )
+
+    cache = ResponseCacheMiddleware(clock=clock)
+    lifespan = LifespanRequest({'type': 'lifespan'}, {})  # type: ignore
+    await cache.startup(lifespan)
+
+    await cache(make_request(), handler)
+    clock.now += 15
+    response = await cache(make_request(), handler)
+    assert await bytes_reader(response.body) == b'call 1'
+    await asyncio.sleep(0)
+    assert len(calls) == 2
+
+    response = await cache(make_request(), handler)
+    assert await bytes_reader(response.body) == b'call 2'
+    assert cache.statistics.stale == 1
+
+    await cache.shutdown(lifespan)
+
+
+@pytest.mark.asyncio
+async def test_stale_if_error_and_overload():
+    clock = FakeClock()
+    failing = False
+    release = asyncio.Event()
+
+    async def handler(request: HttpRequest) -> HttpResponse:
+        if failing:
+            raise RuntimeError('unavailable')
+        if request.scope['path'] == '/slow':
+            await release.wait()
+        return HttpResponse.from_text('ok')
+
+    cache = ResponseCacheMiddleware(
+        default_ttl=10,
+        stale_if_error=60,
+        max_in_flight=1,
+        clock=clock
+    )
+    await cache(make_request(), handler)
+    clock.now += 20
+
+    slow = asyncio.create_task(cache(make_request('/slow'), handler))
+    await asyncio.sleep(0)
+    failing = True
+    response = await cache(make_request(), handler)
+    assert await bytes_reader(response.body) == b'ok'
+    assert cache.statistics.stale == 1
+    failing = False
+    release.set()
+    await slow
+
+    failing = True
+    response = await cache(make_request(), handler)
+    assert await bytes_reader(response.body) == b'ok'
+    assert cache.statistics.stale == 2
+
+    clock.now += 60
+    with pytest.raises(RuntimeError):
+        await cache(make_request(), handler)
+
+
+@pytest.mark.asyncio
+async def test_malformed_cache_control():
+    calls = []
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        calls.append(1)
+        return HttpResponse.from_text(
+            'ok',
+            headers=[(b'cache-control', b'max-age=soon')]
+        )
+
+    cache = ResponseCacheMiddleware(default_ttl=60)
+    bad_request = [(b'cache-control', b'max-age=abc')]
+    for _ in range(2):
+        response = await cache(make_request(headers=bad_request), handler)
+        assert response.status == 200
+    # The response with a malformed header is not cached.
+    assert len(calls) == 2
+    assert cache.statistics.entries == 0
@@ -0,0 +1,97 @@
+"""Tests for request coalescing"""
+
+import asyncio
+
+import pytest
+
+from bareasgi import HttpRequest, HttpResponse, bytes_reader
+from bareasgi.middlewares import CoalescingMiddleware
+from .helpers import make_request
+
+
+async def _stream(text: str):
+    yield text.encode()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced():
+    calls = []
+    release = asyncio.Event()
+
+    async def handler(request: HttpRequest) -> HttpResponse:
+        calls.append(request.scope['path'])
+        await release.wait()
+        return HttpResponse(200, [], _stream(f'call {len(calls)}'))
+
+    middleware = CoalescingMiddleware()
+    tasks = [
+        asyncio.create_task(middleware(make_request(path), handler))
+        for path in ('/a', '/a', '/a', '/b')
+    ]
+    await asyncio.sleep(0)
+    assert middleware.in_flight == 2
+    release.set()
+    responses = await asyncio.gather(*tasks)
+
+    bodies = [await bytes_reader(response.body) for response in responses]
+    assert bodies[0] == bodies[1] == bodies[2]
+    assert sorted(calls) == ['/a', '/b']
+    assert middleware.coalesced == 2
+    assert middleware.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_headers_are_part_of_the_key():
+    calls = []
+
+    async def handler(request: HttpRequest) -> HttpResponse:
+        calls.append(request)
+        await asyncio.sleep(0)
+        return HttpResponse.from_text('ok')
+
+    middleware = CoalescingMiddleware()
+    await asyncio.gather(
+        middleware(make_request(headers=[(b'cookie', b'a=1')]), handler),
+        middleware(make_request(headers=[(b'cookie', b'a=2')]), handler)
+    )
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared():
+    calls = []
+
+    async def handler(request: HttpRequest) -> HttpResponse:
+        calls.append(request)
+        await asyncio.sleep(0)
+        raise ValueError('failed')
+
+    middleware = CoalescingMiddleware()
+    results = await asyncio.gather(
+        middleware(make_request(), handler),
+        middleware(make_request(), handler),
+        return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_responses_setting_cookies_are_not_shared():
+    calls = []
+
+    async def handler(request: HttpRequest) -> HttpResponse:
+        calls.append(request)
+        await asyncio.sleep(0)
+        return HttpResponse.from_text(
+            'ok',
+            headers=[(b'set-cookie', f'session={len(calls)}'.encode())]
+        )
+
+    middleware = CoalescingMiddleware()
+    responses = await asyncio.gather(
+        middleware(make_request(), handler),
+        middleware(make_request(), handler)
+    )
+    assert len(calls) == 2
+    assert responses[0].headers != responses[1].headers
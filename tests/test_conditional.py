@@ -0,0 +1,81 @@
+"""Tests for conditional requests"""
+
+import pytest
+
+from bareasgi import HttpRequest, HttpResponse, bytes_reader
+from bareasgi.http import make_middleware_chain
+from bareasgi.middlewares import ConditionalMiddleware, VersionKeyMiddleware
+from .helpers import make_request
+
+
+async def _stream():
+    yield b'hello, '
+    yield b'world'
+
+
+@pytest.mark.asyncio
+async def test_etag_is_computed():
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        return HttpResponse(200, [(b'content-type', b'text/plain')], _stream())
+
+    middleware = ConditionalMiddleware()
+    response = await middleware(make_request(), handler)
+    assert response.status == 200
+    headers = dict(response.headers)
+    etag = headers[b'etag']
+    assert etag.startswith(b'"')
+    assert headers[b'content-length'] == b'12'
+    assert await bytes_reader(response.body) == b'hello, world'
+
+    response = await middleware(
+        make_request(headers=[(b'if-none-match', b'W/' + etag)]),
+        handler
+    )
+    assert response.status == 304
+    assert response.body is None
+    assert response.headers == [(b'etag', etag)]
+
+
+@pytest.mark.asyncio
+async def test_large_body_is_not_tagged():
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        return HttpResponse(200, None, _stream())
+
+    middleware = ConditionalMiddleware(max_size=8)
+    response = await middleware(make_request(), handler)
+    assert response.status == 200
+    assert response.headers == []
+    assert await bytes_reader(response.body) == b'hello, world'
+
+
+@pytest.mark.asyncio
+async def test_version_key():
+    calls = []
+
+    async def get_version(_request: HttpRequest) -> int:
+        return 42
+
+    async def handler(request: HttpRequest) -> HttpResponse:
+        calls.append(request)
+        return HttpResponse.from_text('content')
+
+    version_key = VersionKeyMiddleware(
+        get_version,
+        [(b'cache-control', b'no-cache')]
+    )
+    chain = make_middleware_chain(
+        ConditionalMiddleware(),
+        version_key,
+        handler=handler
+    )
+
+    response = await chain(make_request())
+    assert response.status == 200
+    etag = dict(response.headers)[b'etag']
+    assert etag == version_key.make_etag(42)
+    assert len(calls) == 1
+
+    response = await chain(make_request(headers=[(b'if-none-match', etag)]))
+    assert response.status == 304
+    assert response.headers == [(b'cache-control', b'no-cache'), (b'etag', etag)]
+    assert len(calls) == 1
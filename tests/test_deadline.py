@@ -0,0 +1,113 @@
+"""Tests for request deadlines"""
+
+import asyncio
+
+import pytest
+
+from bareasgi import (
+    Application,
+    HttpRequest,
+    HttpResponse,
+    bytes_reader,
+    make_middleware_chain
+)
+from bareasgi.middlewares import DeadlineMiddleware
+from .helpers import make_request, make_scope
+from .mock_io import MockIO
+
+
+@pytest.mark.asyncio
+async def test_deadline_middleware():
+    cancelled = []
+
+    async def handler(request: HttpRequest) -> HttpResponse:
+        assert request.time_remaining is not None
+        if request.scope['path'] == '/':
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(request.scope['path'])
+                raise
+        return HttpResponse.from_text('done')
+
+    middleware = DeadlineMiddleware(
+        0.01,
+        HttpResponse.from_text('Unavailable', status=503)
+    )
+    request = make_request()
+    response = await middleware(request, handler)
+    assert response.status == 503
+    assert await bytes_reader(response.body) == b'Unavailable'
+    assert cancelled == ['/']
+
+    # The earlier deadline wins.
+    request = make_request()
+    request.deadline = asyncio.get_running_loop().time() + 0.01
+    response = await DeadlineMiddleware(60)(request, handler)
+    assert response.status == 504
+
+
+@pytest.mark.asyncio
+async def test_handler_timeouts_are_not_deadlines():
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        async with asyncio.timeout(0):
+            await asyncio.sleep(1)
+        return HttpResponse.from_text('unreachable')
+
+    with pytest.raises(TimeoutError):
+        await DeadlineMiddleware(60)(make_request(), handler)
+
+
+@pytest.mark.asyncio
+async def test_application_deadline():
+    async def slow(_request: HttpRequest) -> HttpResponse:
+        await asyncio.sleep(10)
+        return HttpResponse.from_text('slow')
+
+    async def fast(request: HttpRequest) -> HttpResponse:
+        assert request.deadline is not None
+        return HttpResponse.from_text('fast')
+
+    app = Application(request_timeout=0.01)
+    app.http_router.add({'GET'}, '/slow', slow)
+    app.http_router.add(
+        {'GET'},
+        '/fast',
+        make_middleware_chain(DeadlineMiddleware(60), handler=fast)
+    )
+
+    for path, status, content in (
+            ('/slow', 504, b'Gateway Timeout'),
+            ('/fast', 200, b'fast'),
+            ('/slow', 504, b'Gateway Timeout'),
+    ):
+        io = MockIO()
+        await io.write({'type': 'http.request', 'body': b'', 'more_body': False})
+        await io.write({'type': 'http.disconnect'})
+        await app(make_scope(path), io.receive, io.send)  # type: ignore
+        start = await io.read()
+        assert start['status'] == status
+        body = await io.read()
+        assert body['body'] == content
+
+
+@pytest.mark.asyncio
+async def test_idle_timeout():
+    async def stalled():
+        yield b'first'
+        await asyncio.sleep(10)
+        yield b'never'
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        return HttpResponse(200, [], stalled())
+
+    app = Application(idle_timeout=0.01)
+    app.http_router.add({'GET'}, '/', handler)
+
+    io = MockIO()
+    await io.write({'type': 'http.request', 'body': b'', 'more_body': False})
+    with pytest.raises(TimeoutError):
+        await app(make_scope('/'), io.receive, io.send)  # type: ignore
+    assert (await io.read())['type'] == 'http.response.start'
+    # The task waiting for the disconnect is not left behind.
+    assert asyncio.all_tasks() == {asyncio.current_task()}
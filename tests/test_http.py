@@ -1,5 +1,8 @@
 """Tests for basic functionality"""
 
+import asyncio
+from typing import cast
+
 from bareutils.streaming import bytes_reader, bytes_writer
 import pytest
 from bareasgi import (
@@ -8,6 +11,8 @@ from bareasgi import (
     HttpResponse,
     text_writer
 )
+from bareasgi.http import HTTPScope
+from .helpers import make_scope
 from .mock_io import MockIO
 
 
@@ -235,3 +240,75 @@ async def test_empty_response_body():
     assert body_response['type'] == 'http.response.body'
     assert body_response['body'] == b""
     assert not body_response['more_body']
+
+
+async def _get_file(
+        tmp_path,
+        extensions: dict,
+        chunk_size: int = 65536
+) -> list:
+    path = tmp_path / 'file.txt'
+    path.write_bytes(b'aaabbbccc')
+
+    async def http_request_callback(_request: HttpRequest) -> HttpResponse:
+        return HttpResponse.from_file(path, chunk_size=chunk_size)
+
+    app = Application()
+    app.http_router.add({'GET'}, '/{path}', http_request_callback)
+
+    sent: list = []
+    is_complete = asyncio.Event()
+    requests = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # Only disconnect when the response has been sent.
+        await is_complete.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.zerocopysend':
+            message = {**message, 'file': message['file'].read()}
+        sent.append(message)
+        if message['type'] != 'http.response.start' and not message.get('more_body'):
+            is_complete.set()
+
+    scope = make_scope('/foo')
+    scope['extensions'] = extensions
+    await app(cast(HTTPScope, scope), receive, send)
+    return sent
+
+
+@pytest.mark.asyncio
+async def test_file_response_pathsend(tmp_path):
+    sent = await _get_file(tmp_path, {'http.response.pathsend': {}})
+    assert sent[0]['type'] == 'http.response.start'
+    assert sent[0]['headers'] == [
+        (b'content-type', b'text/plain'),
+        (b'content-length', b'9'),
+    ]
+    assert sent[1] == {
+        'type': 'http.response.pathsend',
+        'path': str(tmp_path / 'file.txt')
+    }
+
+
+@pytest.mark.asyncio
+async def test_file_response_zerocopysend(tmp_path):
+    sent = await _get_file(tmp_path, {'http.response.zerocopysend': {}})
+    assert sent[1] == {
+        'type': 'http.response.zerocopysend',
+        'file': b'aaabbbccc',
+        'offset': 0,
+        'more_body': False
+    }
+
+
+@pytest.mark.asyncio
+async def test_file_response_chunked(tmp_path):
+    sent = await _get_file(tmp_path, {}, chunk_size=3)
+    assert [
+        (message['body'], message['more_body'])
+        for message in sent[1:]
+    ] == [(b'aaa', True), (b'bbb', True), (b'ccc', False)]
@@ -0,0 +1,101 @@
+"""Tests for idempotency keys"""
+
+import asyncio
+
+import pytest
+
+from bareasgi import HttpRequest, HttpResponse, bytes_reader
+from bareasgi.middlewares import IdempotencyMiddleware
+from .helpers import make_request
+
+
+@pytest.mark.asyncio
+async def test_retries_are_replayed():
+    calls = []
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        calls.append(1)
+        await asyncio.sleep(0)
+        return HttpResponse.from_text(f'order {len(calls)}', status=201)
+
+    def order(headers: list[tuple[bytes, bytes]], path: str = '/orders'):
+        return make_request(path, headers, method='POST')
+
+    middleware = IdempotencyMiddleware()
+    key = [(b'idempotency-key', b'abc')]
+    first, concurrent = await asyncio.gather(
+        middleware(order(key), handler),
+        middleware(order(key), handler)
+    )
+    retry = await middleware(order(key), handler)
+
+    assert len(calls) == 1
+    assert first.status == concurrent.status == retry.status == 201
+    assert await bytes_reader(first.body) == b'order 1'
+    assert await bytes_reader(concurrent.body) == b'order 1'
+    assert await bytes_reader(retry.body) == b'order 1'
+    assert dict(retry.headers)[b'idempotent-replayed'] == b'true'
+    assert middleware.replays == 2
+
+    await middleware(order([(b'idempotency-key', b'def')]), handler)
+    await middleware(order(key, '/payments'), handler)
+    await middleware(order([]), handler)
+    assert len(calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_stored():
+    calls = []
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('failed')
+        if len(calls) == 2:
+            return HttpResponse(503)
+        if len(calls) == 3:
+            return HttpResponse(429)
+        return HttpResponse(204)
+
+    def order():
+        return make_request('/orders', key, method='POST')
+
+    middleware = IdempotencyMiddleware()
+    key = [(b'idempotency-key', b'abc')]
+    with pytest.raises(RuntimeError):
+        await middleware(order(), handler)
+    assert (await middleware(order(), handler)).status == 503
+    assert (await middleware(order(), handler)).status == 429
+    assert (await middleware(order(), handler)).status == 204
+    assert (await middleware(order(), handler)).status == 204
+    assert len(calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_large_responses_are_not_repeated():
+    calls = []
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        calls.append(1)
+        await asyncio.sleep(0)
+        return HttpResponse.from_text('x' * 100, status=201)
+
+    def order():
+        return make_request('/orders', key, method='POST')
+
+    middleware = IdempotencyMiddleware(max_entry_size=10)
+    key = [(b'idempotency-key', b'abc')]
+    first, concurrent = await asyncio.gather(
+        middleware(order(), handler),
+        middleware(order(), handler)
+    )
+    retry = await middleware(order(), handler)
+
+    assert len(calls) == 1
+    assert await bytes_reader(first.body) == b'x' * 100
+    for response in (concurrent, retry):
+        assert response.status == 201
+        assert response.body is None
+        headers = dict(response.headers)
+        assert b'content-length' not in headers
+        assert headers[b'idempotent-replayed'] == b'true'
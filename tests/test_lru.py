@@ -0,0 +1,60 @@
+"""Tests for the least recently used cache"""
+
+from bareasgi import MemoryBudget
+from bareasgi.lru import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    discarded = []
+    cache: LRUCache[str, int] = LRUCache(
+        2,
+        on_discard=lambda key, value: discarded.append(key)
+    )
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert discarded == ['b']
+    assert cache.evictions == 1
+
+
+def test_lru_cache_weight_and_ttl():
+    now = [0.0]
+    cache: LRUCache[str, bytes] = LRUCache(
+        10,
+        ttl=5,
+        max_weight=10,
+        weigh=len,
+        clock=lambda: now[0]
+    )
+    assert cache.put('a', b'12345')
+    assert cache.put('b', b'123456')
+    assert 'a' not in cache
+    assert cache.weight == 6
+    assert not cache.put('c', b'x' * 11)
+    now[0] = 6
+    assert cache.get('b') is None
+    assert cache.weight == 0
+
+
+def test_lru_cache_memory_budget():
+    budget = MemoryBudget(10)
+    cache: LRUCache[str, bytes] = LRUCache(10, weigh=len, memory_budget=budget)
+    assert cache.put('a', b'x' * 4)
+    assert cache.put('b', b'x' * 4)
+    assert budget.reserved == 8
+
+    # Other buffers take most of the budget, so the cache gives up entries.
+    budget.reserve(4)
+    assert cache.put('c', b'x' * 2)
+    assert 'a' not in cache and 'b' in cache
+    assert budget.reserved == 10
+
+    budget.reserve(10)
+    assert not cache.put('d', b'x')
+    assert len(cache) == 0
+    budget.release(14)
+    assert budget.reserved == 0
+
@@ -0,0 +1,154 @@
+"""Tests for the memory budget"""
+
+import asyncio
+
+import pytest
+
+from bareasgi import (
+    Application,
+    HttpRequest,
+    HttpResponse,
+    MemoryBudget,
+    bytes_reader
+)
+from bareasgi.middlewares import CoalescingMiddleware
+from .helpers import make_request, make_scope
+from .mock_io import MockIO
+
+
+@pytest.mark.asyncio
+async def test_wait_for_room():
+    budget = MemoryBudget(10)
+    assert budget.try_reserve(10)
+    assert not budget.try_reserve(1)
+    assert not budget.admit()
+    assert budget.refused == 2
+    assert not await budget.wait(0.01)
+
+    waiter = asyncio.create_task(budget.wait())
+    await asyncio.sleep(0)
+    budget.release(5)
+    assert await waiter
+    assert budget.available == 5
+
+
+@pytest.mark.asyncio
+async def test_request_bodies():
+    budget = MemoryBudget(100)
+    sizes = []
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        # The body is not read by the handler, so it is buffered by the flush.
+        sizes.append(budget.reserved)
+        return HttpResponse(204)
+
+    app = Application(memory_budget=budget)
+    app.http_router.add({'POST'}, '/upload', handler)
+
+    io = MockIO()
+    await io.write({
+        'type': 'http.request',
+        'body': b'x' * 10,
+        'more_body': True
+    })
+    await io.write({
+        'type': 'http.request',
+        'body': b'x' * 20,
+        'more_body': False
+    })
+    await io.write({'type': 'http.disconnect'})
+    await app(  # type: ignore
+        make_scope('/upload', method='POST'),
+        io.receive,
+        io.send
+    )
+    assert (await io.read())['status'] == 204
+    assert sizes == [10]
+    assert budget.reserved == 0
+
+    # New requests with more body to come are refused at once when the budget
+    # is exhausted, without reading the rest of their body.
+    budget.reserve(100)
+    io = MockIO()
+    await io.write({'type': 'http.request', 'body': b'x', 'more_body': True})
+    await asyncio.wait_for(
+        app(  # type: ignore
+            make_scope('/upload', method='POST'),
+            io.receive,
+            io.send
+        ),
+        1
+    )
+    start = await io.read()
+    assert start['status'] == 503
+    assert (b'connection', b'close') in start['headers']
+    assert sizes == [10]
+    assert budget.refused == 1
+    assert budget.reserved == 100
+
+
+@pytest.mark.asyncio
+async def test_coalescing_within_budget():
+    budget = MemoryBudget(1024)
+    release = asyncio.Event()
+    calls = []
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        calls.append(1)
+        await release.wait()
+        return HttpResponse.from_text('shared')
+
+    async def call_twice(read: bool) -> None:
+        tasks = [
+            asyncio.create_task(middleware(make_request('/upload'), handler))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        responses = await asyncio.gather(*tasks)
+        release.clear()
+        if read:
+            for response in responses:
+                assert await bytes_reader(response.body) == b'shared'
+
+    middleware = CoalescingMiddleware(max_size=512, memory_budget=budget)
+    for read in (True, False):
+        # The shared body is held until no response holds it, whether or not
+        # it was sent.
+        await call_twice(read)
+        await asyncio.sleep(0)
+        assert budget.reserved == 0
+    assert len(calls) == 2
+
+    # Leave too little room to buffer a shared response.
+    budget.reserve(600)
+    await call_twice(True)
+    assert len(calls) == 4
+    assert budget.reserved == 600
+
+
+@pytest.mark.asyncio
+async def test_shared_bodies_are_held_by_responses():
+    budget = MemoryBudget(1024)
+    release = asyncio.Event()
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        await release.wait()
+        return HttpResponse.from_text('shared')
+
+    middleware = CoalescingMiddleware(max_size=512, memory_budget=budget)
+    tasks = [
+        asyncio.create_task(middleware(make_request(), handler))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    responses = [await task for task in tasks]
+    del tasks
+    # Let the completed tasks be released.
+    await asyncio.sleep(0)
+    assert budget.reserved == 6
+    responses.pop()
+    assert budget.reserved == 6
+    responses.clear()
+    assert budget.reserved == 0
@@ -0,0 +1,75 @@
+"""Tests for multipart parsing"""
+
+import pytest
+
+from bareasgi import HttpRequest, bytes_writer
+from bareasgi.http import MultipartError, multipart_reader
+
+BODY = (
+    b'preamble\r\n'
+    b'--XyZ\r\n'
+    b'Content-Disposition: form-data; name="field"\r\n'
+    b'\r\n'
+    b'value\r\n'
+    b'--XyZ\r\n'
+    b'Content-Disposition: form-data; name="upload"; filename="a;b.txt"\r\n'
+    b'Content-Type: text/plain\r\n'
+    b'\r\n'
+    b'line one --XyZ inline\r\nline two\r\n'
+    b'--XyZ--\r\n'
+    b'epilogue'
+)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 64, -1])
+async def test_multipart_reader(chunk_size):
+    parts = []
+    async for part in multipart_reader(bytes_writer(BODY, chunk_size), b'XyZ'):
+        parts.append((part.name, part.filename, part.content_type, await part.read()))
+
+    assert parts == [
+        ('field', None, None, b'value'),
+        (
+            'upload',
+            'a;b.txt',
+            b'text/plain',
+            b'line one --XyZ inline\r\nline two'
+        ),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unread_parts_are_skipped():
+    names = [
+        part.name
+        async for part in multipart_reader(bytes_writer(BODY, 5), b'XyZ')
+    ]
+    assert names == ['field', 'upload']
+
+
+@pytest.mark.asyncio
+async def test_spool():
+    request = HttpRequest(
+        {  # type: ignore
+            'headers': [
+                (b'content-type', b'multipart/form-data; boundary="XyZ"')
+            ]
+        },
+        {},
+        {},
+        {},
+        bytes_writer(BODY, 10)
+    )
+    async for part in request.multipart():
+        with await part.spool(max_size=4) as file:
+            content = file.read()
+        if part.name == 'field':
+            assert content == b'value'
+
+
+@pytest.mark.asyncio
+async def test_truncated():
+    with pytest.raises(MultipartError):
+        async for part in multipart_reader(bytes_writer(BODY[:120]), b'XyZ'):
+            await part.read()
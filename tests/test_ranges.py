@@ -0,0 +1,138 @@
+"""Tests for range requests"""
+
+import pytest
+
+from bareasgi import HttpRequest, HttpResponse, bytes_reader
+from bareasgi.http import FileBody, apply_range, parse_range
+from bareasgi.middlewares import RangeMiddleware
+from .helpers import make_request
+
+
+def test_parse_range():
+    assert parse_range(b'bytes=0-9', 100) == [(0, 10)]
+    assert parse_range(b'bytes=90-', 100) == [(90, 100)]
+    assert parse_range(b'bytes=-10', 100) == [(90, 100)]
+    assert parse_range(b'bytes=-200', 100) == [(0, 100)]
+    assert parse_range(b'bytes=95-200', 100) == [(95, 100)]
+    assert parse_range(b'bytes=0-0, 10-19', 100) == [(0, 1), (10, 20)]
+    assert parse_range(b'bytes=100-', 100) == []
+    assert parse_range(b'bytes=9-0', 100) is None
+    assert parse_range(b'items=0-9', 100) is None
+    assert parse_range(b'bytes=a-b', 100) is None
+
+
+@pytest.mark.asyncio
+async def test_single_range_of_bytes():
+    request = make_request(headers=[(b'range', b'bytes=2-5')])
+    response = apply_range(
+        request,
+        HttpResponse.from_bytes(b'0123456789')
+    )
+    assert response.status == 206
+    headers = dict(response.headers)
+    assert headers[b'content-range'] == b'bytes 2-5/10'
+    assert headers[b'content-length'] == b'4'
+    assert headers[b'accept-ranges'] == b'bytes'
+    assert await bytes_reader(response.body) == b'2345'
+
+
+@pytest.mark.asyncio
+async def test_single_range_of_file(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'0123456789')
+    request = make_request(headers=[(b'range', b'bytes=-3')])
+    response = apply_range(request, HttpResponse.from_file(path))
+    assert response.status == 206
+    assert isinstance(response.body, FileBody)
+    assert response.body.offset == 7
+    assert response.body.count == 3
+    assert dict(response.headers)[b'content-range'] == b'bytes 7-9/10'
+    assert await bytes_reader(response.body) == b'789'
+
+
+def test_range_of_missing_file(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'0123456789')
+    response = HttpResponse.from_file(path)
+    path.unlink()
+
+    request = make_request(headers=[(b'range', b'bytes=-3')])
+    response = apply_range(request, response)
+    assert response.status == 200
+    assert isinstance(response.body, FileBody)
+    assert response.body.is_whole_file
+
+
+@pytest.mark.asyncio
+async def test_multiple_ranges():
+    request = make_request(headers=[(b'range', b'bytes=0-1,8-')])
+    response = apply_range(
+        request,
+        HttpResponse.from_text('0123456789')
+    )
+    assert response.status == 206
+    headers = dict(response.headers)
+    content_type = headers[b'content-type']
+    assert content_type.startswith(b'multipart/byteranges; boundary=')
+    boundary = content_type.split(b'=', 1)[1]
+    body = await bytes_reader(response.body)
+    assert int(headers[b'content-length']) == len(body)
+    assert body == (
+        b'\r\n--' + boundary + b'\r\n'
+        b'content-type: text/plain\r\n'
+        b'content-range: bytes 0-1/10\r\n\r\n'
+        b'01'
+        b'\r\n--' + boundary + b'\r\n'
+        b'content-type: text/plain\r\n'
+        b'content-range: bytes 8-9/10\r\n\r\n'
+        b'89'
+        b'\r\n--' + boundary + b'--\r\n'
+    )
+
+
+def test_unsatisfiable_range():
+    request = make_request(headers=[(b'range', b'bytes=20-')])
+    response = apply_range(request, HttpResponse.from_bytes(b'0123456789'))
+    assert response.status == 416
+    assert dict(response.headers)[b'content-range'] == b'bytes */10'
+
+
+def test_if_range():
+    headers = [(b'etag', b'"v1"')]
+    request = make_request(headers=[
+        (b'range', b'bytes=0-1'),
+        (b'if-range', b'"v1"')
+    ])
+    response = apply_range(
+        request,
+        HttpResponse.from_bytes(b'0123456789', headers=list(headers))
+    )
+    assert response.status == 206
+
+    request = make_request(headers=[
+        (b'range', b'bytes=0-1'),
+        (b'if-range', b'"v2"')
+    ])
+    response = apply_range(
+        request,
+        HttpResponse.from_bytes(b'0123456789', headers=list(headers))
+    )
+    assert response.status == 200
+
+
+@pytest.mark.asyncio
+async def test_range_middleware():
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        return HttpResponse.from_bytes(b'0123456789')
+
+    middleware = RangeMiddleware()
+    response = await middleware(
+        make_request(headers=[(b'range', b'bytes=5-')]),
+        handler
+    )
+    assert response.status == 206
+    assert await bytes_reader(response.body) == b'56789'
+
+    response = await middleware(make_request(headers=[]), handler)
+    assert response.status == 200
+    assert dict(response.headers)[b'accept-ranges'] == b'bytes'
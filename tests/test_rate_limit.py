@@ -0,0 +1,101 @@
+"""Tests for rate limiting"""
+
+import pytest
+
+from bareasgi import HttpRequest, HttpResponse
+from bareasgi.middlewares import RateLimitMiddleware
+from .helpers import make_request
+
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _handler(_request: HttpRequest) -> HttpResponse:
+    return HttpResponse(204)
+
+
+@pytest.mark.asyncio
+async def test_buckets_refill():
+    clock = FakeClock()
+    limiter = RateLimitMiddleware(0.5, 2, clock=clock)
+
+    statuses = [
+        (await limiter(make_request(), _handler)).status
+        for _ in range(3)
+    ]
+    assert statuses == [204, 204, 429]
+    response = await limiter(make_request(), _handler)
+    assert dict(response.headers)[b'retry-after'] == b'2'
+    assert limiter.limited == 2
+
+    response = await limiter(make_request(client='10.0.0.2'), _handler)
+    assert response.status == 204
+
+    clock.now += 2
+    assert (await limiter(make_request(), _handler)).status == 204
+    assert (await limiter(make_request(), _handler)).status == 429
+
+    clock.now += 10
+    statuses = [
+        (await limiter(make_request(), _handler)).status
+        for _ in range(3)
+    ]
+    assert statuses == [204, 204, 429]
+    assert len(limiter) == 2
+
+
+@pytest.mark.asyncio
+async def test_header_keys():
+    limiter = RateLimitMiddleware(1, 1, header=b'X-API-Key', max_keys=1)
+
+    for api_key, status in ((b'a', 204), (b'a', 429), (b'b', 204), (b'a', 204)):
+        response = await limiter(
+            make_request(headers=[(b'x-api-key', api_key)]),
+            _handler
+        )
+        assert response.status == status
+
+    # Requests without a key are not limited.
+    for _ in range(3):
+        assert (await limiter(make_request(), _handler)).status == 204
+
+
+@pytest.mark.asyncio
+async def test_key_function_and_limited_response():
+    clock = FakeClock()
+    limited_response = HttpResponse.from_text(
+        'Slow down',
+        status=429,
+        headers=[(b'x-reason', b'quota')]
+    )
+    limiter = RateLimitMiddleware(
+        4,
+        1,
+        key=lambda request: request.header(b'x-tenant'),
+        limited_response=limited_response,
+        clock=clock
+    )
+
+    def tenant_request() -> HttpRequest:
+        return make_request(headers=[(b'x-tenant', b'acme')])
+
+    assert limiter.take(b'other') == 0
+    assert limiter.take(b'other') == 0.25
+
+    assert (await limiter(tenant_request(), _handler)).status == 204
+    response = await limiter(tenant_request(), _handler)
+    assert response.status == 429
+    headers = dict(response.headers)
+    assert headers[b'x-reason'] == b'quota'
+    assert headers[b'retry-after'] == b'1'
+    # The pre-built response is not changed.
+    assert (b'retry-after', b'1') not in limited_response.headers
+
+    clock.now += 0.25
+    assert (await limiter(tenant_request(), _handler)).status == 204
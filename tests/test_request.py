@@ -0,0 +1,111 @@
+"""Tests for the http request"""
+
+import pytest
+
+from bareasgi.http import CookieSigner, parse_url_encoded
+from bareasgi.http.query import QUERY_STRING_CACHE
+from .helpers import make_request
+
+
+def test_query():
+    request = make_request(
+        '/foo',
+        query_string=b'a=1&b=two%20words&a=3&empty='
+    )
+    assert request.query == {
+        'a': ('1', '3'),
+        'b': ('two words',),
+        'empty': ('',)
+    }
+    assert request.query is request.query
+    assert make_request('/foo', []).query == {}
+
+
+def test_query_string_cache():
+    assert parse_url_encoded(b'x=1&y=2') is parse_url_encoded(b'x=1&y=2')
+    assert parse_url_encoded(b'x=1', use_cache=False) is not parse_url_encoded(b'x=1')
+
+    # Setting the size to zero disables the cache, including existing entries.
+    QUERY_STRING_CACHE.maxsize = 0
+    try:
+        first, second = parse_url_encoded(b'x=1'), parse_url_encoded(b'x=1')
+        assert first is not second
+    finally:
+        QUERY_STRING_CACHE.maxsize = 1024
+
+
+@pytest.mark.asyncio
+async def test_form():
+    request = make_request(
+        '/foo',
+        [(b'content-type', b'application/x-www-form-urlencoded')],
+        body=b'first=Mickey&last=Mouse'
+    )
+    form = await request.form()
+    assert form == {'first': ('Mickey',), 'last': ('Mouse',)}
+    assert await request.form() is form
+
+    with pytest.raises(ValueError):
+        await make_request('/foo', [(b'content-type', b'text/plain')]).form()
+
+    request = make_request(
+        '/foo',
+        [(
+            b'content-type',
+            b'application/x-www-form-urlencoded; charset=unknown'
+        )],
+        body=b'name=%E9'
+    )
+    with pytest.raises(ValueError):
+        await request.form()
+
+
+def test_header_index():
+    request = make_request('/foo', [
+        (b'host', b'example.com'),
+        (b'accept', b'text/html'),
+        (b'Accept', b'application/json'),
+    ])
+    assert request.headers == {
+        b'host': [b'example.com'],
+        b'accept': [b'text/html', b'application/json'],
+    }
+    assert request.headers is request.headers
+    assert request.header(b'ACCEPT') == b'text/html'
+    assert request.header(b'cookie') is None
+    assert request.header_items(b'Accept') == [
+        (b'accept', b'text/html'),
+        (b'accept', b'application/json'),
+    ]
+    assert request.url == 'http://example.com/foo'
+
+
+def test_cookies():
+    request = make_request('/foo', [
+        (b'cookie', b'first=one; second=two'),
+        (b'cookie', b'first=three'),
+    ])
+    assert request.cookies == {
+        b'first': [b'one', b'three'],
+        b'second': [b'two'],
+    }
+    assert request.cookies is request.cookies
+
+
+def test_cookie_signer():
+    now = [0.0]
+    signer = CookieSigner(b'secret', cache_ttl=10, clock=lambda: now[0])
+    token = signer.sign(b'session-id')
+    assert signer.verify(token) == b'session-id'
+    assert signer.verify(token) == b'session-id'
+    now[0] = 11
+    assert signer.verify(token) == b'session-id'
+    assert signer.verify(token[:-2] + b'xx') is None
+    assert signer.verify(b'no-signature') is None
+    assert CookieSigner(b'other').verify(token) is None
+
+    # The cache does not hold the tokens themselves.
+    verified = signer._verified  # pylint: disable=protected-access
+    assert len(verified) == 1 and token not in verified
+    signer.forget(token)
+    assert len(verified) == 0
@@ -0,0 +1,75 @@
+"""Tests for the http response"""
+
+import json
+
+import pytest
+
+from bareasgi import (
+    Codec,
+    CodecRegistry,
+    HttpResponse,
+    bytes_reader
+)
+from .helpers import make_request
+
+
+async def _rows(count: int):
+    for i in range(count):
+        yield {'id': i}
+
+
+@pytest.mark.asyncio
+async def test_json_stream():
+    response = HttpResponse.from_json_stream(_rows(5), batch_size=2)
+    assert response.headers == [(b'content-type', b'application/json')]
+    chunks = [chunk async for chunk in response.body]
+    assert len(chunks) == 4
+    assert json.loads(b''.join(chunks)) == [{'id': i} for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_json_stream_empty():
+    response = HttpResponse.from_json_stream(_rows(0))
+    assert await bytes_reader(response.body) == b'[]'
+
+
+@pytest.mark.asyncio
+async def test_ndjson_stream():
+    response = HttpResponse.from_ndjson_stream(_rows(3), batch_size=2)
+    assert response.headers == [(b'content-type', b'application/x-ndjson')]
+    content = await bytes_reader(response.body)
+    assert [json.loads(line) for line in content.splitlines()] == [
+        {'id': i} for i in range(3)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_from_data_negotiates_codec():
+    codecs = CodecRegistry([
+        Codec(b'application/json', lambda x: json.dumps(x).encode(), json.loads),
+        Codec(b'text/plain', lambda x: str(x).encode(), bytes.decode),
+    ])
+    request = make_request(
+        headers=[(b'accept', b'text/plain;q=0.9, */*;q=0.1')]
+    )
+    request.codecs = codecs
+    response = HttpResponse.from_data(request, 42)
+    assert (b'content-type', b'text/plain') in response.headers
+    assert await bytes_reader(response.body) == b'42'
+
+    request = make_request(headers=[(b'accept', b'*/*')])
+    request.codecs = codecs
+    response = HttpResponse.from_data(request, [1])
+    assert (b'content-type', b'application/json') in response.headers
+
+    request = make_request(headers=[(b'accept', b'image/png')])
+    request.codecs = codecs
+    assert HttpResponse.from_data(request, [1]).status == 406
+
+
+def test_negotiation_is_cached():
+    codecs = CodecRegistry()
+    first = codecs.negotiate(b'application/json')
+    assert first is not None
+    assert codecs.negotiate(b'application/json') is first
+    assert codecs.negotiate(None) is first
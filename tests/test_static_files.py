@@ -0,0 +1,107 @@
+"""Tests for static files"""
+
+import pytest
+
+from bareasgi import HttpRequest, bytes_reader
+from bareasgi.http import FileBody
+from bareasgi.static_files import StaticFiles
+from .helpers import make_request
+
+
+def _static_request(
+        name: str,
+        headers: list[tuple[bytes, bytes]] | None = None,
+        method: str = 'GET'
+) -> HttpRequest:
+    return make_request(
+        '/static/' + name,
+        headers,
+        method=method,
+        matches={'path': name}
+    )
+
+
+@pytest.fixture(name='static_dir')
+def fixture_static_dir(tmp_path):
+    (tmp_path / 'index.html').write_bytes(b'<html></html>')
+    (tmp_path / 'small.txt').write_bytes(b'small')
+    (tmp_path / 'large.bin').write_bytes(b'x' * 100)
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_small_file_is_cached(static_dir):
+    static_files = StaticFiles(static_dir, max_file_size=10)
+
+    response = await static_files(_static_request('small.txt'))
+    assert response.status == 200
+    assert await bytes_reader(response.body) == b'small'
+    headers = dict(response.headers)
+    assert headers[b'content-type'] == b'text/plain'
+    assert headers[b'content-length'] == b'5'
+
+    (static_dir / 'small.txt').unlink()
+    (static_dir / 'small.txt').write_bytes(b'changed')
+    response = await static_files(_static_request('small.txt'))
+    assert await bytes_reader(response.body) == b'changed'
+    assert dict(response.headers)[b'etag'] != headers[b'etag']
+
+
+@pytest.mark.asyncio
+async def test_large_file_is_streamed(static_dir):
+    static_files = StaticFiles(static_dir, max_file_size=10)
+    response = await static_files(_static_request('large.bin'))
+    assert isinstance(response.body, FileBody)
+    assert await bytes_reader(response.body) == b'x' * 100
+
+
+@pytest.mark.asyncio
+async def test_not_modified(static_dir):
+    static_files = StaticFiles(static_dir)
+    response = await static_files(_static_request('small.txt'))
+    etag = dict(response.headers)[b'etag']
+    last_modified = dict(response.headers)[b'last-modified']
+
+    response = await static_files(
+        _static_request('small.txt', [(b'if-none-match', b'"other", ' + etag)])
+    )
+    assert response.status == 304
+    assert response.body is None
+
+    response = await static_files(
+        _static_request('small.txt', [(b'if-modified-since', last_modified)])
+    )
+    assert response.status == 304
+
+
+@pytest.mark.asyncio
+async def test_index_and_missing(static_dir):
+    static_files = StaticFiles(static_dir)
+    response = await static_files(_static_request(''))
+    assert await bytes_reader(response.body) == b'<html></html>'
+    assert (await static_files(_static_request('missing.txt'))).status == 404
+    assert (await static_files(_static_request('../secret'))).status == 404
+    # A name too long for the file system.
+    assert (await static_files(_static_request('x' * 300))).status == 404
+    response = await static_files(_static_request('small.txt', method='HEAD'))
+    assert response.status == 200
+    assert response.body is None
+
+
+@pytest.mark.asyncio
+async def test_range_request(static_dir):
+    static_files = StaticFiles(static_dir, max_file_size=10)
+
+    response = await static_files(
+        _static_request('small.txt', [(b'range', b'bytes=1-2')])
+    )
+    assert response.status == 206
+    assert await bytes_reader(response.body) == b'ma'
+
+    response = await static_files(
+        _static_request('large.bin', [(b'range', b'bytes=90-')])
+    )
+    assert response.status == 206
+    assert isinstance(response.body, FileBody)
+    assert response.body.offset == 90
+    assert dict(response.headers)[b'content-length'] == b'10'
@@ -0,0 +1,177 @@
+"""Tests for stream limits"""
+
+import asyncio
+
+import pytest
+
+from bareasgi import (
+    Application,
+    HttpRequest,
+    HttpResponse,
+    StreamLimits,
+    WebSocketRequest
+)
+from .helpers import make_scope
+from .mock_io import MockIO
+
+
+@pytest.mark.asyncio
+async def test_http_streams():
+    release = asyncio.Event()
+
+    async def events():
+        await release.wait()
+        yield b'data: done\n\n'
+
+    async def handler(_request: HttpRequest) -> HttpResponse:
+        return HttpResponse(
+            200,
+            [(b'content-type', b'text/event-stream')],
+            events()
+        )
+
+    limits = StreamLimits(['/events/{topic}'], max_streams=2, max_per_client=1)
+    app = Application(stream_limits=limits)
+    app.http_router.add({'GET'}, '/events/{topic}', handler)
+    assert limits.route(make_scope('/events/a')) == '/events/{topic}'
+    assert limits.route(make_scope('/other')) is None
+
+    async def call(client: str) -> tuple[MockIO, asyncio.Task]:
+        io = MockIO()
+        await io.write({
+            'type': 'http.request',
+            'body': b'',
+            'more_body': False
+        })
+        task = asyncio.create_task(
+            app(  # type: ignore
+                make_scope('/events/a', client=client),
+                io.receive,
+                io.send
+            )
+        )
+        return io, task
+
+    first, first_task = await call('10.0.0.1')
+    assert (await first.read())['status'] == 200
+    assert limits.statistics.routes == {'/events/{topic}': 1}
+
+    # Too many from one client.
+    io, task = await call('10.0.0.1')
+    assert (await io.read())['status'] == 503
+    await io.write({'type': 'http.disconnect'})
+    await task
+
+    second, second_task = await call('10.0.0.2')
+    assert (await second.read())['status'] == 200
+
+    # Too many in total.
+    io, task = await call('10.0.0.3')
+    assert (await io.read())['status'] == 503
+    await io.write({'type': 'http.disconnect'})
+    await task
+
+    release.set()
+    for io, task in ((first, first_task), (second, second_task)):
+        assert (await io.read())['body'] == b'data: done\n\n'
+        await io.write({'type': 'http.disconnect'})
+        await task
+
+    statistics = limits.statistics
+    assert statistics.streams == 0
+    assert statistics.rejected == 2
+    assert statistics.routes == {'/events/{topic}': 0}
+
+
+@pytest.mark.asyncio
+async def test_websocket_streams():
+    release = asyncio.Event()
+
+    async def handler(request: WebSocketRequest) -> None:
+        await request.web_socket.accept()
+        await release.wait()
+        await request.web_socket.close()
+
+    limits = StreamLimits(max_streams=1)
+    app = Application(stream_limits=limits)
+    app.ws_router.add('/chat', handler)
+
+    first = MockIO()
+    await first.write({'type': 'websocket.connect'})
+    first_task = asyncio.create_task(
+        app(  # type: ignore
+            make_scope('/chat', scope_type='websocket'),
+            first.receive,
+            first.send
+        )
+    )
+    assert (await first.read())['type'] == 'websocket.accept'
+    assert limits.statistics.routes == {'websocket': 1}
+
+    io = MockIO()
+    await io.write({'type': 'websocket.connect'})
+    await app(  # type: ignore
+        make_scope('/chat', scope_type='websocket', client='10.0.0.2'),
+        io.receive,
+        io.send
+    )
+    assert (await io.read())['type'] == 'websocket.accept'
+    assert await io.read() == {'type': 'websocket.close', 'code': 1013}
+
+    release.set()
+    await first_task
+    assert limits.statistics.streams == 0
+
+
+@pytest.mark.asyncio
+async def test_rejected_streams_with_bodies():
+    release = asyncio.Event()
+
+    async def handler(request: HttpRequest) -> HttpResponse:
+        async for _chunk in request.body:
+            pass
+        await release.wait()
+        return HttpResponse(204)
+
+    limits = StreamLimits([({'POST'}, '/poll')], max_per_client=1)
+    app = Application(stream_limits=limits)
+    app.http_router.add({'GET', 'POST'}, '/poll', handler)
+    assert limits.route(make_scope('/poll', method='GET')) is None
+
+    async def call() -> tuple[MockIO, asyncio.Task]:
+        io = MockIO()
+        for more_body in (True, False):
+            await io.write({
+                'type': 'http.request',
+                'body': b'{"since": 1}',
+                'more_body': more_body
+            })
+        await io.write({'type': 'http.disconnect'})
+        task = asyncio.create_task(
+            app(  # type: ignore
+                make_scope('/poll', method='POST'),
+                io.receive,
+                io.send
+            )
+        )
+        return io, task
+
+    first, first_task = await call()
+    while limits.statistics.streams == 0:
+        await asyncio.sleep(0)
+
+    # The body of the rejected request is read before responding.
+    io, task = await call()
+    assert (await io.read())['status'] == 503
+    await task
+    assert limits.statistics.rejected == 1
+
+    release.set()
+    assert (await first.read())['status'] == 204
+    await first_task
+
+    # The client may open another stream once the first has closed.
+    io, task = await call()
+    assert (await io.read())['status'] == 204
+    await task
+    assert limits.statistics.streams == 0